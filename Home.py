@@ -1,5 +1,6 @@
 import streamlit as st
-from PIL import Image
+
+from utils.assets import logo
 
 st.set_page_config(
     page_title="Home",
@@ -8,8 +9,7 @@ st.set_page_config(
 )
 
 #Image_path = 'C:\\Users\\User\\Documents\\repos\\ftc_python\\logo.png'
-image = Image.open('logo.png')
-st.sidebar.image(image, width = 100)
+st.sidebar.image(logo(), width = 100, output_format = 'PNG')
 
 st.sidebar.markdown( '# Cury Company' )
 st.sidebar.markdown(' ## Fastest and Best Delivery in Town')
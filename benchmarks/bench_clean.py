@@ -0,0 +1,110 @@
+""" Benchmark of the vectorized clean_dataframe against the original row-by-row cleaner.
+
+    Usage (from the repository root):
+        python -m benchmarks.bench_clean --path dataset/train.csv --rows 5000000 --repeat 3
+
+    When --rows is larger than the file, the csv is tiled into a temporary file of that size.
+"""
+#Import Libraries
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from utils.data import DATASET_PATH, clean_dataframe, read_dataset
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def clean_dataframe_legacy(df):
+    """ This function is the original cleaner of the pages, kept only as the benchmark baseline.
+
+        Input: Dataframe (read with a plain pd.read_csv)
+        Output: Dataframe
+    """
+    df = df.loc[df['Delivery_person_Age'] != 'NaN ', :]
+    df = df.loc[df['Time_Orderd'] != 'NaN ', :]
+    df = df.loc[df['multiple_deliveries'] != 'NaN ', :]
+    df = df.loc[df['Festival'] != 'NaN ', :]
+    df = df.loc[df['City'] != 'NaN ', :]
+
+    df['Delivery_person_Age'] = df['Delivery_person_Age'].astype(int)
+    df['Delivery_person_Ratings'] = df['Delivery_person_Ratings'].astype(float)
+    df['multiple_deliveries'] = df['multiple_deliveries'].astype(int)
+
+    df.loc[:,'ID'] = df.loc[:,'ID'].str.strip()
+    df.loc[:,'Delivery_person_ID'] = df.loc[:,'Delivery_person_ID'].str.strip()
+    df.loc[:,'Weatherconditions'] = df.loc[:,'Weatherconditions'].str.strip()
+    df.loc[:,'Road_traffic_density'] = df.loc[:,'Road_traffic_density'].str.strip()
+    df.loc[:,'Type_of_order'] = df.loc[:,'Type_of_order'].str.strip()
+    df.loc[:,'Type_of_vehicle'] = df.loc[:,'Type_of_vehicle'].str.strip()
+    df.loc[:,'Festival'] = df.loc[:,'Festival'].str.strip()
+    df.loc[:,'City'] = df.loc[:,'City'].str.strip()
+
+    df['Order_Date'] = pd.to_datetime( df['Order_Date'], format='%d-%m-%Y' )
+
+    df['Time_taken(min)'] = df['Time_taken(min)'].apply(lambda x: x.split('(min) ')[1])
+    df['Time_taken(min)'] = df['Time_taken(min)'].astype(int)
+
+    df['Weatherconditions'] = df['Weatherconditions'].apply(lambda x: x.split('conditions ')[1])
+    return df
+
+def tile_csv(path, rows, directory):
+    """ This function writes a csv with `rows` lines by repeating the lines of `path`.
+
+        Input: Source csv, number of rows, output directory
+        Output: Path of the new csv
+    """
+    raw = pd.read_csv(path, dtype = str, keep_default_na = False)
+    repeats = -(-rows // len(raw))
+    tiled = pd.concat([raw] * repeats, ignore_index = True).head(rows)
+    out = os.path.join(directory, 'train_%d.csv' % rows)
+    tiled.to_csv(out, index = False)
+    return out
+
+def best_of(func, repeat):
+    """ This function runs func `repeat` times.
+
+        Input: Function without arguments, number of runs
+        Output: Tuple (best time in seconds, result of the last run)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default = DATASET_PATH, help = 'raw csv in the train.csv format')
+    parser.add_argument('--rows', type = int, default = None, help = 'tile the csv up to this number of rows')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'runs per measurement, the best one is kept')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = tile_csv(args.path, args.rows, directory) if args.rows else args.path
+
+        raw_legacy = pd.read_csv(path)
+        raw = read_dataset(path)
+        rows = len(raw)
+
+        legacy_read, _ = best_of(lambda: pd.read_csv(path), args.repeat)
+        new_read, _ = best_of(lambda: read_dataset(path), args.repeat)
+        legacy_clean, legacy_df = best_of(lambda: clean_dataframe_legacy(raw_legacy.copy()), args.repeat)
+        new_clean, new_df = best_of(lambda: clean_dataframe(raw), args.repeat)
+
+    #Same values once the compact types (categories, int8/int16, float32) are widened back
+    pd.testing.assert_frame_equal(new_df.astype(legacy_df.dtypes.to_dict()), legacy_df, check_dtype = False)
+
+    print('rows: %d' % rows)
+    print('%-8s %12s %12s %12s' % ('', 'read (s)', 'clean (s)', 'total (s)'))
+    print('%-8s %12.3f %12.3f %12.3f' % ('legacy', legacy_read, legacy_clean, legacy_read + legacy_clean))
+    print('%-8s %12.3f %12.3f %12.3f' % ('new', new_read, new_clean, new_read + new_clean))
+    print('clean speedup: %.1fx' % (legacy_clean / new_clean))
+
+if __name__ == '__main__':
+    main()
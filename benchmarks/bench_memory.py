@@ -0,0 +1,33 @@
+""" Memory used by each column of the cleaned dataframe: original cleaner against the compact types
+    of clean_dataframe (categories, int8/int16 integers, float32 coordinates).
+
+    Usage (from the repository root):
+        python -m benchmarks.bench_memory --path dataset/train.csv
+"""
+#Import Libraries
+import argparse
+
+import pandas as pd
+
+from benchmarks.bench_clean import clean_dataframe_legacy
+from utils.data import DATASET_PATH, clean_dataframe, memory_report, read_dataset
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default = DATASET_PATH, help = 'raw csv in the train.csv format')
+    args = parser.parse_args()
+
+    legacy_df = clean_dataframe_legacy(pd.read_csv(args.path))
+    new_df = clean_dataframe(read_dataset(args.path))
+
+    report = memory_report(legacy_df, new_df)
+    report[['before', 'after']] = report[['before', 'after']] / 2 ** 20
+    print('rows: %d' % len(new_df))
+    print(report.rename(columns = {'before': 'before (MiB)', 'after': 'after (MiB)'}).round(2).to_string())
+
+if __name__ == '__main__':
+    main()
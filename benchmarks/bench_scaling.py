@@ -0,0 +1,182 @@
+""" Scaling benchmark of the data pipeline and of every chart builder of the three pages.
+
+    Usage (from the repository root):
+        python -m benchmarks.bench_scaling --sizes 45000 450000 4500000 --out bench.json
+        python -m benchmarks.bench_scaling --sizes 45000 450000 --baseline bench.json
+
+    For each size a synthetic train.csv is generated (benchmarks.synthetic, cached in --data-dir),
+    then each stage is timed (best of --repeat runs) and its peak traced memory measured in a
+    separate run, so tracing does not distort the timings. Results are written as JSON; with
+    --baseline, stages slower than the baseline by more than --tolerance are reported and the
+    command exits with status 1.
+"""
+#Import Libraries
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_csv
+from utils.company_view import (country_map, order_by_week, order_metric, order_share_by_week,
+                                traffic_order_city, traffic_order_share)
+from utils.cube import build_cube, filter_cube
+from utils.data import add_derived_columns, clean_dataframe, read_dataset
+from utils.delivery_view import bot_delivers, top_delivers
+from utils.filters import build_filter_index, select_rows, take_rows
+from utils.maps import MAP_LAYERS
+from utils.restaurant_view import avg_std_graph, avg_std_time_on_traffic, calc_distance
+from utils.rollups import build_calendar_rollups, select_weeks
+
+DEFAULT_SIZES = [45000, 450000, 4500000]
+TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+WEATHER = ['Cloudy', 'Fog', 'Sandstorms', 'Stormy', 'Sunny', 'Windy']
+DATE_MAX = datetime.datetime(2022, 4, 6)
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def stages(path):
+    """ This function lists the stages of one rerun, in execution order. Each stage receives the
+        results of the previous ones in `state` and stores its own result there.
+
+        Input: Path of the csv
+        Output: List of (name, function(state))
+    """
+    company_columns = ['ID','Order_Date','Delivery_person_ID','City','Road_traffic_density',
+                       'Delivery_location_latitude','Delivery_location_longitude']
+    return [
+        ('read_dataset', lambda state: state.update(raw = read_dataset(path))),
+        ('clean_dataframe', lambda state: state.update(clean = clean_dataframe(state['raw']))),
+        ('add_derived_columns', lambda state: state.update(df = add_derived_columns(state['clean'])
+                                                                .sort_values('Order_Date', kind = 'stable', ignore_index = True))),
+        ('build_cube', lambda state: state.update(cube = build_cube(state['df']))),
+        ('build_filter_index', lambda state: state.update(index = build_filter_index(state['df']))),
+        ('build_calendar_rollups', lambda state: state.update(rollups = build_calendar_rollups(state['df']))),
+        ('filter_cube', lambda state: state.update(cube1 = filter_cube(state['cube'], DATE_MAX, TRAFFIC, WEATHER))),
+        ('select_rows', lambda state: state.update(rows = select_rows(state['index'], DATE_MAX,
+                                                                      Road_traffic_density = TRAFFIC,
+                                                                      Weatherconditions = WEATHER))),
+        ('select_weeks', lambda state: state.update(weeks = select_weeks(state['rollups'], DATE_MAX, TRAFFIC))),
+        ('take_rows', lambda state: state.update(df1 = take_rows(state['df'], state['rows'], company_columns),
+                                                 df2 = take_rows(state['df'], state['rows']))),
+        ('order_metric', lambda state: order_metric(state['cube1'])),
+        ('traffic_order_share', lambda state: traffic_order_share(state['cube1'])),
+        ('traffic_order_city', lambda state: traffic_order_city(state['cube1'])),
+        ('order_by_week', lambda state: order_by_week(state['weeks'])),
+        ('order_share_by_week', lambda state: order_share_by_week(state['weeks'])),
+    ] + [
+        ('country_map[%s]' % layer, lambda state, layer = layer: country_map(state['df1'], layer).get_root().render())
+        for layer in MAP_LAYERS
+    ] + [
+        ('avg_std_graph', lambda state: avg_std_graph(state['cube1'])),
+        ('avg_std_time_on_traffic', lambda state: avg_std_time_on_traffic(state['cube1'])),
+        ('calc_distance', lambda state: calc_distance(state['cube1'], False)),
+        ('calc_distance[fig]', lambda state: calc_distance(state['cube1'], True)),
+        ('top_delivers', lambda state: top_delivers(state['df2'])),
+        ('bot_delivers', lambda state: bot_delivers(state['df2'])),
+    ]
+
+def run_stages(path, repeat):
+    """ This function times every stage and then measures its peak memory.
+
+        Input: Path of the csv, runs per stage (the best time is kept)
+        Output: List of dictionaries (stage, seconds, peak_bytes)
+    """
+    results = []
+    state = {}
+    for name, stage in stages(path):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            stage(state)
+            best = min(best, time.perf_counter() - start)
+        results.append({'stage': name, 'seconds': best})
+
+    state = {}
+    tracemalloc.start()
+    for result, (name, stage) in zip(results, stages(path)):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        stage(state)
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return results
+
+def metadata():
+    """ This function describes the environment of the run.
+
+        Output: Dictionary
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True).stdout.strip()
+    except OSError:
+        commit = None
+    return {'commit': commit or None,
+            'timestamp': datetime.datetime.now().isoformat(timespec = 'seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform()}
+
+def compare(results, baseline, tolerance):
+    """ This function compares the timings with a previous run.
+
+        Input: Results, baseline results (same format), allowed slowdown ratio
+        Output: List of regressions (rows, stage, baseline seconds, seconds)
+    """
+    previous = {(item['rows'], item['stage']): item['seconds'] for item in baseline}
+    regressions = []
+    for item in results:
+        key = (item['rows'], item['stage'])
+        if key in previous and item['seconds'] > previous[key] * tolerance:
+            regressions.append((item['rows'], item['stage'], previous[key], item['seconds']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type = int, nargs = '+', default = DEFAULT_SIZES, help = 'numbers of lines to benchmark')
+    parser.add_argument('--data-dir', default = 'benchmarks/data', help = 'where the synthetic csv files are cached')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'runs per stage, the best one is kept')
+    parser.add_argument('--out', default = None, help = 'JSON file for the results (stdout by default)')
+    parser.add_argument('--baseline', default = None, help = 'JSON results of a previous run to compare with')
+    parser.add_argument('--tolerance', type = float, default = 1.25, help = 'allowed slowdown ratio against the baseline')
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok = True)
+    results = []
+    for rows in args.sizes:
+        path = os.path.join(args.data_dir, 'train_%d.csv' % rows)
+        if not os.path.exists(path):
+            generate_csv(path, rows)
+        for result in run_stages(path, args.repeat):
+            results.append(dict(result, rows = rows))
+            print('%10d  %-28s %9.4f s  %12d B' % (rows, result['stage'], result['seconds'], result['peak_bytes']), file = sys.stderr)
+
+    report = {'meta': dict(metadata(), max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+              'results': results}
+    if args.out:
+        with open(args.out, 'w') as file:
+            json.dump(report, file, indent = 2)
+    else:
+        print(json.dumps(report, indent = 2))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance)
+        for rows, stage, before, after in regressions:
+            print('REGRESSION %10d  %-28s %.4f s -> %.4f s' % (rows, stage, before, after), file = sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+""" Memory held per concurrent session, with selections of the shared dataset against copies.
+
+    Every simulated session picks random sidebar filters of the Delivery View and keeps what a rerun
+    of the page keeps: either its selection (utils.backend.select) or the filtered copy of the
+    columns in use (what the pages held before). The memory is measured twice: the accounting of
+    utils.shared.owned_bytes and the growth of the traced Python memory (tracemalloc).
+
+    Usage (from the repository root, with the dataset in dataset/train.csv):
+        python -m benchmarks.bench_sessions --sessions 200
+"""
+#Import Libraries
+import argparse
+import tracemalloc
+
+import numpy as np
+
+from utils.backend import load_backend, select, selection_frame
+from utils.data import DATASET_PATH, load_dataset
+from utils.shared import owned_bytes
+
+COLUMNS = ['Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings', 'City', 'Time_taken(min)']
+TRAFFIC = ['Low', 'Medium', 'High', 'Jam']
+WEATHER = ['Cloudy', 'Fog', 'Sandstorms', 'Stormy', 'Sunny', 'Windy']
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def random_filters(rng, dates):
+    """ This function draws the sidebar filters of a session.
+
+        Input: numpy Generator, sorted array of the order dates
+        Output: Dictionary of the arguments of utils.backend.select
+    """
+    return {'date_max': dates[rng.integers(len(dates) // 2, len(dates))],
+            'Road_traffic_density': list(rng.choice(TRAFFIC, rng.integers(1, len(TRAFFIC) + 1), replace = False)),
+            'Weatherconditions': list(rng.choice(WEATHER, rng.integers(1, len(WEATHER) + 1), replace = False))}
+
+def open_sessions(path, filters, copy):
+    """ This function simulates the sessions and measures what they hold.
+
+        Input: Path of the csv file, list of filters (one per session), True to keep copies
+        Output: Tuple (accounted bytes, traced bytes)
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = []
+    for session_filters in filters:
+        selection = select(path, **session_filters)
+        held.append(selection_frame(selection, COLUMNS) if copy else selection)
+    traced = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return sum(owned_bytes(value) for value in held), traced
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default = DATASET_PATH, help = 'raw csv in the train.csv format')
+    parser.add_argument('--sessions', type = int, default = 200, help = 'concurrent sessions to simulate')
+    args = parser.parse_args()
+
+    load_backend(args.path)
+    df = load_dataset(args.path)
+    rng = np.random.default_rng(0)
+    dates = np.sort(df['Order_Date'].unique())
+    filters = [random_filters(rng, dates) for _ in range(args.sessions)]
+
+    print('shared dataset: %d lines, %.1f MB (deep)' % (len(df), df.memory_usage(deep = True).sum() / 2 ** 20))
+    print('%-12s %18s %18s' % ('sessions', 'accounted kB', 'traced kB'))
+    for name, copy in [('selections', False), ('copies', True)]:
+        accounted, traced = open_sessions(args.path, filters, copy)
+        print('%-12s %18.1f %18.1f' % (name, accounted / 2 ** 10 / args.sessions, traced / 2 ** 10 / args.sessions))
+    print('(per session)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+""" Benchmark of the grid index of utils.spatial against full distance scans, on random coordinates
+    spread like the deliveries of the dataset (latitudes 10 to 30, longitudes 70 to 88).
+
+    Usage (from the repository root):
+        python -m benchmarks.bench_spatial --points 5000000 --restaurants 20000 --queries 1000
+"""
+#Import Libraries
+import argparse
+
+import numpy as np
+
+from benchmarks.bench_clean import best_of
+from utils.geo import haversine_distance
+from utils.spatial import GRID_CELL_KM, bbox_query, build_spatial_index, nearest_point, radius_query
+
+LAT_RANGE = (10, 30)
+LON_RANGE = (70, 88)
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def random_points(rng, size):
+    """ This function draws random coordinates in the area of the dataset.
+
+        Input: numpy Generator, number of points
+        Output: Tuple (latitudes, longitudes)
+    """
+    return rng.uniform(*LAT_RANGE, size), rng.uniform(*LON_RANGE, size)
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type = int, default = 5000000, help = 'indexed delivery locations')
+    parser.add_argument('--restaurants', type = int, default = 20000, help = 'indexed restaurant locations')
+    parser.add_argument('--queries', type = int, default = 1000, help = 'nearest restaurant queries')
+    parser.add_argument('--radius', type = float, default = 5.0, help = 'radius of the radius queries, in km')
+    parser.add_argument('--cell-km', type = float, default = GRID_CELL_KM, help = 'size of the grid cells, in km')
+    parser.add_argument('--repeat', type = int, default = 3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lat, lon = random_points(rng, args.points)
+    restaurant_lat, restaurant_lon = random_points(rng, args.restaurants)
+    query_lat, query_lon = random_points(rng, args.queries)
+    center_lat, center_lon = query_lat[0], query_lon[0]
+
+    seconds, index = best_of(lambda: build_spatial_index(lat, lon, args.cell_km), args.repeat)
+    print('build index (%d points): %.3f s' % (args.points, seconds))
+
+    seconds, (found, _) = best_of(lambda: radius_query(index, center_lat, center_lon, args.radius), args.repeat)
+    scan, _ = best_of(lambda: np.flatnonzero(haversine_distance(np.full(len(lat), center_lat), np.full(len(lon), center_lon),
+                                                                lat, lon) <= args.radius), args.repeat)
+    print('radius %g km: %d points, index %.4f s, scan %.4f s' % (args.radius, len(found), seconds, scan))
+
+    half = args.radius / 111.0
+    box = (center_lat - half, center_lat + half, center_lon - half, center_lon + half)
+    seconds, found = best_of(lambda: bbox_query(index, *box), args.repeat)
+    scan, _ = best_of(lambda: np.flatnonzero((lat >= box[0]) & (lat <= box[1]) & (lon >= box[2]) & (lon <= box[3])), args.repeat)
+    print('bounding box: %d points, index %.4f s, scan %.4f s' % (len(found), seconds, scan))
+
+    restaurants = build_spatial_index(restaurant_lat, restaurant_lon, args.cell_km)
+    seconds, (nearest, _) = best_of(lambda: nearest_point(restaurants, query_lat, query_lon), args.repeat)
+    scan, expected = best_of(lambda: np.array([np.argmin(haversine_distance(np.full(len(restaurant_lat), query_lat[i]),
+                                                                            np.full(len(restaurant_lon), query_lon[i]),
+                                                                            restaurant_lat, restaurant_lon))
+                                               for i in range(args.queries)]), 1)
+    print('nearest restaurant (%d queries): index %.4f s, scan %.4f s, same answers: %s'
+          % (args.queries, seconds, scan, bool((nearest == expected).all())))
+
+if __name__ == '__main__':
+    main()
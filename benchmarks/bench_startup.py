@@ -0,0 +1,106 @@
+""" Import time and cold start of the pages, against a budget.
+
+    Each measure runs in a fresh interpreter:
+    - import: the top level imports of the page only (libraries and utils modules)
+    - cold start: the whole page, run once without a Streamlit server (bare mode), which includes
+      loading the dataset
+
+    Usage (from the repository root, with the dataset in dataset/train.csv):
+        python -m benchmarks.bench_startup --import-budget 2.0 --cold-budget 20 --repeat 3
+
+    Exits with status 1 when the best time of a page is over its budget, so it can run in CI.
+    --top lists the slowest modules of each page (python -X importtime).
+"""
+#Import Libraries
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+import time
+
+PAGES = ['Home.py'] + sorted(glob.glob(os.path.join('pages', '*.py')))
+IMPORT_BUDGET = 2.0
+COLD_BUDGET = 20.0
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def page_imports(path):
+    """ This function extracts the top level import statements of a page.
+
+        Input: Path of the page
+        Output: Source code of the imports
+    """
+    with open(path, encoding = 'utf-8') as file:
+        tree = ast.parse(file.read(), path)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return '\n'.join(ast.unparse(node) for node in imports)
+
+def run_python(args, cwd):
+    """ This function runs a fresh interpreter with the repository on the path.
+
+        Input: Arguments of python, working directory
+        Output: Tuple (seconds, completed process)
+    """
+    env = dict(os.environ, PYTHONPATH = os.pathsep.join(filter(None, [os.getcwd(), os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable] + args, cwd = cwd, env = env, capture_output = True, text = True)
+    seconds = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError('python %s failed:\n%s' % (' '.join(args), process.stderr[-2000:]))
+    return seconds, process
+
+def best_time(args, cwd, repeat):
+    return min(run_python(args, cwd)[0] for _ in range(repeat))
+
+def slowest_imports(code, cwd, top):
+    """ This function lists the modules taking the most time to import, with their dependencies.
+
+        Input: Source code of the imports, working directory, number of modules
+        Output: List of (cumulative seconds, module)
+    """
+    _, process = run_python(['-X', 'importtime', '-c', code], cwd)
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        #Only the modules imported by the page itself (no indentation)
+        if not name.startswith('  '):
+            modules.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(modules, reverse = True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', nargs = '+', default = PAGES, help = 'pages to measure')
+    parser.add_argument('--app-dir', default = '.', help = 'working directory of the pages (dataset/ and logo.png)')
+    parser.add_argument('--import-budget', type = float, default = IMPORT_BUDGET, help = 'seconds allowed for the imports of a page')
+    parser.add_argument('--cold-budget', type = float, default = COLD_BUDGET, help = 'seconds allowed for the cold start of a page')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'runs per measure (the best time is kept)')
+    parser.add_argument('--top', type = int, default = 0, help = 'list the slowest imports of each page')
+    parser.add_argument('--no-cold', action = 'store_true', help = 'only measure the imports')
+    args = parser.parse_args()
+
+    over_budget = []
+    print('%-32s %10s %12s' % ('page', 'import (s)', 'cold (s)'))
+    for page in args.pages:
+        code = page_imports(page)
+        import_seconds = best_time(['-c', code], args.app_dir, args.repeat)
+        cold_seconds = None if args.no_cold else best_time([os.path.abspath(page)], args.app_dir, args.repeat)
+        print('%-32s %10.3f %12s' % (page, import_seconds, '-' if cold_seconds is None else '%.3f' % cold_seconds))
+        if import_seconds > args.import_budget:
+            over_budget.append('%s: import %.3f s > %.3f s' % (page, import_seconds, args.import_budget))
+        if cold_seconds is not None and cold_seconds > args.cold_budget:
+            over_budget.append('%s: cold start %.3f s > %.3f s' % (page, cold_seconds, args.cold_budget))
+        for seconds, module in slowest_imports(code, args.app_dir, args.top) if args.top else []:
+            print('    %8.3f  %s' % (seconds, module))
+
+    if over_budget:
+        print('\nover budget:\n  ' + '\n  '.join(over_budget))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+""" Synthetic dataset generator with the shape and the dirty formatting of dataset/train.csv
+    ('NaN ' sentinels, trailing spaces, '(min) ' and 'conditions ' prefixes).
+
+    Usage (from the repository root):
+        python -m benchmarks.synthetic --rows 5000000 --out /tmp/train_5M.csv
+
+    Lines are generated and written in chunks, so any size (45k to 50M rows and more) is produced
+    with bounded memory. The same seed always produces the same file.
+"""
+#Import Libraries
+import argparse
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['ID', 'Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings', 'Restaurant_latitude',
+           'Restaurant_longitude', 'Delivery_location_latitude', 'Delivery_location_longitude', 'Order_Date',
+           'Time_Orderd', 'Time_Order_picked', 'Weatherconditions', 'Road_traffic_density', 'Vehicle_condition',
+           'Type_of_order', 'Type_of_vehicle', 'multiple_deliveries', 'Festival', 'City', 'Time_taken(min)']
+
+CITY_CODES = ['AGR', 'ALH', 'AURG', 'BANG', 'BHP', 'CHEN', 'COIMB', 'DEH', 'GOA', 'HYD',
+              'INDO', 'JAP', 'KNP', 'KOC', 'KOL', 'LUDH', 'MUM', 'MYS', 'PUNE', 'RANCHI', 'SUR', 'VAD']
+CITIES = ['Metropolitian ', 'Urban ', 'Semi-Urban ']
+CITY_WEIGHTS = [0.75, 0.22, 0.03]
+TRAFFIC = ['Low ', 'Medium ', 'High ', 'Jam ']
+WEATHER = ['Cloudy', 'Fog', 'Sandstorms', 'Stormy', 'Sunny', 'Windy']
+ORDERS = ['Snack ', 'Meal ', 'Drinks ', 'Buffet ']
+VEHICLES = ['motorcycle ', 'scooter ', 'electric_scooter ', 'bicycle ']
+NAN_SENTINEL = 'NaN '
+#Share of lines with a "NaN " sentinel, per column
+NAN_RATE = 0.01
+#Orders per delivery person, and deliveries per restaurant, in the original dataset
+ORDERS_PER_DRIVER = 35
+ORDERS_PER_RESTAURANT = 100
+FIRST_DATE = '2022-02-11'
+DAYS = 54
+CHUNK_ROWS = 1000000
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def with_nan(rng, values, rate = NAN_RATE):
+    """ This function replaces a share of the values by the "NaN " sentinel.
+
+        Input: Random generator, array of strings, share of sentinels
+        Output: Object array
+    """
+    values = values.astype(object)
+    values[rng.random(len(values)) < rate] = NAN_SENTINEL
+    return values
+
+def make_pools(total_rows, seed = 0):
+    """ This function draws the restaurants and delivery persons, whose number grows with the file.
+
+        Input: Size of the whole file, random seed
+        Output: Dictionary (restaurant latitudes and longitudes, delivery person IDs)
+    """
+    rng = np.random.default_rng(seed)
+    n_restaurants = max(total_rows // ORDERS_PER_RESTAURANT, 10)
+    n_drivers = max(total_rows // ORDERS_PER_DRIVER, 10)
+    driver = np.arange(n_drivers)
+    driver_ids = ['%sRES%02dDEL%02d ' % (CITY_CODES[code % len(CITY_CODES)], code // len(CITY_CODES) % 99 + 1,
+                                         code // (len(CITY_CODES) * 99) + 1) for code in driver]
+    return {'restaurant_lat': np.round(rng.uniform(9, 31, n_restaurants), 6),
+            'restaurant_lon': np.round(rng.uniform(72, 88, n_restaurants), 6),
+            'driver_ids': np.array(driver_ids, dtype = object)}
+
+def lookup(values):
+    """ This function returns a table of formatted strings, indexed by the raw values.
+
+        Input: Iterable of values
+        Output: Object array of strings
+    """
+    return np.array([str(value) for value in values], dtype = object)
+
+def generate_chunk(rng, start, rows, pools):
+    """ This function generates `rows` lines of raw data, numbered from `start`.
+
+        Input: Random generator, number of the first line, number of lines, pools (make_pools)
+        Output: Raw dataframe, every value formatted as in train.csv
+    """
+    restaurant = rng.integers(0, len(pools['restaurant_lat']), rows)
+    lat = pools['restaurant_lat'][restaurant]
+    lon = pools['restaurant_lon'][restaurant]
+    traffic = rng.integers(0, len(TRAFFIC), rows)
+    dates = pd.date_range(FIRST_DATE, periods = DAYS).strftime('%d-%m-%Y').to_numpy(dtype = object)
+    hours = lookup('%02d:%02d:00' % (hour, minute) for hour in range(8, 24) for minute in range(0, 60, 5))
+    ordered = rng.integers(0, len(hours) - 3, rows)
+    #Delivery time grows with the traffic density
+    minutes = np.clip(rng.normal(20 + 6 * traffic, 7), 10, 54).astype(int)
+
+    df = pd.DataFrame({
+        'ID': np.char.mod('0x%x ', np.arange(start, start + rows)),
+        'Delivery_person_ID': pools['driver_ids'][rng.integers(0, len(pools['driver_ids']), rows)],
+        'Delivery_person_Age': with_nan(rng, lookup(range(20, 40))[rng.integers(0, 20, rows)]),
+        'Delivery_person_Ratings': with_nan(rng, lookup(np.round(np.arange(3.5, 5.05, 0.1), 1))[rng.integers(0, 16, rows)]),
+        'Restaurant_latitude': lat,
+        'Restaurant_longitude': lon,
+        'Delivery_location_latitude': np.round(lat + rng.uniform(-0.15, 0.15, rows), 6),
+        'Delivery_location_longitude': np.round(lon + rng.uniform(-0.15, 0.15, rows), 6),
+        'Order_Date': dates[rng.integers(0, DAYS, rows)],
+        'Time_Orderd': with_nan(rng, hours[ordered]),
+        'Time_Order_picked': hours[ordered + rng.integers(1, 3, rows)],
+        'Weatherconditions': lookup('conditions ' + weather for weather in WEATHER + ['NaN'])[
+                                 np.where(rng.random(rows) < NAN_RATE, len(WEATHER), rng.integers(0, len(WEATHER), rows))],
+        'Road_traffic_density': with_nan(rng, lookup(TRAFFIC)[traffic]),
+        'Vehicle_condition': rng.integers(0, 3, rows),
+        'Type_of_order': lookup(ORDERS)[rng.integers(0, len(ORDERS), rows)],
+        'Type_of_vehicle': lookup(VEHICLES)[rng.integers(0, len(VEHICLES), rows)],
+        'multiple_deliveries': with_nan(rng, lookup(range(4))[rng.integers(0, 4, rows)]),
+        'Festival': with_nan(rng, np.where(rng.random(rows) < 0.02, 'Yes ', 'No ')),
+        'City': with_nan(rng, lookup(CITIES)[rng.choice(len(CITIES), rows, p = CITY_WEIGHTS)]),
+        'Time_taken(min)': lookup('(min) %d' % minute for minute in range(55))[minutes],
+    })
+    return df.loc[:, COLUMNS]
+
+def generate_csv(path, rows, seed = 0, chunk_rows = CHUNK_ROWS):
+    """ This function writes a synthetic train.csv with `rows` lines.
+
+        Input: Output path, number of lines, random seed, lines generated per chunk
+        Output: Path of the csv
+    """
+    rng = np.random.default_rng(seed)
+    pools = make_pools(rows, seed)
+    for start in range(0, rows, chunk_rows):
+        chunk = generate_chunk(rng, start, min(chunk_rows, rows - start), pools)
+        chunk.to_csv(path, index = False, mode = 'w' if start == 0 else 'a', header = start == 0, float_format = '%.6f')
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type = int, default = 45593, help = 'number of lines')
+    parser.add_argument('--out', default = 'dataset/train.csv', help = 'csv to write')
+    parser.add_argument('--seed', type = int, default = 0)
+    args = parser.parse_args()
+    print(generate_csv(args.out, args.rows, args.seed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+""" Fixtures of the tests: a small synthetic dataset in the train.csv format (benchmarks.synthetic). """
+#Import Libraries
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_csv
+from utils.data import prepare_dataset, read_dataset
+
+ROWS = 3000
+
+@pytest.fixture(scope = 'session')
+def csv_path(tmp_path_factory):
+    """ Raw csv of ROWS synthetic orders. """
+    return generate_csv(str(tmp_path_factory.mktemp('dataset') / 'train.csv'), ROWS, seed = 1)
+
+@pytest.fixture(scope = 'session')
+def df(csv_path):
+    """ Cleaned dataframe of the synthetic csv, as the pages see it. """
+    return prepare_dataset(read_dataset(csv_path))
+
+#Sidebar filter states (date_max, traffic, weather): every order, cleared and single options, a
+#state where only one city is left, and a date before the first order
+FILTER_STATES = [(None, None, None),
+                 (None, [], None),
+                 (None, ['Jam'], None),
+                 ('2022-02-14', ['Jam'], ['Fog']),
+                 ('2022-03-01', ['Low', 'High'], ['Sunny', 'Windy', 'Cloudy']),
+                 ('2022-01-01', None, None)]
+
+def selection_mask(df, date_max = None, traffic = None, weather = None):
+    """ This function applies the sidebar filters with plain pandas, as the reference of the tests.
+
+        Input: Cleaned dataframe, filters of utils.cube.filter_cube
+        Output: Boolean series
+    """
+    mask = pd.Series(True, index = df.index)
+    if date_max is not None:
+        mask &= df['Order_Date'] < pd.Timestamp(date_max)
+    if traffic is not None:
+        mask &= df['Road_traffic_density'].isin(traffic)
+    if weather is not None:
+        mask &= df['Weatherconditions'].isin(weather)
+    return mask
+
+@pytest.fixture(params = FILTER_STATES, ids = lambda state: '-'.join(str(value) for value in state))
+def state(request):
+    """ Filter state as keyword arguments of utils.cube.filter_cube. """
+    date_max, traffic, weather = request.param
+    return {'date_max': None if date_max is None else pd.Timestamp(date_max), 'traffic': traffic, 'weather': weather}
+
+@pytest.fixture
+def mask(df, state):
+    """ Lines of df selected by the filter state. """
+    return selection_mask(df, **state)
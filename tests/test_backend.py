@@ -0,0 +1,111 @@
+""" Pandas backend in chunked ingestion mode: the pages read the store, never the whole dataset. """
+#Import Libraries
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_csv
+from utils import backend, data, ingest, refresh
+from utils.data import prepare_dataset, read_dataset
+from utils.ingest import read_store, read_store_rows
+from utils.spatial import RESTAURANT_COLUMNS, ZONE_MEASURE, build_location_index, busiest_zones
+
+COLUMNS = ['Delivery_person_ID', 'Delivery_person_Ratings', 'City', 'Road_traffic_density', 'Time_taken(min)']
+
+def plain(df):
+    """ This function turns the categories into plain values, so both backends compare equal.
+
+        Input: Dataframe
+        Output: Dataframe
+    """
+    return df.astype({col: object for col in df.columns if hasattr(df[col], 'cat')})
+
+def load_dataset(path = data.DATASET_PATH):
+    raise AssertionError('the dataset is loaded in chunked ingestion mode')
+
+@pytest.fixture
+def chunked(csv_path, tmp_path, monkeypatch):
+    """ Copy of the synthetic csv (so nothing cached in memory mode is reused), in chunked mode. Its
+        lines fit in one chunk, so the store keeps the order of df. """
+    path = str(tmp_path / 'train.csv')
+    shutil.copy(csv_path, path)
+    monkeypatch.setattr(data, 'INGEST_MODE', 'chunked')
+    monkeypatch.setattr(backend, 'INGEST_MODE', 'chunked')
+    monkeypatch.setattr(data, 'load_dataset', load_dataset)
+    monkeypatch.setattr(backend, 'load_dataset', load_dataset)
+    return path
+
+def test_selection_matches_pandas(chunked, df, state, mask):
+    selection = backend.select(chunked, state['date_max'], Road_traffic_density = state['traffic'],
+                               Weatherconditions = state['weather'])
+    expected = df.loc[mask, COLUMNS]
+    pd.testing.assert_frame_equal(plain(backend.selection_frame(selection, COLUMNS)), plain(expected), check_index_type = False)
+    minimum, maximum = backend.selection_range(selection, 'Delivery_person_Ratings')
+    if len(expected):
+        assert (minimum, maximum) == (expected['Delivery_person_Ratings'].min(), expected['Delivery_person_Ratings'].max())
+    else:
+        assert np.isnan(minimum) and np.isnan(maximum)
+
+def test_busiest_restaurants(chunked, df, state, mask):
+    zones = backend.busiest_restaurants(chunked, state['date_max'], state['traffic'], state['weather'], top = 5)
+    expected = busiest_zones(build_location_index(df), df.loc[mask, RESTAURANT_COLUMNS + [ZONE_MEASURE]], top = 5)
+    pd.testing.assert_frame_equal(zones, expected)
+
+def test_filtered_weeks_reads_rollup_columns(chunked, monkeypatch):
+    #The rollups are built by filtered_weeks itself, as in a rebuild for a new version of the csv
+    monkeypatch.setattr(backend, 'load_backend', lambda path: None)
+    reads = []
+    read_clean_dataset = data.read_clean_dataset
+    monkeypatch.setattr(data, 'read_clean_dataset', lambda path, columns = None: reads.append(columns) or read_clean_dataset(path, columns))
+    backend.filtered_weeks(chunked, traffic = ['Jam'])
+    assert reads and all(columns is not None for columns in reads)
+
+def test_location_index_built_on_first_use(chunked):
+    key = (build_location_index.__module__, build_location_index.__qualname__)
+    backend.load_backend(chunked)
+    assert key not in data.dataset_entry(chunked)['derived']
+    backend.busiest_restaurants(chunked)
+    assert key in data.dataset_entry(chunked)['derived']
+
+def test_column_range(chunked, df):
+    assert backend.column_range(chunked, 'Time_taken(min)') == (df['Time_taken(min)'].min(), df['Time_taken(min)'].max())
+
+@pytest.mark.parametrize('batch_rows', [1000, 7])
+def test_read_store_rows_across_batches(chunked, batch_rows):
+    store = read_store(chunked, columns = COLUMNS)
+    rows = np.sort(np.random.default_rng(0).choice(len(store), 300, replace = False))
+    result = read_store_rows(chunked, rows, COLUMNS, batch_rows)
+    pd.testing.assert_frame_equal(plain(result), plain(store.iloc[rows]), check_index_type = False)
+    assert len(read_store_rows(chunked, rows[:0], COLUMNS, batch_rows)) == 0
+
+def test_pinned_version_reads_its_store(chunked, df, monkeypatch):
+    #A session in flight keeps reading the store of its version while the next one is ingested
+    #in the background; the reads themselves never ingest
+    ingested = []
+    ingest_csv = ingest.ingest_csv
+    monkeypatch.setattr(ingest, 'ingest_csv', lambda *args: ingested.append(threading.current_thread()) or ingest_csv(*args))
+    data.pin_dataset(chunked)
+    backend.load_backend(chunked)
+    export = generate_csv(chunked + '.new', 2000, seed = 2)
+    os.replace(export, chunked)
+    thread = threading.Thread(target = refresh.refresh_dataset, args = (chunked,))
+    thread.start()
+    thread.join()
+    assert ingested[-1] is thread
+
+    date_max, traffic = pd.Timestamp('2022-03-01'), ['Jam', 'Low']
+    selection = backend.select(chunked, date_max, Road_traffic_density = traffic)
+    expected = df.loc[(df['Order_Date'] < date_max) & df['Road_traffic_density'].isin(traffic), COLUMNS]
+    pd.testing.assert_frame_equal(plain(backend.selection_frame(selection, COLUMNS)), plain(expected), check_index_type = False)
+
+    data.pin_dataset(chunked)
+    new = prepare_dataset(read_dataset(chunked))
+    selection = backend.select(chunked, date_max, Road_traffic_density = traffic)
+    expected = new.loc[(new['Order_Date'] < date_max) & new['Road_traffic_density'].isin(traffic), COLUMNS]
+    pd.testing.assert_frame_equal(plain(backend.selection_frame(selection, COLUMNS)), plain(expected), check_index_type = False)
+    assert ingested[-1] is thread
+    data.unpin_dataset(chunked)
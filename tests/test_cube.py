@@ -0,0 +1,52 @@
+""" Cube roll-ups against plain pandas group-bys of the selected lines, and the charts built on them. """
+#Import Libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.company_view import order_metric, traffic_order_city, traffic_order_share
+from utils.cube import build_cube, distinct_drivers, filter_cube, rollup
+from utils.restaurant_view import avg_std_graph, avg_std_time_on_traffic, calc_distance
+
+@pytest.fixture(scope = 'module')
+def cube(df):
+    return build_cube(df)
+
+@pytest.mark.parametrize('by', [None, 'City', ['City', 'Road_traffic_density'], 'Order_Date'])
+@pytest.mark.parametrize('measure', ['Time_taken(min)', 'Distance', 'Delivery_person_Ratings'])
+def test_rollup_matches_groupby(df, cube, state, mask, by, measure):
+    result = rollup(filter_cube(cube, **state), by, measure)
+    selected = df.loc[mask, :]
+    if by is None:
+        expected = selected[measure].astype(np.float64).agg(['size', 'count', 'mean', 'std', 'min', 'max']).to_frame().T
+    else:
+        expected = selected.groupby(by, observed = True)[measure].agg(['size', 'count', 'mean', 'std', 'min', 'max']).sort_index()
+    expected = expected.rename(columns = {'size': 'orders'})
+    if by is None and not mask.any():
+        expected.loc[:, 'orders'] = 0
+    assert len(result) == len(expected)
+    if len(result):
+        np.testing.assert_allclose(result.to_numpy(np.float64), expected.to_numpy(np.float64), rtol = 1e-9, atol = 1e-9)
+    if by is not None:
+        assert result.index.to_frame().astype(str).to_numpy().tolist() == expected.index.to_frame().astype(str).to_numpy().tolist()
+
+@pytest.mark.parametrize('by', ['City', ['City', 'Road_traffic_density']])
+def test_rollup_keeps_only_selected_categories(df, cube, state, mask, by):
+    result = rollup(filter_cube(cube, **state), by).reset_index()
+    for col in [by] if isinstance(by, str) else by:
+        assert sorted(result[col].cat.categories) == sorted(df.loc[mask, col].unique())
+
+def test_distinct_drivers(df, cube, state, mask):
+    assert distinct_drivers(filter_cube(cube, **state)) == df.loc[mask, 'Delivery_person_ID'].nunique()
+
+def test_state_without_every_city(df, mask, state):
+    #Regression: the charts used to look up the cities removed by the filters
+    if state['date_max'] == pd.Timestamp('2022-02-14'):
+        assert df.loc[mask, 'City'].nunique() < df['City'].nunique()
+
+@pytest.mark.parametrize('chart', [traffic_order_city, traffic_order_share, order_metric, avg_std_time_on_traffic, avg_std_graph])
+def test_charts_render(cube, state, chart):
+    assert chart(filter_cube(cube, **state)) is not None
+
+def test_calc_distance_renders(cube, state):
+    assert calc_distance(filter_cube(cube, **state), 'Bar') is not None
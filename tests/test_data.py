@@ -0,0 +1,32 @@
+""" Copies of the cleaned dataset (snapshot, SQLite database, Parquet store) follow the content of the csv. """
+#Import Libraries
+import os
+import shutil
+
+import pytest
+
+from benchmarks.synthetic import generate_csv
+from utils import data, ingest, sql
+from utils.data import prepare_dataset, read_dataset
+
+def count_snapshot(path):
+    return len(data.load_dataset(path))
+
+def count_database(path):
+    sql.ensure_database(path)
+    return sql.query(path, 'SELECT COUNT(*) AS n FROM %s' % sql.TABLE)['n'].iloc[0]
+
+def count_store(path):
+    return len(ingest.read_store(path, columns = ['ID']))
+
+@pytest.mark.parametrize('count', [count_snapshot, count_database, count_store])
+def test_older_replacement_is_rebuilt(csv_path, tmp_path, count):
+    #A new export copied with its own, older modification time (cp -p, rsync -t)
+    path = str(tmp_path / 'train.csv')
+    shutil.copy(csv_path, path)
+    assert count(path) == len(prepare_dataset(read_dataset(path)))
+    export = generate_csv(str(tmp_path / 'export.csv'), 2000, seed = 2)
+    past = os.stat(path).st_mtime_ns - 3600 * 10**9
+    os.utime(export, ns = (past, past))
+    os.replace(export, path)
+    assert count(path) == len(prepare_dataset(read_dataset(path)))
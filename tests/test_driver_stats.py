@@ -0,0 +1,85 @@
+""" Per-driver statistics store: the Delivery View tables read from the store against the same
+    tables computed from the selected orders. """
+#Import Libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.delivery_view import (avg_ratings_from_stats, avg_ratings_per_driver, bot_delivers, bot_delivers_from_stats,
+                                 top_delivers, top_delivers_from_stats)
+from utils.driver_stats import (DRIVER_KEYS, DRIVER_MEASURES, STORE_KEYS, build_driver_stats, combine_driver_stats,
+                                describe_driver_stats, filter_driver_stats, update_driver_stats)
+from utils.ranking import top_per_group
+
+@pytest.fixture(scope = 'module')
+def stats(df):
+    return build_driver_stats(df)
+
+def both_paths(df, stats, state, mask):
+    """ Orders and store of a filter state (the store has no dates: only the whole range). """
+    return df.loc[mask, :], filter_driver_stats(stats, traffic = state['traffic'], weather = state['weather'])
+
+def by_text_keys(frame):
+    """ This function indexes a frame by the text of its keys, in text order, so frames grouped by
+        categories with other category orders compare equal.
+
+        Input: Dataframe indexed by the keys
+        Output: Dataframe
+    """
+    keys = frame.index.to_frame().astype(str)
+    return frame.set_axis(pd.MultiIndex.from_frame(keys), axis = 0).sort_index()
+
+@pytest.mark.parametrize('rows_path, stats_path', [(top_delivers, top_delivers_from_stats),
+                                                   (bot_delivers, bot_delivers_from_stats)])
+def test_rankings_match(df, stats, state, mask, rows_path, stats_path):
+    if state['date_max'] is not None:
+        pytest.skip('the store answers selections of the whole date range only')
+    orders, store = both_paths(df, stats, state, mask)
+    expected, result = rows_path(orders), stats_path(store)
+    assert result['City'].astype(str).tolist() == expected['City'].astype(str).tolist()
+    assert result['Delivery_person_ID'].astype(str).tolist() == expected['Delivery_person_ID'].astype(str).tolist()
+    assert result['Time_taken(min)'].tolist() == expected['Time_taken(min)'].tolist()
+
+def test_rankings_break_ties_by_id(df):
+    ranking = top_delivers(df, n = 50)
+    for _, city in ranking.groupby('City', observed = True):
+        keys = list(zip(city['Time_taken(min)'], city['Delivery_person_ID'].astype(str)))
+        assert keys == sorted(keys)
+
+@pytest.mark.parametrize('largest', [False, True])
+def test_ties_at_the_cut_go_to_the_lowest_ids(largest):
+    index = pd.MultiIndex.from_tuples([('Urban', 'D'), ('Urban', 'C'), ('Urban', 'B'), ('Urban', 'A'), ('Urban', 'E')],
+                                      names = ['City', 'Delivery_person_ID'])
+    stats = pd.Series([20.0, 20.0, 20.0, 30.0, 10.0] if not largest else [20.0, 20.0, 20.0, 10.0, 30.0], index = index,
+                      name = 'Time_taken(min)')
+    ranking = top_per_group(stats, n = 3, largest = largest)
+    assert ranking['Delivery_person_ID'].tolist() == ['E', 'B', 'C']
+
+def test_avg_ratings_match(df, stats, state, mask):
+    if state['date_max'] is not None:
+        pytest.skip('the store answers selections of the whole date range only')
+    orders, store = both_paths(df, stats, state, mask)
+    expected, result = avg_ratings_per_driver(orders), avg_ratings_from_stats(store)
+    expected = expected.dropna().set_index('Delivery_person_ID')['Delivery_person_Ratings']
+    result = result.dropna().set_index('Delivery_person_ID')['Delivery_person_Ratings']
+    pd.testing.assert_index_equal(result.index.astype(str), expected.index.astype(str))
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+
+@pytest.mark.parametrize('measure', DRIVER_MEASURES)
+def test_store_matches_groupby(df, stats, state, mask, measure):
+    if state['date_max'] is not None:
+        pytest.skip('the store answers selections of the whole date range only')
+    _, store = both_paths(df, stats, state, mask)
+    result = by_text_keys(describe_driver_stats(combine_driver_stats(store), measure))
+    expected = by_text_keys(df.loc[mask, :].astype({measure: np.float64}).groupby(DRIVER_KEYS, observed = True)[measure]
+                              .agg(['count', 'sum', 'mean', 'std', 'min', 'max']))
+    pd.testing.assert_index_equal(result.index, expected.index)
+    for statistic in ['count', 'sum', 'mean', 'std', 'min', 'max']:
+        np.testing.assert_allclose(result[statistic].to_numpy(np.float64), expected[statistic].to_numpy(np.float64), atol = 1e-9)
+
+def test_update_matches_build(df, stats):
+    third = len(df) // 3
+    updated = update_driver_stats(update_driver_stats(build_driver_stats(df.iloc[:third]), df.iloc[third:2 * third]),
+                                  df.iloc[2 * third:])
+    pd.testing.assert_frame_equal(by_text_keys(updated.set_index(STORE_KEYS)), by_text_keys(stats.set_index(STORE_KEYS)),
+                                  check_exact = False)
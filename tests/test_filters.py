@@ -0,0 +1,38 @@
+""" Bitmap filter engine: the selected lines against the same filters in plain pandas. """
+#Import Libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.filters import build_filter_index, select_rows, take_rows
+
+@pytest.fixture(scope = 'module')
+def index(df):
+    return build_filter_index(df)
+
+def test_select_rows_matches_mask(df, index, state, mask):
+    rows = select_rows(index, state['date_max'], Road_traffic_density = state['traffic'],
+                       Weatherconditions = state['weather'])
+    assert np.array_equal(rows, np.flatnonzero(mask.to_numpy()))
+
+@pytest.mark.parametrize('dimensions', [{'City': ['Urban']}, {'Festival': ['Yes']}, {'City': ['Metropolitian'], 'Type_of_order': []},
+                                        {'Type_of_order': ['Snack', 'Meal'], 'Road_traffic_density': ['Jam']},
+                                        {'City': ['Nowhere']}])
+def test_other_dimensions(df, index, dimensions):
+    expected = pd.Series(True, index = df.index)
+    for dimension, values in dimensions.items():
+        expected &= df[dimension].isin(values)
+    assert np.array_equal(select_rows(index, **dimensions), np.flatnonzero(expected.to_numpy()))
+
+def test_unsorted_dataframe(df, state, mask):
+    #Lines out of date order go through the order of the index and come back sorted by position
+    shuffled = df.sample(frac = 1, random_state = 0)
+    rows = select_rows(build_filter_index(shuffled.reset_index(drop = True)), state['date_max'],
+                       Road_traffic_density = state['traffic'], Weatherconditions = state['weather'])
+    assert np.array_equal(rows, np.flatnonzero(mask.loc[shuffled.index].to_numpy()))
+
+def test_take_rows(df, index, state, mask):
+    columns = ['ID', 'City', 'Time_taken(min)']
+    rows = select_rows(index, state['date_max'], Road_traffic_density = state['traffic'],
+                       Weatherconditions = state['weather'])
+    pd.testing.assert_frame_equal(take_rows(df, rows, columns), df.loc[mask, columns])
@@ -0,0 +1,21 @@
+""" Layers of the delivery map, rendered to HTML like the browser receives them. """
+#Import Libraries
+import pytest
+
+from utils.figure_cache import estimate_size
+from utils.maps import MAP_LAYERS, delivery_map, map_html
+
+@pytest.mark.parametrize('layer', MAP_LAYERS)
+def test_layers_render(df, layer):
+    assert df['Delivery_location_latitude'].dtype == 'float32'
+    html = delivery_map(df, layer, max_points = 500).get_root().render()
+    assert 'L.map' in html
+
+@pytest.mark.parametrize('layer', MAP_LAYERS)
+def test_empty_selection(df, layer):
+    assert delivery_map(df.iloc[:0], layer).get_root().render()
+
+def test_map_html_is_cached_by_length(df):
+    html = map_html(delivery_map(df, 'Medians'))
+    assert 'L.map' in html
+    assert estimate_size(html) == len(html)
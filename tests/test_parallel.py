@@ -0,0 +1,43 @@
+""" Parallel aggregation engine: partitioned aggregates against a single group-by. """
+#Import Libraries
+import threading
+
+import numpy as np
+
+from utils import parallel
+from utils.cube import build_cube, describe
+
+def frame_shape(df):
+    return df.shape
+
+def test_no_pool_without_workers(df, monkeypatch):
+    #What the pages call: aggregated in the calling process, whatever the size of the frame
+    monkeypatch.setattr(parallel, 'MIN_PARTITION_ROWS', 1)
+    monkeypatch.setattr(parallel, 'ProcessPoolExecutor', None)
+    assert parallel.aggregate(df, 'City', ['Time_taken(min)'])['orders'].sum() == len(df)
+
+def test_aggregate_matches_groupby(df, monkeypatch):
+    monkeypatch.setattr(parallel, 'MIN_PARTITION_ROWS', 500)
+    result = describe(parallel.aggregate(df, 'City', ['Time_taken(min)'], 'Delivery_person_ID', workers = 2), 'Time_taken(min)')
+    expected = df.groupby('City', observed = True)['Time_taken(min)'].agg(['size', 'mean', 'std']).sort_index()
+    np.testing.assert_allclose(result.loc[:, ['orders', 'mean', 'std']].to_numpy(np.float64), expected.to_numpy(np.float64))
+
+def test_spawned_workers_receive_their_partition_columns(df, monkeypatch):
+    monkeypatch.setattr(parallel, 'MIN_PARTITION_ROWS', 500)
+    monkeypatch.setattr(parallel, 'can_fork', lambda: False)
+    sizes = parallel.map_partitions(frame_shape, df, workers = 3, columns = ['City', 'Time_taken(min)'])
+    assert sizes == [(stop - start, 2) for start, stop in parallel.partition_bounds(len(df), 3)]
+
+def test_pool_is_spawned_when_threads_run(df, monkeypatch):
+    monkeypatch.setattr(parallel, 'MIN_PARTITION_ROWS', 500)
+    stop = threading.Event()
+    thread = threading.Thread(target = stop.wait)
+    thread.start()
+    try:
+        with parallel.shared_pool(1, None) as pool:
+            assert pool._mp_context.get_start_method() == 'spawn'
+        cube = parallel.build_cube_parallel(df, workers = 2)
+    finally:
+        stop.set()
+        thread.join()
+    assert cube.cells['orders'].sum() == build_cube(df).cells['orders'].sum() == len(df)
@@ -0,0 +1,42 @@
+""" Memory tracing of the profiler: on only while a profiled rerun is in progress. """
+#Import Libraries
+import gc
+import tracemalloc
+
+import pytest
+
+from utils.profiling import Profiler
+
+@pytest.fixture(autouse = True)
+def no_tracing():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    yield
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def test_tracing_stops_after_the_last_rerun():
+    first, second = Profiler('page', True), Profiler('page', True)
+    assert tracemalloc.is_tracing()
+    first.stop()
+    assert tracemalloc.is_tracing()
+    second.stop()
+    second.stop()
+    assert not tracemalloc.is_tracing()
+
+def test_interrupted_rerun_stops_tracing():
+    profiler = Profiler('page', True)
+    with profiler.stage('stage'):
+        pass
+    del profiler
+    gc.collect()
+    assert not tracemalloc.is_tracing()
+
+def test_tracing_started_elsewhere_is_kept():
+    tracemalloc.start()
+    Profiler('page', True).stop()
+    assert tracemalloc.is_tracing()
+
+def test_disabled_profiler_does_not_trace():
+    Profiler('page', False).stop()
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,29 @@
+""" Quantile sketches against the percentiles of the selected orders. """
+#Import Libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.quantiles import PERCENTILES, build_sketches, filter_sketches, merge_sketches, sketch_percentiles
+
+@pytest.fixture(scope = 'module')
+def sketches(df):
+    return build_sketches(df)
+
+def test_sketch_percentiles_match_numpy(df, sketches, state, mask):
+    times = df.loc[mask, 'Time_taken(min)'].to_numpy()
+    result = sketch_percentiles(filter_sketches(sketches, **state))
+    assert result['orders'].iloc[0] == len(times)
+    for percentile in PERCENTILES:
+        expected = np.percentile(times, percentile, method = 'inverted_cdf') if len(times) else np.nan
+        np.testing.assert_equal(result['p%g' % percentile].iloc[0], expected)
+
+def test_sketch_percentiles_by_city(df, sketches, state, mask):
+    result = sketch_percentiles(filter_sketches(sketches, **state), 'City')
+    for city, times in df.loc[mask, :].groupby('City', observed = True)['Time_taken(min)']:
+        assert result.loc[city, 'p90'] == np.percentile(times, 90, method = 'inverted_cdf')
+
+def test_merged_sketches_match(df, sketches):
+    half = len(df) // 2
+    merged = merge_sketches([build_sketches(df.iloc[:half]), build_sketches(df.iloc[half:])])
+    pd.testing.assert_frame_equal(sketch_percentiles(merged, 'City'), sketch_percentiles(sketches, 'City'))
@@ -0,0 +1,31 @@
+""" Batch report renderer over its own filter grid. """
+#Import Libraries
+import json
+import os
+
+import pandas as pd
+
+from utils import report
+from utils.data import load_cube
+
+def test_render_grid(csv_path, tmp_path):
+    #Every traffic density on its own, at the first days of the data (single city states) and on the whole range
+    states = report.filter_grid(load_cube(csv_path), traffic = 'each', dates = ['2022-02-14', '2022-04-10'])
+    entries = report.render_reports(csv_path, str(tmp_path), states, formats = ['json'], workers = 1)
+    assert [entry for entry in entries if entry['error']] == []
+    with open(os.path.join(tmp_path, 'manifest.json')) as file:
+        assert len(json.load(file)) == len(entries)
+
+def test_failing_state_is_skipped(csv_path, tmp_path, monkeypatch):
+    failing = pd.Timestamp('2022-02-20')
+
+    def chart(data):
+        if data.cube.cells['Order_Date'].max() >= failing:
+            raise KeyError('Semi-Urban')
+        return report.rollup(data.cube, 'City')
+
+    monkeypatch.setitem(report.VIEWS, 'restaurant', [('time_per_city', chart)])
+    states = [report.FilterState(pd.Timestamp(date), None, None) for date in ['2022-02-15', '2022-03-01']]
+    entries = report.render_reports(csv_path, str(tmp_path), states, views = ['restaurant'], formats = ['json'], workers = 1)
+    assert [entry['error'] for entry in entries] == [None, "KeyError: 'Semi-Urban'"]
+    assert len(entries[0]['files']) == 1 and entries[1]['files'] == []
@@ -0,0 +1,26 @@
+""" Calendar rollups against plain pandas group-bys of the selected orders. """
+#Import Libraries
+import pandas as pd
+import pytest
+
+from utils.cube import measure_column
+from utils.rollups import ROLLUP_MEASURE, build_calendar_rollups, select_weeks
+
+@pytest.fixture(scope = 'module')
+def rollups(df):
+    return build_calendar_rollups(df)
+
+def test_select_weeks_matches_groupby(df, rollups, state):
+    #The rollups have no weather dimension: the reference filters the dates and the traffic only
+    mask = pd.Series(True, index = df.index)
+    if state['date_max'] is not None:
+        mask &= df['Order_Date'] < state['date_max']
+    if state['traffic'] is not None:
+        mask &= df['Road_traffic_density'].isin(state['traffic'])
+    result = select_weeks(rollups, state['date_max'], state['traffic'])
+    expected = df.loc[mask, :].groupby('Week_Index').agg(orders = ('ID', 'size'), drivers = ('Delivery_person_ID', 'nunique'),
+                                                          total = (ROLLUP_MEASURE, 'sum'))
+    assert result.index.tolist() == expected.index.tolist()
+    assert result['orders'].tolist() == expected['orders'].tolist()
+    assert result['drivers'].tolist() == expected['drivers'].tolist()
+    assert result[measure_column(ROLLUP_MEASURE, 'sum')].tolist() == expected['total'].tolist()
@@ -0,0 +1,49 @@
+""" Grid index of the locations: its queries against full distance scans. """
+#Import Libraries
+import numpy as np
+import pytest
+
+from utils.geo import haversine_distance
+from utils.spatial import (RESTAURANT_COLUMNS, ZONE_MEASURE, build_location_index, build_spatial_index, busiest_zones,
+                           nearest_point, radius_query)
+
+@pytest.fixture(scope = 'module')
+def index(df):
+    return build_location_index(df)
+
+def scan(df, lat, lon):
+    """ This function measures the distance from a location to every delivery.
+
+        Input: Cleaned dataframe, latitude and longitude in degrees
+        Output: Array of distances in km
+    """
+    return haversine_distance(np.full(len(df), lat), np.full(len(df), lon),
+                              df['Delivery_location_latitude'].to_numpy(np.float64),
+                              df['Delivery_location_longitude'].to_numpy(np.float64))
+
+@pytest.mark.parametrize('radius_km', [5.0, 50.0, 300.0])
+def test_radius_query(df, index, radius_km):
+    for lat, lon in zip(index.restaurant_lat[:20], index.restaurant_lon[:20]):
+        found, distances = radius_query(index.deliveries, lat, lon, radius_km)
+        assert np.array_equal(np.sort(found), np.flatnonzero(scan(df, lat, lon) <= radius_km))
+        assert np.all(np.diff(distances) >= 0)
+
+def test_nearest_point(index):
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(5, 35, 200), rng.uniform(65, 95, 200)
+    positions, distances = nearest_point(build_spatial_index(index.restaurant_lat, index.restaurant_lon), lat, lon)
+    matrix = haversine_distance(lat[:, None], lon[:, None], index.restaurant_lat[None, :], index.restaurant_lon[None, :])
+    np.testing.assert_allclose(distances, matrix.min(axis = 1))
+    np.testing.assert_allclose(matrix[np.arange(len(lat)), positions], matrix.min(axis = 1))
+
+@pytest.mark.parametrize('radius_km', [10.0, 200.0])
+def test_busiest_zones_match_scan(df, index, mask, radius_km):
+    orders = df.loc[mask, RESTAURANT_COLUMNS + [ZONE_MEASURE]]
+    zones = busiest_zones(index, orders, top = 5, radius_km = radius_km)
+    counts = orders.groupby(RESTAURANT_COLUMNS).size()
+    assert len(zones) == min(5, len(counts))
+    assert list(zones['orders']) == sorted(counts, reverse = True)[:len(zones)]
+    for line in zones.itertuples():
+        near = mask.to_numpy() & (scan(df, line.Restaurant_latitude, line.Restaurant_longitude) <= radius_km)
+        assert line.zone_orders == near.sum()
+        np.testing.assert_allclose(line.zone_avg_time, df.loc[near, ZONE_MEASURE].mean() if near.any() else np.nan)
@@ -0,0 +1,64 @@
+""" SQLite backend: the filters and aggregations run in SQL against the same ones in pandas. """
+#Import Libraries
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import backend, sql
+from utils.cube import CUBE_DIMENSIONS, build_cube, distinct_drivers, filter_cube, rollup
+from utils.spatial import RESTAURANT_COLUMNS, ZONE_MEASURE, build_location_index, busiest_zones
+
+@pytest.fixture(scope = 'module')
+def database(csv_path):
+    return sql.ensure_database(csv_path)
+
+@pytest.fixture(scope = 'module')
+def cube(df):
+    return build_cube(df)
+
+def pairs(cube):
+    """ This function lists the (dimensions of the cell, delivery person) pairs of the selected cells.
+
+        Input: Cube
+        Output: Sorted list of tuples
+    """
+    cells = cube.cells.loc[:, CUBE_DIMENSIONS].astype(str)
+    drivers = cube.drivers.loc[cube.drivers['cell'].isin(cube.cells.index), :]
+    dimensions = cells.loc[drivers['cell'], :].to_numpy().tolist()
+    ids = cube.driver_ids[drivers['driver'].to_numpy()].astype(str).tolist()
+    return sorted(tuple(cell) + (driver,) for cell, driver in zip(dimensions, ids))
+
+def test_select_cube_matches_pandas(database, csv_path, cube, state):
+    result = sql.select_cube(csv_path, **state)
+    expected = filter_cube(cube, **state)
+    assert len(result.cells) == len(expected.cells)
+    for by in ['City', ['City', 'Road_traffic_density'], 'Order_Date']:
+        np.testing.assert_allclose(rollup(result, by).to_numpy(np.float64), rollup(expected, by).to_numpy(np.float64))
+    assert distinct_drivers(result) == distinct_drivers(expected)
+
+def test_select_cube_keeps_cell_drivers(database, csv_path, cube, state):
+    #Every (cell, delivery person) pair, not only the distinct delivery persons of the selection
+    assert pairs(sql.select_cube(csv_path, **state)) == pairs(filter_cube(cube, **state))
+
+def test_select_rows_matches_pandas(database, csv_path, df, state, mask):
+    columns = ['ID', 'Order_Date', 'City', 'Time_taken(min)']
+    where = {'Road_traffic_density': state['traffic'], 'Weatherconditions': state['weather']}
+    result = sql.select_rows(csv_path, columns, state['date_max'], **where)
+    expected = df.loc[mask, columns]
+    assert sorted(result['ID']) == sorted(expected['ID'])
+    assert result['Time_taken(min)'].sum() == expected['Time_taken(min)'].sum()
+
+def test_column_range_matches_pandas(database, csv_path, df, state, mask):
+    where = {'Road_traffic_density': state['traffic'], 'Weatherconditions': state['weather']}
+    low, high = sql.column_range(csv_path, 'Delivery_person_Age', state['date_max'], **where)
+    ages = df.loc[mask, 'Delivery_person_Age']
+    if len(ages):
+        assert (low, high) == (ages.min(), ages.max())
+    else:
+        assert pd.isna(low) and pd.isna(high)
+
+def test_busiest_restaurants_match_pandas(database, csv_path, df, state, mask, monkeypatch):
+    monkeypatch.setattr(backend, 'BACKEND', 'sqlite')
+    zones = backend.busiest_restaurants(csv_path, state['date_max'], state['traffic'], state['weather'], top = 5)
+    expected = busiest_zones(build_location_index(df), df.loc[mask, RESTAURANT_COLUMNS + [ZONE_MEASURE]], top = 5)
+    pd.testing.assert_frame_equal(zones, expected, check_dtype = False)
@@ -0,0 +1,45 @@
+""" Static assets of the pages, prepared once per process. """
+#Import Libraries
+import io
+import os
+import threading
+
+LOGO_PATH = 'logo.png'
+LOGO_WIDTH = 100
+
+#{(absolute path, width, mtime): png bytes}
+_images = {}
+_images_lock = threading.Lock()
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def resized_png(path, width):
+    """ This function decodes an image and encodes it again as a PNG of the given width.
+
+        Input: Path of the image, width in pixels
+        Output: PNG bytes
+    """
+    from PIL import Image
+
+    with Image.open(path) as image:
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), resample = Image.BILINEAR)
+        out = io.BytesIO()
+        image.save(out, format = 'PNG')
+    return out.getvalue()
+
+def logo(path = LOGO_PATH, width = LOGO_WIDTH):
+    """ This function returns the logo of the sidebar already at its display width, decoded once per
+        process. st.image receives PNG bytes of the right width, so it neither decodes nor resizes
+        the image again on a rerun.
+
+        Input: Path of the image, width in pixels
+        Output: PNG bytes
+    """
+    key = (os.path.abspath(path), width, os.stat(path).st_mtime_ns)
+    with _images_lock:
+        if key not in _images:
+            _images[key] = resized_png(path, width)
+        return _images[key]
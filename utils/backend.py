@@ -0,0 +1,213 @@
+""" Storage backend of the pages, chosen with CURRY_BACKEND:
+
+    - 'pandas' (default): the cleaned dataframe, the cube and the filter index in memory (utils.data),
+      filtered with utils.filters and utils.cube. In chunked ingestion mode (CURRY_INGEST=chunked)
+      the dataframe is never loaded: the lines of a selection are read from the store in batches.
+    - 'sqlite': the cleaned dataset in a local SQLite database (utils.sql); filters and group-bys
+      run in SQL and only their results reach Python, for datasets larger than memory.
+
+    The pages only call the functions below, so they work the same on both backends.
+"""
+#Import Libraries
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from utils.cube import filter_cube
+from utils.data import (DATASET_PATH, INGEST_MODE, cached, load_cube, load_dataset, load_derived, load_driver_stats,
+                        load_sketches)
+from utils.filters import FILTER_INDEX_COLUMNS, build_filter_index, select_rows, take_rows
+from utils.quantiles import filter_sketches
+from utils.rollups import ROLLUP_COLUMNS, build_calendar_rollups, select_weeks
+from utils.spatial import LOCATION_COLUMNS, RESTAURANT_COLUMNS, ZONE_MEASURE, build_location_index, busiest_zones
+
+BACKEND = os.environ.get('CURRY_BACKEND', 'pandas')
+
+#Sidebar selection of a session: row positions into the shared dataframe or the store (None for every
+#row, and always None on the sqlite backend, which runs the filters again in SQL)
+Selection = namedtuple('Selection', ['path', 'date_max', 'dimensions', 'rows'])
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def load_backend(path = DATASET_PATH):
+    """ This function prepares the backend for the current version of the dataset: loads the
+        dataframe (not in chunked ingestion mode), the cube, the filter index and the calendar rollups,
+        or builds the database when it is stale.
+
+        Input: Path of the csv file
+    """
+    if BACKEND == 'sqlite':
+        from utils.sql import ensure_database
+        cached(path, 'sqlite database', lambda: ensure_database(path))
+        return
+    if INGEST_MODE != 'chunked':
+        load_dataset(path)
+    load_cube(path)
+    load_derived(build_filter_index, path, FILTER_INDEX_COLUMNS)
+    load_derived(build_calendar_rollups, path, ROLLUP_COLUMNS)
+
+def select(path, date_max = None, **dimensions):
+    """ This function selects the lines of the sidebar filters without copying them: a session keeps
+        the selection (a few bytes per selected line, none when every line is kept) and the dataset
+        stays shared by every session.
+
+        Input: Path of the csv file, dates strictly before date_max, and for any of
+               utils.filters.FILTER_DIMENSIONS a list of the values to keep (None keeps everything)
+        Output: Selection
+    """
+    load_backend(path)
+    if BACKEND == 'sqlite':
+        return Selection(path, date_max, dimensions, None)
+    index = load_derived(build_filter_index, path, FILTER_INDEX_COLUMNS)
+    rows = select_rows(index, date_max = date_max, **dimensions)
+    if len(rows) == len(index.dates):
+        rows = None
+    elif len(index.dates) < 2 ** 31:
+        rows = rows.astype(np.int32)
+    return Selection(path, date_max, dimensions, rows)
+
+def dataset_rows(path, rows, columns):
+    """ This function reads lines of the dataset, only for the columns in use: from the shared
+        dataframe, or one batch of the store at a time in chunked ingestion mode (utils.ingest).
+
+        Input: Path of the csv file, sorted row positions (None for every row), list of columns
+        Output: Dataframe
+    """
+    if INGEST_MODE == 'chunked':
+        from utils.ingest import read_store_rows
+        return read_store_rows(path, rows, columns)
+    df = load_dataset(path)
+    if rows is None:
+        return df.loc[:, columns].copy()
+    return take_rows(df, rows, columns)
+
+def selection_frame(selection, columns):
+    """ This function materializes a selection, once, and only for the columns in use.
+
+        Input: Selection, list of columns
+        Output: Dataframe
+    """
+    if BACKEND == 'sqlite':
+        from utils import sql
+        return sql.select_rows(selection.path, columns, selection.date_max, **selection.dimensions)
+    return dataset_rows(selection.path, selection.rows, columns)
+
+def selection_range(selection, column):
+    """ This function returns the smallest and the largest value of a column over a selection,
+        copying that column only.
+
+        Input: Selection, column name
+        Output: Tuple (min, max), NaN for an empty selection
+    """
+    if BACKEND == 'sqlite':
+        from utils import sql
+        return sql.column_range(selection.path, column, selection.date_max, **selection.dimensions)
+    if INGEST_MODE == 'chunked':
+        values = dataset_rows(selection.path, selection.rows, [column])[column]
+    else:
+        values = load_dataset(selection.path)[column]
+        if selection.rows is not None:
+            values = values.take(selection.rows)
+    return values.min(), values.max()
+
+def filtered_rows(path, columns, date_max = None, **dimensions):
+    """ This function returns the lines of the sidebar selection.
+
+        Input: Path of the csv file, columns in use, dates strictly before date_max, and for any of
+               utils.filters.FILTER_DIMENSIONS a list of the values to keep (None keeps everything)
+        Output: Dataframe
+    """
+    return selection_frame(select(path, date_max, **dimensions), columns)
+
+def filtered_cube(path, date_max = None, traffic = None, weather = None):
+    """ This function returns the cube of the sidebar selection (see utils.cube.filter_cube).
+
+        Input: Path of the csv file, dates strictly before date_max, lists of traffic densities and
+               weather conditions (None keeps everything)
+        Output: Cube
+    """
+    load_backend(path)
+    if BACKEND == 'sqlite':
+        from utils import sql
+        return sql.select_cube(path, date_max, traffic, weather)
+    return filter_cube(load_cube(path), date_max = date_max, traffic = traffic, weather = weather)
+
+def filtered_sketches(path, date_max = None, traffic = None, weather = None):
+    """ This function returns the delivery time sketches of the sidebar selection (see utils.quantiles).
+
+        Input: Path of the csv file, dates strictly before date_max, lists of traffic densities and
+               weather conditions (None keeps everything)
+        Output: Sketches
+    """
+    load_backend(path)
+    if BACKEND == 'sqlite':
+        from utils import sql
+        return sql.select_sketches(path, date_max, traffic, weather)
+    return filter_sketches(load_sketches(path), date_max = date_max, traffic = traffic, weather = weather)
+
+def filtered_weeks(path, date_max = None, traffic = None):
+    """ This function returns the weekly orders, distinct delivery persons and delivery time of the
+        sidebar selection, from the calendar rollups (see utils.rollups).
+
+        Input: Path of the csv file, dates strictly before date_max, list of traffic densities
+               (None keeps everything)
+        Output: Dataframe indexed by Week_Index
+    """
+    load_backend(path)
+    if BACKEND == 'sqlite':
+        from utils import sql
+        return sql.select_weeks(path, date_max, traffic)
+    return select_weeks(load_derived(build_calendar_rollups, path, ROLLUP_COLUMNS), date_max = date_max, traffic = traffic)
+
+def busiest_restaurants(path, date_max = None, traffic = None, weather = None, top = 10):
+    """ This function returns the busiest restaurant locations of the sidebar selection, with the
+        selected deliveries made around them (see utils.spatial.busiest_zones). The location index
+        of the dataset is built on the first call only, since no other page reads it; the sqlite
+        backend indexes the locations of the selection instead.
+
+        Input: Path of the csv file, dates strictly before date_max, lists of traffic densities and
+               weather conditions (None keeps everything), number of restaurants
+        Output: Dataframe
+    """
+    load_backend(path)
+    columns = LOCATION_COLUMNS + [ZONE_MEASURE]
+    if BACKEND == 'sqlite':
+        from utils import sql
+        orders = sql.select_rows(path, columns, date_max, Road_traffic_density = traffic, Weatherconditions = weather)
+        orders = orders.reset_index(drop = True)
+        return busiest_zones(build_location_index(orders), orders, top)
+    selection = select(path, date_max, Road_traffic_density = traffic, Weatherconditions = weather)
+    orders = selection_frame(selection, RESTAURANT_COLUMNS + [ZONE_MEASURE])
+    return busiest_zones(load_derived(build_location_index, path, LOCATION_COLUMNS), orders, top)
+
+def driver_stats(path):
+    """ This function returns the per-driver statistics store of the whole dataset (utils.driver_stats),
+        once per version of the dataset.
+
+        Input: Path of the csv file
+        Output: Dataframe
+    """
+    load_backend(path)
+    if BACKEND == 'sqlite':
+        from utils import sql
+        return cached(path, 'sqlite driver stats', lambda: sql.select_driver_stats(path))
+    return load_driver_stats(path)
+
+def column_range(path, column):
+    """ This function returns the smallest and the largest value of a column over the whole dataset.
+
+        Input: Path of the csv file, column name
+        Output: Tuple (min, max)
+    """
+    load_backend(path)
+    if BACKEND == 'sqlite':
+        from utils import sql
+        return sql.column_range(path, column)
+    if INGEST_MODE == 'chunked':
+        values = dataset_rows(path, None, [column])[column]
+    else:
+        values = load_dataset(path)[column]
+    return values.min(), values.max()
@@ -0,0 +1,95 @@
+""" Chart builders of the Company View page (pages/1_Company_View.py). """
+#Import Libraries
+import plotly.express as px
+
+from utils.cube import rollup
+from utils.maps import delivery_map
+from utils.timeseries import MAX_CHART_POINTS, downsample, resample_series
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def country_map(df, layer = 'Medians'):
+    """This function generates a map visualization to display delivery locations based on city and 
+       road traffic density, or the density of every delivery (heatmap / clustered markers).
+
+       Input: Dataframe, layer (one of utils.maps.MAP_LAYERS)
+       Output: folium Map
+    """
+    map = delivery_map(df, layer)
+    return map
+
+def week_axis(weeks):
+    """ This function chooses the x axis of the weekly charts: the week of the year, or the first day
+        of the week when the selection spans several years (the week numbers repeat).
+
+        Input: Weekly totals of the selection
+        Output: Column name
+    """
+    years = weeks['Week_Start'].dt.year
+    return 'Week_of_Year' if years.nunique() <= 1 else 'Week_Start'
+
+def order_share_by_week(weeks, max_points = MAX_CHART_POINTS):
+    """This function generates a line chart visualization to display the share of orders per delivery
+        person over weeks.
+
+    Input: Weekly totals of the selection (utils.backend.filtered_weeks), maximum number of points
+    Output: Line chart
+
+    """
+    x = week_axis(weeks)
+    df_aux = weeks.loc[:, [x]].assign(Order_by_Delivery = weeks['orders'] / weeks['drivers'])
+    df_aux = downsample(df_aux, x, 'Order_by_Delivery', max_points)
+    fig = px.line(df_aux, x = x,y = "Order_by_Delivery")
+    return fig
+    
+def order_by_week(weeks, max_points = MAX_CHART_POINTS):
+    """ This function generates a line chart visualization to display the trend of orders over weeks
+        in a year.
+
+        Input: Weekly totals of the selection (utils.backend.filtered_weeks), maximum number of points
+        Output: Line chart 
+    """
+    x = week_axis(weeks)
+    df_aux = weeks.loc[:, [x, 'orders']].rename(columns = {'orders': 'ID'})
+    df_aux = downsample(df_aux, x, 'ID', max_points)
+    fig = px.line(df_aux, x = x, y = 'ID')
+    return fig
+
+def traffic_order_city(cube):
+    """ This function generates a scatter plot visualization to display the relationship between
+        city, road traffic density, and the count of orders.
+
+        Input: Cube (utils.cube) filtered by the sidebar
+        Output: Scatter plot
+
+    """
+    df_aux = rollup(cube, ["City","Road_traffic_density"]).loc[:,["orders"]].rename(columns = {"orders": "ID"}).reset_index()
+    fig = px.scatter(df_aux, x = "City", y = "Road_traffic_density", size = "ID",color = "City")
+    return fig
+    
+def traffic_order_share(cube):
+    """ This function generates a pie chart visualization to display the share of orders
+        across different levels of road traffic density.
+        
+        Input: Cube (utils.cube) filtered by the sidebar
+        Output: Pie chart
+    """
+    df_aux = rollup(cube, "Road_traffic_density").loc[:,["orders"]].rename(columns = {"orders": "ID"}).reset_index()
+    df_aux['Entregas_percent'] = df_aux["ID"] /df_aux["ID"].sum()
+    fig = px.pie(df_aux,values = "Entregas_percent", names = "Road_traffic_density")
+    return fig
+
+def order_metric(cube, max_points = MAX_CHART_POINTS):
+    """ This function generates a bar chart visualization to display order metrics over day, or over
+        week or month when the selected date range has more than max_points days.
+    
+        Input: Cube (utils.cube) filtered by the sidebar, maximum number of bars
+        Output: Bar chart
+    """
+    df_aux = rollup(cube, "Order_Date").loc[:,["orders"]].rename(columns = {"orders": "ID"}).reset_index()
+    df_aux, resolution = resample_series(df_aux, 'Order_Date', ['ID'], max_points)
+    labels = {} if resolution == 'day' else {'Order_Date': 'Order_Date (%s)' % resolution}
+    fig = px.bar(df_aux, x = 'Order_Date', y = 'ID', labels = labels)
+    return fig
@@ -0,0 +1,194 @@
+""" Pre-aggregated cube of additive measures over the dimensions used by the sidebar filters and
+    the charts, so a rerun aggregates a few thousand cells instead of every order.
+
+    Each cell of the cube is one combination of CUBE_DIMENSIONS present in the data and holds, for
+    each measure, count / sum / sum of squares / min / max. Mean and standard deviation of any
+    roll-up are derived from those sums. Distinct delivery persons are kept as the unique
+    (cell, delivery person) pairs, so they can be counted exactly for any selection of cells.
+"""
+#Import Libraries
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density', 'Weatherconditions', 'Festival', 'Type_of_order']
+CUBE_MEASURES = ['Time_taken(min)', 'Distance', 'Delivery_person_Ratings']
+STATISTICS = ['count', 'sum', 'sumsq', 'min', 'max']
+
+#cells: one line per cell (dimensions, 'orders' and the statistics of each measure)
+#drivers: unique (cell, driver) pairs, driver being a code into driver_ids
+Cube = namedtuple('Cube', ['cells', 'drivers', 'driver_ids'])
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def measure_column(measure, statistic):
+    """ This function returns the name of the cube column holding a statistic of a measure.
+
+        Input: Measure name, statistic name (one of STATISTICS)
+        Output: Column name
+    """
+    return '%s_%s' % (measure, statistic)
+
+def merge_rule(column):
+    """ This function returns how a cube column is merged when cells are rolled up.
+
+        Input: Column name
+        Output: 'min', 'max' or 'sum'
+    """
+    if column.endswith('_min'):
+        return 'min'
+    if column.endswith('_max'):
+        return 'max'
+    return 'sum'
+
+def measure_values(df, measures = CUBE_MEASURES):
+    """ This function reads the measures in wide types (int64 / float64), so their sums do not
+        overflow the compact types of the cleaned dataframe (e.g. int16 minutes).
+
+        Input: Dataframe, measure names
+        Output: Dataframe of the measures
+    """
+    values = df.loc[:, list(measures)]
+    return values.astype({col: np.int64 if pd.api.types.is_integer_dtype(values[col]) else np.float64
+                          for col in values.columns})
+
+def build_cube(df):
+    """ This function aggregates the cleaned dataframe into the cube.
+
+        Input: Cleaned dataframe
+        Output: Cube
+    """
+    measures = measure_values(df)
+    squares = (measures.astype(np.float64) ** 2).add_suffix('_sq')
+    work = pd.concat([df.loc[:, CUBE_DIMENSIONS], measures, squares], axis = 1)
+    grouped = work.groupby(CUBE_DIMENSIONS, observed = True, sort = True)
+
+    aggregations = {'orders': (CUBE_MEASURES[0], 'size')}
+    for measure in CUBE_MEASURES:
+        aggregations[measure_column(measure, 'count')] = (measure, 'count')
+        aggregations[measure_column(measure, 'sum')] = (measure, 'sum')
+        aggregations[measure_column(measure, 'sumsq')] = (measure + '_sq', 'sum')
+        aggregations[measure_column(measure, 'min')] = (measure, 'min')
+        aggregations[measure_column(measure, 'max')] = (measure, 'max')
+    cells = grouped.agg(**aggregations).reset_index()
+
+    #Distinct delivery persons per cell
+    driver_codes, driver_ids = pd.factorize(df['Delivery_person_ID'])
+    drivers = (pd.DataFrame({'cell': grouped.ngroup().to_numpy(), 'driver': driver_codes})
+                 .drop_duplicates()
+                 .reset_index(drop = True))
+    return Cube(cells, drivers, np.asarray(driver_ids))
+
+def filter_cube(cube, date_max = None, traffic = None, weather = None):
+    """ This function applies the sidebar filters to the cells of the cube.
+
+        Input: Cube, dates strictly before date_max, lists of traffic densities and weather conditions
+               (None keeps everything)
+        Output: Cube with the selected cells
+    """
+    cells = cube.cells
+    linhas_selecionadas = np.ones(len(cells), dtype = bool)
+    if date_max is not None:
+        linhas_selecionadas &= (cells['Order_Date'] < date_max).to_numpy()
+    if traffic is not None:
+        linhas_selecionadas &= cells['Road_traffic_density'].isin(traffic).to_numpy()
+    if weather is not None:
+        linhas_selecionadas &= cells['Weatherconditions'].isin(weather).to_numpy()
+    return cube._replace(cells = cells.loc[linhas_selecionadas, :])
+
+def rollup(cube, by = None, measure = 'Time_taken(min)'):
+    """ This function rolls the selected cells up to the `by` dimensions and derives the statistics
+        of a measure from the additive aggregates.
+
+        Input: Cube, dimension or list of dimensions (None for the grand total), measure name
+        Output: Dataframe indexed by `by` with orders, count, mean, std (ddof = 1), min and max
+    """
+    columns = ['orders'] + [measure_column(measure, statistic) for statistic in STATISTICS]
+    rules = {col: merge_rule(col) for col in columns}
+    if by is None:
+        totals = cube.cells.loc[:, columns].agg(rules).to_frame().T
+    else:
+        totals = cube.cells.groupby(by, observed = True)[columns].agg(rules).sort_index()
+        totals.index = drop_unused_categories(totals.index)
+    return describe(totals, measure)
+
+def drop_unused_categories(index):
+    """ This function keeps, in the categorical levels of an index, only the categories of the
+        selected cells, so the charts do not draw (or look up) the values the filters removed.
+
+        Input: Index or MultiIndex
+        Output: Index of the same values
+    """
+    if isinstance(index, pd.MultiIndex):
+        index = index.remove_unused_levels()
+        return index.set_levels([drop_unused_categories(level) for level in index.levels])
+    if isinstance(index, pd.CategoricalIndex):
+        return index.remove_unused_categories()
+    return index
+
+def describe(totals, measure):
+    """ This function derives the statistics of a measure from its additive aggregates (the columns
+        named by measure_column), for cube roll-ups and for utils.parallel.aggregate.
+
+        Input: Dataframe with 'orders' and the STATISTICS of the measure, measure name
+        Output: Dataframe with the same index and orders, count, mean, std (ddof = 1), min and max
+    """
+    count = totals[measure_column(measure, 'count')]
+    total = totals[measure_column(measure, 'sum')]
+    variance = (totals[measure_column(measure, 'sumsq')] - total ** 2 / count) / (count - 1)
+    result = pd.DataFrame({'orders': totals['orders'],
+                           'count': count,
+                           'mean': total / count,
+                           'std': np.sqrt(variance.clip(lower = 0).where(count > 1)),
+                           'min': totals[measure_column(measure, 'min')],
+                           'max': totals[measure_column(measure, 'max')]})
+    return result
+
+def distinct_drivers(cube):
+    """ This function counts the distinct delivery persons in the selected cells.
+
+        Input: Cube
+        Output: Integer
+    """
+    cells = cube.drivers['cell'].to_numpy()
+    selected_cells = cube.cells.index.to_numpy()
+    selected = np.zeros(max(cells.max(initial = -1), selected_cells.max(initial = -1)) + 1, dtype = bool)
+    selected[selected_cells] = True
+    drivers = cube.drivers['driver'].to_numpy()[selected[cells]]
+    return int(np.count_nonzero(np.bincount(drivers, minlength = len(cube.driver_ids))))
+
+def merge_cubes(cubes):
+    """ This function merges cubes built from disjoint parts of the data (e.g. chunks of the csv)
+        into the cube of the whole data.
+
+        Input: List of unfiltered cubes
+        Output: Cube
+    """
+    cubes = [cube for cube in cubes if len(cube.cells)]
+    if len(cubes) == 1:
+        return cubes[0]
+    if not cubes:
+        raise ValueError('merge_cubes needs at least one non-empty cube')
+
+    #Cells: regroup the cells of every cube by their dimensions
+    all_cells = pd.concat([cube.cells.reset_index(drop = True) for cube in cubes], ignore_index = True)
+    all_cells = all_cells.astype({dimension: 'category' for dimension in CUBE_DIMENSIONS if dimension != 'Order_Date'})
+    grouped = all_cells.groupby(CUBE_DIMENSIONS, observed = True, sort = True)
+    columns = [col for col in all_cells.columns if col not in CUBE_DIMENSIONS]
+    cells = grouped[columns].agg({col: merge_rule(col) for col in columns}).reset_index()
+    new_cell = grouped.ngroup().to_numpy()
+
+    #Drivers: translate every cube's cell ids and driver codes to the merged ones
+    driver_codes, driver_ids = pd.factorize(np.concatenate([cube.driver_ids for cube in cubes]))
+    pairs = []
+    cell_offset = driver_offset = 0
+    for cube in cubes:
+        pairs.append(pd.DataFrame({'cell': new_cell[cell_offset + cube.drivers['cell'].to_numpy()],
+                                   'driver': driver_codes[driver_offset + cube.drivers['driver'].to_numpy()]}))
+        cell_offset += len(cube.cells)
+        driver_offset += len(cube.driver_ids)
+    drivers = pd.concat(pairs, ignore_index = True).drop_duplicates().reset_index(drop = True)
+    return Cube(cells, drivers, np.asarray(driver_ids))
@@ -0,0 +1,409 @@
+#Import Libraries
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+from utils import snapshot
+from utils.geo import haversine_distance
+from utils.rollups import calendar_fields
+from utils.shared import share_frame
+
+DATASET_PATH = "dataset/train.csv"
+
+#Schema of the raw csv
+NAN_SENTINEL = 'NaN '
+DATE_FORMAT = '%d-%m-%Y'
+#Lines with "NaN" in any of these columns are removed
+REQUIRED_COLUMNS = ['Delivery_person_Age', 'Time_Orderd', 'multiple_deliveries', 'Festival', 'City']
+#Columns where "NaN " is parsed as a missing value by read_dataset
+NAN_COLUMNS = REQUIRED_COLUMNS + ['Delivery_person_Ratings']
+TEXT_COLUMNS = ['ID', 'Delivery_person_ID', 'Weatherconditions', 'Road_traffic_density',
+                'Type_of_order', 'Type_of_vehicle', 'Festival', 'City']
+TEXT_PREFIXES = {'Time_taken(min)': '(min) ', 'Weatherconditions': 'conditions '}
+#Compact types of the cleaned frame: small integers, float32 coordinates and categories for the text
+COLUMN_TYPES = {'Delivery_person_Age': np.int8, 'Delivery_person_Ratings': float,
+                'Restaurant_latitude': np.float32, 'Restaurant_longitude': np.float32,
+                'Delivery_location_latitude': np.float32, 'Delivery_location_longitude': np.float32,
+                'Vehicle_condition': np.int8, 'multiple_deliveries': np.int8, 'Time_taken(min)': np.int16,
+                'Delivery_person_ID': 'category', 'Weatherconditions': 'category',
+                'Road_traffic_density': 'category', 'Type_of_order': 'category', 'Type_of_vehicle': 'category',
+                'Festival': 'category', 'City': 'category'}
+#Columns changed by clean_dataframe
+CLEAN_COLUMNS = list(dict.fromkeys(TEXT_COLUMNS + list(TEXT_PREFIXES) + ['Order_Date'] + list(COLUMN_TYPES)))
+#Columns with few distinct values, parsed as categories by read_dataset
+CATEGORY_COLUMNS = ['Delivery_person_ID', 'Order_Date', 'Weatherconditions', 'Road_traffic_density',
+                    'Type_of_order', 'Type_of_vehicle', 'Festival', 'City', 'Time_taken(min)']
+
+#Derived columns, computed once per dataset
+DISTANCE_DTYPE = np.float64
+
+#'memory' reads the whole csv at once, 'chunked' streams it (utils.ingest) for datasets larger than memory
+INGEST_MODE = os.environ.get('CURRY_INGEST', 'memory')
+
+#Process wide cache: {absolute path: entry}, entry being {'signature', 'digest', 'derived', 'factories', 'lock'}
+#and the dataset derived['dataset']. An entry only gains derived values: a new version of the file replaces it.
+_cache = {}
+_cache_lock = threading.RLock()
+#Paths whose new versions are built by a background thread (utils.refresh) instead of by the reruns
+_background_paths = set()
+#Entries pinned by the current thread ({absolute path: entry}), see pin_dataset
+_pinned = threading.local()
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def read_dataset(path = DATASET_PATH, **kwargs):
+    """ This function reads the raw csv, turning the "NaN " sentinels into missing values while parsing.
+
+        Repetitive text columns are parsed as categories, so clean_dataframe only has to clean each
+        distinct value once instead of once per line.
+
+        Input: Path of the csv file (extra keyword arguments go to pd.read_csv)
+        Output: Raw dataframe, ready for clean_dataframe
+    """
+    kwargs.setdefault('dtype', {col: 'category' for col in CATEGORY_COLUMNS})
+    return pd.read_csv(path, na_values = {col: [NAN_SENTINEL] for col in NAN_COLUMNS}, **kwargs)
+
+def clean_column(values, col, typed = True):
+    """ This function applies the cleaning rules of the schema to the values of one column.
+
+        Input: Series of raw values, column name, typed (False skips the cast to COLUMN_TYPES)
+        Output: Series of clean values
+    """
+    if col in TEXT_COLUMNS:
+        values = values.str.strip()
+    if col in TEXT_PREFIXES:
+        values = values.str.removeprefix(TEXT_PREFIXES[col])
+    if col == 'Order_Date':
+        values = pd.to_datetime(values, format = DATE_FORMAT)
+    if typed and col in COLUMN_TYPES:
+        values = values.astype(COLUMN_TYPES[col])
+    return values
+
+def clean_by_value(series, col):
+    """ This function cleans a column, doing the string work once per distinct value when the column
+        is categorical and mapping the result back to the lines with the category codes.
+
+        Input: Series, column name
+        Output: Series with the same index
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return clean_column(series, col)
+    codes = series.cat.codes.to_numpy()
+    values = clean_column(pd.Series(series.cat.categories), col, typed = False)
+    if COLUMN_TYPES.get(col) == 'category':
+        #Categories that become equal once cleaned ('Low' and 'Low ') are merged by re-coding
+        new_codes, categories = pd.factorize(values, sort = True)
+        values = pd.Categorical.from_codes(take(new_codes, codes, allow_fill = True, fill_value = -1), categories)
+        return pd.Series(values, index = series.index, name = series.name)
+    values = take(values.to_numpy(), codes, allow_fill = True)
+    values = pd.Series(values, index = series.index, name = series.name)
+    return values.astype(COLUMN_TYPES[col]) if col in COLUMN_TYPES else values
+
+def clean_dataframe(df):
+    """ This function clean the dataframe in one pass, driven by the schema at the top of this module
+    
+        Types of cleaning
+        1. Remove all lines with "NaN" (one combined mask over REQUIRED_COLUMNS)
+        2. Removing spaces from text columns
+        3. Removing text from Time_taken(min) and Weatherconditions (prefix removal)
+        4. Date column formatting
+        5. Changing the data column type (compact types: int8/int16, float32 coordinates, categories)
+
+        Steps 2 to 5 are vectorized and run once per distinct value on categorical columns.
+        Works both on frames read with read_dataset and on frames read with a plain pd.read_csv
+        (sentinels still present as "NaN " strings).
+
+        Input: Dataframe
+        Output: Dataframe
+    """
+    
+    #1. Remove all lines with "NaN"
+    required = df.loc[:, REQUIRED_COLUMNS]
+    linhas_validas = ~(required.isna() | (required == NAN_SENTINEL)).any(axis = 1)
+    df = df.loc[linhas_validas, :]
+
+    #2. to 5. Cleaning and typing each column of the schema
+    columns = {col: clean_by_value(df[col], col) for col in CLEAN_COLUMNS}
+
+    return pd.DataFrame({col: columns.get(col, df[col]) for col in df.columns})
+
+def add_derived_columns(df):
+    """ This function adds the columns derived from the cleaned data, so the pages never compute
+        them per rerun.
+
+        Derived columns
+        1. Distance: km between restaurant and delivery location (vectorized haversine)
+        2. Calendar fields of Order_Date: Day_of_Week, Week_of_Year, ISO_Week, Week_Index (utils.rollups)
+
+        Input: Cleaned dataframe
+        Output: Dataframe with the derived columns
+    """
+    distance = haversine_distance(df['Restaurant_latitude'], df['Restaurant_longitude'],
+                                  df['Delivery_location_latitude'], df['Delivery_location_longitude'],
+                                  dtype = DISTANCE_DTYPE)
+    return df.assign(Distance = distance, **calendar_fields(df['Order_Date']))
+
+def prepare_dataset(df):
+    """ This function turns the raw dataframe into the one used by the pages: cleaned, with the
+        derived columns and sorted by Order_Date (date filters become a binary search, see utils.filters).
+
+        Input: Raw dataframe
+        Output: Cleaned dataframe with the derived columns
+    """
+    df = add_derived_columns(clean_dataframe(df))
+    return df.sort_values('Order_Date', kind = 'stable', ignore_index = True)
+
+def memory_report(before, after):
+    """ This function compares the memory used by each column of two versions of the dataframe
+        (e.g. the object/int64 frame of the original cleaner and the compact one of clean_dataframe).
+
+        Input: Dataframe before, dataframe after
+        Output: Dataframe with bytes before, bytes after and ratio per column, plus a 'Total' line
+    """
+    report = pd.DataFrame({'before': before.memory_usage(index = False, deep = True),
+                           'after': after.memory_usage(index = False, deep = True)})
+    report.loc['Total'] = report.sum()
+    report['ratio'] = report['before'] / report['after']
+    return report
+
+def file_signature(path):
+    """ This function returns a cheap fingerprint of a file, used to notice that it was replaced.
+
+        Input: File path
+        Output: Tuple (modification time in ns, size in bytes)
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def file_digest(path, chunk_size = 1 << 20):
+    """ This function hashes the content of a file in chunks.
+
+        Input: File path
+        Output: Hex digest (blake2b)
+    """
+    digest = hashlib.blake2b(digest_size = 16)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def build_snapshot(path = DATASET_PATH, digest = None):
+    """ This function reads and prepares the csv and writes its typed snapshot next to it.
+
+        Input: Path of the csv file, content hash of the csv (None to hash the file)
+        Output: Path of the snapshot
+    """
+    out = snapshot.snapshot_path(path)
+    snapshot.write_snapshot(prepare_dataset(read_dataset(path)), out, digest or file_digest(path))
+    return out
+
+def read_clean_dataset(path = DATASET_PATH, columns = None):
+    """ This function returns the cleaned dataset: from the columnar store built chunk by chunk in
+        chunked ingestion mode, from the snapshot when pyarrow is installed (rebuilding it first when
+        it was written from another content than the current version), or from the csv otherwise.
+
+        Input: Path of the csv file, optional list of columns
+        Output: Dataframe
+    """
+    if INGEST_MODE == 'chunked':
+        from utils.ingest import read_store
+        return read_store(path, columns = columns)
+    if not snapshot.snapshot_available():
+        df = prepare_dataset(read_dataset(path))
+        return df if columns is None else df.loc[:, columns]
+    digest = dataset_version(path)
+    if snapshot.snapshot_is_stale(path, digest):
+        build_snapshot(path, digest)
+    return snapshot.read_snapshot(snapshot.snapshot_path(path), columns = columns)
+
+def new_entry(signature, digest, factories = None):
+    """ This function creates an empty cache entry for a version of the file.
+
+        Input: File signature, content hash, factories of the derived values to carry over
+        Output: Dictionary {'signature', 'digest', 'derived', 'factories', 'lock'}
+    """
+    return {'signature': signature, 'digest': digest, 'derived': {}, 'factories': dict(factories or {}),
+            'lock': threading.RLock()}
+
+def pinned_entries():
+    """ This function returns the entries pinned by the current thread.
+
+        Output: Dictionary {absolute path: entry}
+    """
+    if not hasattr(_pinned, 'entries'):
+        _pinned.entries = {}
+    return _pinned.entries
+
+def pin_dataset(path = DATASET_PATH, entry = None):
+    """ This function pins a version of the dataset to the current thread: until it is pinned again,
+        every load_* of this thread returns that version, even if a newer one is swapped in meanwhile.
+        The pages pin the current version at the start of each rerun.
+
+        Input: Path of the csv file, entry to pin (None for the current version)
+        Output: Entry
+    """
+    path = os.path.abspath(path)
+    pinned_entries().pop(path, None)
+    entry = dataset_entry(path) if entry is None else entry
+    pinned_entries()[path] = entry
+    return entry
+
+def unpin_dataset(path = DATASET_PATH):
+    """ This function removes the version pinned to the current thread.
+
+        Input: Path of the csv file
+    """
+    pinned_entries().pop(os.path.abspath(path), None)
+
+def current_entry(path = DATASET_PATH):
+    """ This function returns the cached entry of a file, without checking the file.
+
+        Input: Path of the csv file
+        Output: Entry, or None when the file was never loaded
+    """
+    return _cache.get(os.path.abspath(path))
+
+def swap_entry(path, entry):
+    """ This function makes an entry the current version of a file for the next reruns. Threads that
+        pinned the previous version keep it.
+
+        Input: Path of the csv file, entry
+    """
+    with _cache_lock:
+        _cache[os.path.abspath(path)] = entry
+
+def defer_reloads(path = DATASET_PATH):
+    """ This function marks a path as refreshed in the background (utils.refresh): once loaded, its
+        reruns keep the current version instead of reloading a changed file themselves.
+
+        Input: Path of the csv file
+    """
+    _background_paths.add(os.path.abspath(path))
+
+def dataset_entry(path = DATASET_PATH):
+    """ This function returns the cache entry of the current version of the file, replacing the
+        cached one when the file signature (mtime, size) changed and its content hash is different.
+        A file that was only touched keeps its entry. The version pinned to the thread comes first,
+        and paths refreshed in the background are never reloaded here.
+
+        Input: Path of the csv file
+        Output: Dictionary {'signature', 'digest', 'derived', 'factories', 'lock'}
+    """
+    path = os.path.abspath(path)
+    entry = pinned_entries().get(path) or _cache.get(path)
+    if entry is not None and (path in _background_paths or path in pinned_entries()):
+        return entry
+    signature = file_signature(path)
+    if entry is not None and entry['signature'] == signature:
+        return entry
+
+    with _cache_lock:
+        #Another session may have replaced the entry while we were waiting for the lock
+        entry = _cache.get(path)
+        if entry is not None and entry['signature'] == signature:
+            return entry
+
+        digest = file_digest(path)
+        if entry is not None and entry['digest'] == digest:
+            entry = dict(entry, signature = signature)
+        else:
+            entry = new_entry(signature, digest, entry and entry['factories'])
+        _cache[path] = entry
+    return entry
+
+def dataset_version(path = DATASET_PATH):
+    """ This function returns the version of the dataset: the content hash of the csv file.
+
+        Input: Path of the csv file
+        Output: String
+    """
+    return dataset_entry(path)['digest']
+
+def cached(path, key, factory):
+    """ This function returns factory(), computed once per version of the dataset and shared by
+        every page and session. The factory is kept with the entry, so a background refresh can build
+        the same values for the next version.
+
+        Input: Path of the csv file, cache key, function without arguments
+        Output: Whatever the factory returns
+    """
+    entry = dataset_entry(path)
+    derived = entry['derived']
+    if key not in derived:
+        with entry['lock']:
+            if key not in derived:
+                entry['factories'].setdefault(key, factory)
+                derived[key] = factory()
+    return derived[key]
+
+def load_dataset(path = DATASET_PATH):
+    """ This function returns the cleaned dataset, reading and cleaning the csv only once per process.
+
+        The same dataframe is shared by every page and every session, so its buffers are read-only
+        (utils.shared.share_frame): filter it into a new dataframe before adding or changing columns.
+        It is reloaded when the content of the file changes (see dataset_entry).
+
+        Input: Path of the csv file
+        Output: Dataframe
+    """
+    return cached(path, 'dataset', lambda: share_frame(read_clean_dataset(path)))
+
+def load_derived(builder, path = DATASET_PATH, columns = None):
+    """ This function returns builder(dataset), computed once per version of the dataset and
+        shared, like the dataset itself, by every page and session. In chunked ingestion mode the
+        builder only receives the columns it reads, from the store, and the dataset is never loaded.
+
+        Input: Function receiving the cleaned dataframe (e.g. utils.cube.build_cube), path of the csv,
+               columns read by the builder (None for every column)
+        Output: Whatever the builder returns
+    """
+    key = (builder.__module__, builder.__qualname__)
+    if INGEST_MODE == 'chunked':
+        return cached(path, key, lambda: builder(read_clean_dataset(path, columns = columns)))
+    return cached(path, key, lambda: builder(load_dataset(path)))
+
+def load_cube(path = DATASET_PATH):
+    """ This function returns the cube of the dataset (utils.cube). In chunked ingestion mode it
+        is folded chunk by chunk from the csv or the store, without ever holding all the lines;
+        otherwise it is built from the cleaned dataframe, in the calling process.
+
+        Input: Path of the csv file
+        Output: Cube
+    """
+    if INGEST_MODE == 'chunked':
+        from utils.ingest import load_ingested_cube
+        return cached(path, 'ingested cube', lambda: load_ingested_cube(path))
+    from utils.cube import build_cube
+    return load_derived(build_cube, path)
+
+def load_sketches(path = DATASET_PATH):
+    """ This function returns the delivery time sketches of the dataset (utils.quantiles). In
+        chunked ingestion mode they are built batch by batch from the store and merged.
+
+        Input: Path of the csv file
+        Output: Sketches
+    """
+    if INGEST_MODE == 'chunked':
+        from utils.ingest import sketches_from_store
+        return cached(path, 'ingested sketches', lambda: sketches_from_store(path))
+    from utils.quantiles import build_sketches
+    return load_derived(build_sketches, path)
+
+def load_driver_stats(path = DATASET_PATH):
+    """ This function returns the per-driver statistics store of the dataset (utils.driver_stats).
+        In chunked ingestion mode it is folded batch by batch from the store.
+
+        Input: Path of the csv file
+        Output: Dataframe
+    """
+    if INGEST_MODE == 'chunked':
+        from utils.ingest import driver_stats_from_store
+        return cached(path, 'ingested driver stats', lambda: driver_stats_from_store(path))
+    from utils.driver_stats import build_driver_stats
+    return load_derived(build_driver_stats, path)
@@ -0,0 +1,79 @@
+""" Chart builders of the Delivery View page (pages/2_Delivery_View.py). """
+#Import Libraries
+import numpy as np
+
+from utils.cube import describe, measure_column
+from utils.driver_stats import DRIVER_KEYS, combine_driver_stats, describe_driver_stats
+from utils.parallel import aggregate
+from utils.ranking import rank_drivers, top_per_group
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def bot_delivers(df, n = 10):
+    """ This function calculates the bottom delivery drivers in each city based on the maximum delivery time.
+
+        Input: Dataframe, number of delivery drivers per city
+        Output: Dataframe
+    """
+    df_lentos = rank_drivers(df, n = n, metric = 'max', largest = True)
+    return df_lentos
+
+def top_delivers(df, n = 10):
+    """This function calculates the top delivery drivers in each city based on the minimum delivery time.
+
+        Input: Dataframe, number of delivery drivers per city
+        Output: Dataframe
+    """
+    df_rapidos = rank_drivers(df, n = n, metric = 'min', largest = False)
+    return df_rapidos
+
+def avg_ratings_per_driver(df):
+    """ This function calculates the average rating of each delivery person.
+
+        Input: Dataframe
+        Output: Dataframe
+    """
+    dfmedia_entregador = (describe(aggregate(df, 'Delivery_person_ID', ['Delivery_person_Ratings']), 'Delivery_person_Ratings')
+                            .loc[:,['mean']]
+                            .rename(columns = {'mean': 'Delivery_person_Ratings'})
+                            .reset_index())
+    return dfmedia_entregador
+
+def avg_ratings_from_stats(stats):
+    """ This function reads the average rating of each delivery person from the per-driver
+        statistics store, merging the cities of each delivery person.
+
+        Input: Per-driver statistics store (utils.driver_stats) filtered by the sidebar
+        Output: Dataframe
+    """
+    dfmedia_entregador = (describe_driver_stats(combine_driver_stats(stats, 'Delivery_person_ID'), 'Delivery_person_Ratings')
+                            .loc[:,['mean']]
+                            .rename(columns = {'mean': 'Delivery_person_Ratings'})
+                            .reset_index())
+    return dfmedia_entregador
+
+def top_delivers_from_stats(stats, n = 10):
+    """ This function ranks the top delivery drivers in each city (minimum delivery time) from the
+        per-driver statistics store.
+
+        Input: Per-driver statistics store (utils.driver_stats) filtered by the sidebar, number of delivery
+               drivers per city
+        Output: Dataframe
+    """
+    values = combine_driver_stats(stats, DRIVER_KEYS)[measure_column('Time_taken(min)', 'min')]
+    df_rapidos = top_per_group(values.astype(np.int64).rename('Time_taken(min)'), n = n, largest = False)
+    return df_rapidos
+
+def bot_delivers_from_stats(stats, n = 10):
+    """ This function ranks the bottom delivery drivers in each city (maximum delivery time) from the
+        per-driver statistics store.
+
+        Input: Per-driver statistics store (utils.driver_stats) filtered by the sidebar, number of delivery
+               drivers per city
+        Output: Dataframe
+    """
+    values = combine_driver_stats(stats, DRIVER_KEYS)[measure_column('Time_taken(min)', 'max')]
+    df_lentos = top_per_group(values.astype(np.int64).rename('Time_taken(min)'), n = n, largest = True)
+    return df_lentos
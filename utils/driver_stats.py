@@ -0,0 +1,138 @@
+""" Per-driver statistics store: for each (city, delivery person) and each combination of the
+    sidebar's traffic and weather filters, the count, mean, sum of squared deviations (m2), min and
+    max of the ratings and of the delivery time. Its size depends on the number of delivery persons,
+    not on the number of orders.
+
+    The accumulators follow Welford's algorithm in the pairwise form of Chan et al.: two tables of
+    disjoint orders merge without the orders (count and mean are weighted, m2 adds the spread of the
+    two means), so the store is folded chunk by chunk at ingest and updated with the new orders
+    only (update_driver_stats). Sum and sum of squares are count * mean and m2 + count * mean ** 2.
+
+    The ratings table and the rankings of the Delivery View read O(drivers) lines of the store
+    (filter_driver_stats, then combine_driver_stats) instead of grouping every order, whenever the
+    date filter keeps every order.
+"""
+#Import Libraries
+import numpy as np
+import pandas as pd
+
+from utils.cube import measure_column, measure_values
+
+DRIVER_KEYS = ['City', 'Delivery_person_ID']
+#Lines of the store: one per delivery person and combination of the sidebar filters
+STORE_KEYS = DRIVER_KEYS + ['Road_traffic_density', 'Weatherconditions']
+DRIVER_MEASURES = ['Delivery_person_Ratings', 'Time_taken(min)']
+ACCUMULATORS = ['count', 'mean', 'm2', 'min', 'max']
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def build_driver_stats(df):
+    """ This function aggregates orders into the store.
+
+        Input: Cleaned dataframe (or new orders with STORE_KEYS and DRIVER_MEASURES)
+        Output: Dataframe, one line per STORE_KEYS, columns measure_column(measure, accumulator)
+    """
+    work = pd.concat([df.loc[:, STORE_KEYS], measure_values(df, DRIVER_MEASURES).astype(np.float64)], axis = 1)
+    grouped = work.groupby(STORE_KEYS, observed = True, sort = True)
+    aggregations = {}
+    for measure in DRIVER_MEASURES:
+        aggregations[measure_column(measure, 'count')] = (measure, 'count')
+        aggregations[measure_column(measure, 'mean')] = (measure, 'mean')
+        aggregations[measure_column(measure, 'm2')] = (measure, 'var')
+        aggregations[measure_column(measure, 'min')] = (measure, 'min')
+        aggregations[measure_column(measure, 'max')] = (measure, 'max')
+    stats = grouped.agg(**aggregations).sort_index()
+    #m2 = (count - 1) * sample variance, 0 for a single value
+    for measure in DRIVER_MEASURES:
+        count = stats[measure_column(measure, 'count')]
+        stats[measure_column(measure, 'm2')] = (stats[measure_column(measure, 'm2')] * (count - 1)).fillna(0.0)
+    return stats.reset_index()
+
+def filter_driver_stats(stats, traffic = None, weather = None):
+    """ This function applies the traffic and weather filters of the sidebar to the store.
+
+        Input: Store, lists of traffic densities and weather conditions (None keeps everything)
+        Output: Store with the selected lines
+    """
+    linhas_selecionadas = np.ones(len(stats), dtype = bool)
+    if traffic is not None:
+        linhas_selecionadas &= stats['Road_traffic_density'].isin(traffic).to_numpy()
+    if weather is not None:
+        linhas_selecionadas &= stats['Weatherconditions'].isin(weather).to_numpy()
+    return stats.loc[linhas_selecionadas, :]
+
+def combine_driver_stats(stats, by = DRIVER_KEYS):
+    """ This function merges the accumulators of the lines with the same `by` values.
+
+        Input: Store (or concatenated stores), columns to merge by (DRIVER_KEYS for every filter
+               combination together, 'Delivery_person_ID' for every city too)
+        Output: Dataframe indexed by `by` with the merged accumulators
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    keys = [stats[col] for col in by]
+    merged = {}
+    for measure in DRIVER_MEASURES:
+        count = stats[measure_column(measure, 'count')]
+        mean = stats[measure_column(measure, 'mean')].where(count > 0, 0.0)
+        total_count = count.groupby(keys, observed = True).transform('sum')
+        total_mean = (count * mean).groupby(keys, observed = True).transform('sum') / total_count
+        #m2 of a merge: m2 of every part plus the spread of the part means around the merged mean
+        spread = (count * (mean - total_mean) ** 2).fillna(0.0)
+        merged[measure_column(measure, 'count')] = count
+        merged[measure_column(measure, 'mean')] = total_mean
+        merged[measure_column(measure, 'm2')] = stats[measure_column(measure, 'm2')].fillna(0.0) + spread
+        merged[measure_column(measure, 'min')] = stats[measure_column(measure, 'min')]
+        merged[measure_column(measure, 'max')] = stats[measure_column(measure, 'max')]
+    rules = {col: 'sum' for col in merged}
+    rules.update({measure_column(measure, 'mean'): 'first' for measure in DRIVER_MEASURES})
+    rules.update({measure_column(measure, 'min'): 'min' for measure in DRIVER_MEASURES})
+    rules.update({measure_column(measure, 'max'): 'max' for measure in DRIVER_MEASURES})
+    result = pd.DataFrame(merged).groupby(keys, observed = True).agg(rules).sort_index()
+    return result.rename_axis(by)
+
+def merge_driver_stats(stats_list):
+    """ This function merges stores built from disjoint orders (e.g. chunks of the csv).
+
+        Input: List of stores
+        Output: Store
+    """
+    all_stats = pd.concat(stats_list, ignore_index = True)
+    all_stats = all_stats.astype({col: 'category' for col in STORE_KEYS})
+    return combine_driver_stats(all_stats, STORE_KEYS).reset_index()
+
+def update_driver_stats(stats, orders):
+    """ This function folds new orders into the store.
+
+        Input: Store, dataframe of the new orders
+        Output: Store
+    """
+    if not len(orders):
+        return stats
+    return merge_driver_stats([stats, build_driver_stats(orders)])
+
+def describe_driver_stats(stats, measure):
+    """ This function derives the statistics of a measure from the accumulators.
+
+        Input: Store or merged store, measure name
+        Output: Dataframe with the same index and count, sum, sumsq, mean, std (ddof = 1), min and max
+    """
+    count = stats[measure_column(measure, 'count')]
+    mean = stats[measure_column(measure, 'mean')]
+    m2 = stats[measure_column(measure, 'm2')]
+    return pd.DataFrame({'count': count,
+                         'sum': count * mean.fillna(0.0),
+                         'sumsq': m2 + count * mean.fillna(0.0) ** 2,
+                         'mean': mean.where(count > 0),
+                         'std': np.sqrt(m2 / (count - 1)).where(count > 1),
+                         'min': stats[measure_column(measure, 'min')],
+                         'max': stats[measure_column(measure, 'max')]})
+
+def store_orders(stats):
+    """ This function counts the orders folded into the store.
+
+        Input: Store
+        Output: Integer
+    """
+    return int(stats[measure_column('Time_taken(min)', 'count')].sum())
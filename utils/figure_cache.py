@@ -0,0 +1,114 @@
+""" Process wide LRU cache of the figures and tables built by the pages, shared by every session.
+
+    Entries are keyed by (dataset version, page, chart, normalized filters): the dataset version is
+    the content hash of the csv (utils.data.dataset_version), so a new dataset never serves old
+    figures, and the filters are normalized so equivalent selections (e.g. the same traffic options
+    in another order) share one entry. The least recently used entries are evicted once the
+    estimated size of the cache passes CURRY_FIGURE_CACHE_MB (256 by default).
+
+    Cached objects are shared between sessions and must not be modified by the pages.
+"""
+#Import Libraries
+import datetime
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.data import DATASET_PATH, dataset_version
+
+MAX_CACHE_BYTES = int(float(os.environ.get('CURRY_FIGURE_CACHE_MB', 256)) * 2 ** 20)
+
+#{key: (value, size in bytes)}, least recently used first
+_entries = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def normalize_filter(value):
+    """ This function turns one filter value into a hashable canonical form.
+
+        Input: Filter value (date, datetime, list of options, tuple of values, number, string, None)
+        Output: Hashable value
+    """
+    if isinstance(value, (list, set, frozenset)):
+        #Selected options: the order of selection does not change the result
+        return tuple(sorted((normalize_filter(item) for item in value), key = repr))
+    if isinstance(value, tuple):
+        return tuple(normalize_filter(item) for item in value)
+    if isinstance(value, (datetime.datetime, pd.Timestamp)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def estimate_size(value):
+    """ This function estimates the memory held by a cached value.
+
+        Input: Figure, rendered html, dataframe, tuple of those or any picklable value
+        Output: Size in bytes
+    """
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep = True)))
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    try:
+        return len(pickle.dumps(value, protocol = pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+def cached_figure(page, chart, filters, builder, path = DATASET_PATH):
+    """ This function returns the figure (or table) of a chart for a filter state, built by builder
+        only when no session of the process built it already for the current dataset.
+
+        Input: Page name, chart name, filter values (tuple), function without arguments building the
+               figure, path of the csv file
+        Output: Whatever builder returns
+    """
+    key = (dataset_version(path), page, chart, normalize_filter(tuple(filters)))
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+            _stats['hits'] += 1
+            return _entries[key][0]
+        _stats['misses'] += 1
+
+    #Built outside the lock, so a slow chart does not block the other sessions
+    value = builder()
+    size = estimate_size(value)
+    if size > MAX_CACHE_BYTES:
+        return value
+    with _lock:
+        if key not in _entries:
+            _entries[key] = (value, size)
+            _stats['bytes'] += size
+        while _stats['bytes'] > MAX_CACHE_BYTES:
+            _, (_, evicted) = _entries.popitem(last = False)
+            _stats['bytes'] -= evicted
+            _stats['evictions'] += 1
+    return value
+
+def figure_cache_stats():
+    """ This function returns the counters of the cache.
+
+        Output: Dictionary {'hits', 'misses', 'evictions', 'bytes', 'entries', 'max_bytes'}
+    """
+    with _lock:
+        return dict(_stats, entries = len(_entries), max_bytes = MAX_CACHE_BYTES)
+
+def clear_figure_cache():
+    """ This function empties the cache and resets its counters. """
+    with _lock:
+        _entries.clear()
+        _stats.update(hits = 0, misses = 0, evictions = 0, bytes = 0)
@@ -0,0 +1,93 @@
+""" Filter engine for the sidebar filters.
+
+    Built once per dataset (utils.data.load_derived), it keeps the row order sorted by Order_Date so
+    the date cutoff is a binary search, and one packed bitmap per value of each categorical filter,
+    so a selection of values is a few bitwise ORs / ANDs over n / 8 bytes. A filter returns a single
+    array of row positions that the pages turn into one dataframe, instead of one copy per filter.
+"""
+#Import Libraries
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+FILTER_DIMENSIONS = ['Road_traffic_density', 'Weatherconditions', 'City', 'Festival', 'Type_of_order']
+#Columns read by build_filter_index
+FILTER_INDEX_COLUMNS = ['Order_Date'] + FILTER_DIMENSIONS
+
+#order: row positions sorted by date (None when the dataset is already sorted)
+#dates: Order_Date in that order, bitmaps: {dimension: {value: packed bitmap in that order}}
+FilterIndex = namedtuple('FilterIndex', ['order', 'dates', 'bitmaps'])
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def build_filter_index(df):
+    """ This function builds the filter engine of a cleaned dataframe.
+
+        Input: Cleaned dataframe
+        Output: FilterIndex
+    """
+    dates = df['Order_Date'].to_numpy()
+    order = None
+    if not df['Order_Date'].is_monotonic_increasing:
+        order = np.argsort(dates, kind = 'stable')
+        dates = dates[order]
+
+    bitmaps = {}
+    for dimension in FILTER_DIMENSIONS:
+        codes, values = pd.factorize(df[dimension])
+        if order is not None:
+            codes = codes[order]
+        bitmaps[dimension] = {value: np.packbits(codes == code) for code, value in enumerate(values)}
+    return FilterIndex(order, dates, bitmaps)
+
+def value_bitmap(index, dimension, values, nbytes):
+    """ This function ORs the bitmaps of the selected values of a dimension.
+
+        Input: FilterIndex, dimension, selected values, number of bytes to combine
+        Output: Packed bitmap
+    """
+    selected = np.zeros(nbytes, dtype = np.uint8)
+    for value in values:
+        bitmap = index.bitmaps[dimension].get(value)
+        if bitmap is not None:
+            selected |= bitmap[:nbytes]
+    return selected
+
+def select_rows(index, date_max = None, **dimensions):
+    """ This function applies the sidebar filters.
+
+        Input: FilterIndex, dates strictly before date_max, and for any of FILTER_DIMENSIONS a list of
+               the values to keep, e.g. select_rows(index, date_max, Road_traffic_density = ['Low'])
+               (None keeps everything)
+        Output: Sorted array of row positions of the dataframe
+    """
+    stop = len(index.dates)
+    if date_max is not None:
+        stop = int(np.searchsorted(index.dates, np.datetime64(date_max, 'ns'), side = 'left'))
+
+    dimensions = {dimension: values for dimension, values in dimensions.items() if values is not None}
+    if dimensions:
+        nbytes = -(-stop // 8)
+        selected = np.full(nbytes, 0xFF, dtype = np.uint8)
+        for dimension, values in dimensions.items():
+            selected &= value_bitmap(index, dimension, values, nbytes)
+        rows = np.flatnonzero(np.unpackbits(selected, count = stop))
+    else:
+        rows = np.arange(stop)
+
+    if index.order is not None:
+        rows = np.sort(index.order[rows])
+    return rows
+
+def take_rows(df, rows, columns = None):
+    """ This function materializes the selected rows, once, and only for the columns in use.
+
+        Input: Dataframe, row positions (select_rows), optional list of columns
+        Output: Dataframe
+    """
+    if columns is not None:
+        df = df.loc[:, columns]
+    return df.take(rows)
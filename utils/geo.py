@@ -0,0 +1,22 @@
+""" Geographic helpers working on whole coordinate arrays. """
+#Import Libraries
+import numpy as np
+
+#Same mean earth radius as the haversine package
+EARTH_RADIUS_KM = 6371.0088
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def haversine_distance(lat1, lon1, lat2, lon2, dtype = np.float64):
+    """ This function calculates the great-circle distance between two arrays of points with the
+        Haversine formula, all lines at once.
+
+        Input: Latitudes and longitudes in degrees (arrays or Series of the same length),
+               dtype of the computation (np.float32 halves memory, np.float64 matches haversine())
+        Output: Numpy array of distances in km
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(values, dtype = dtype)) for values in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return (2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(a))
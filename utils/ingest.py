@@ -0,0 +1,255 @@
+""" Out-of-core ingestion of datasets larger than memory.
+
+    The csv is read in chunks of CHUNK_ROWS lines; each chunk is cleaned with the same rules as
+    clean_dataframe (utils.data.prepare_dataset), appended to a compact columnar store (Parquet,
+    one row group per chunk, dictionary encoded text) and folded into the cube (utils.cube), whose
+    aggregates are mergeable. Memory is bounded by the chunk size and the size of the cube, not
+    by the size of the csv.
+
+    There is one store per version of the csv (dataset/train.<content hash>.parquet). It is ingested
+    once, when the version is first loaded: by the background refresh (utils.refresh) or by the first
+    rerun that sees the version. The reads (load_store and the functions below) only open the store
+    of the version pinned to the session, so the line positions of a filter index always address the
+    store they were computed from. The stores of the last KEEP_STORES versions are kept, the older
+    ones are removed after an ingestion.
+
+    Build the store ahead of time with:
+        python -m utils.ingest dataset/train.csv --chunk-rows 1000000
+
+    The pages use it when CURRY_INGEST=chunked (see utils.data).
+"""
+#Import Libraries
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils import snapshot
+from utils.cube import CUBE_DIMENSIONS, CUBE_MEASURES, build_cube, merge_cubes
+from utils.data import cached, dataset_version, file_digest, prepare_dataset, read_dataset
+from utils.driver_stats import DRIVER_MEASURES, STORE_KEYS, build_driver_stats, update_driver_stats
+from utils.quantiles import SKETCH_DIMENSIONS, SKETCH_MEASURE, build_sketches, merge_sketches
+
+STORE_SUFFIX = '.parquet'
+#Stores kept per csv: the current version and the previous one, still read by the sessions in flight
+KEEP_STORES = 2
+CHUNK_ROWS = int(os.environ.get('CURRY_CHUNK_ROWS', 1000000))
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def store_path(csv_path, digest):
+    """ This function returns where the columnar store of a version of a csv is kept.
+
+        Input: Path of the csv file, content hash of the csv
+        Output: Path of the store (same name followed by the hash, .parquet extension)
+    """
+    return '%s.%s%s' % (os.path.splitext(csv_path)[0], digest, STORE_SUFFIX)
+
+def store_is_stale(csv_path, digest, path = None):
+    """ This function tells if the store is missing, written by another version of the cleaning
+        rules or from another content of the csv.
+
+        Input: Path of the csv file, content hash of the csv (utils.data.dataset_version), optional
+               path of the store
+        Output: Boolean
+    """
+    path = path or store_path(csv_path, digest)
+    if not os.path.exists(path):
+        return True
+    return snapshot.is_stale(pq.read_schema(path).metadata, digest)
+
+def iter_prepared_chunks(csv_path, chunk_rows = CHUNK_ROWS):
+    """ This function reads and prepares the csv one chunk at a time.
+
+        Input: Path of the csv file, lines per chunk
+        Output: Iterator of prepared dataframes (cleaned, with the derived columns)
+    """
+    with read_dataset(csv_path, chunksize = chunk_rows) as reader:
+        for chunk in reader:
+            yield prepare_dataset(chunk)
+
+def chunk_table(df, schema = None):
+    """ This function converts a prepared chunk to an Arrow table with plain string columns, so
+        every chunk has the same schema whatever categories it holds.
+
+        Input: Prepared dataframe, schema of the store (None for the first chunk)
+        Output: Arrow table
+    """
+    categories = [col for col in df.columns if hasattr(df[col], 'cat')]
+    df = df.astype({col: object for col in categories})
+    return pa.Table.from_pandas(df, schema = schema, preserve_index = False)
+
+def ingest_csv(csv_path, chunk_rows = CHUNK_ROWS, digest = None):
+    """ This function streams the csv into the columnar store and the cube, one chunk at a time.
+
+        Input: Path of the csv file, lines per chunk, content hash of the csv (None to hash the file)
+        Output: Cube of the whole dataset
+    """
+    digest = digest or file_digest(csv_path)
+    out = store_path(csv_path, digest)
+    tmp_path = out + '.tmp'
+    writer = None
+    cube = None
+    try:
+        for df in iter_prepared_chunks(csv_path, chunk_rows):
+            chunk_cube = build_cube(df)
+            cube = chunk_cube if cube is None else merge_cubes([cube, chunk_cube])
+            table = chunk_table(df, writer.schema if writer is not None else None)
+            if writer is None:
+                schema = table.schema.with_metadata({**table.schema.metadata,
+                                                     snapshot.VERSION_KEY: snapshot.SNAPSHOT_VERSION,
+                                                     snapshot.DIGEST_KEY: digest})
+                writer = pq.ParquetWriter(tmp_path, schema, use_dictionary = True)
+                table = table.replace_schema_metadata(schema.metadata)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, out)
+    remove_old_stores(csv_path)
+    return cube
+
+def remove_old_stores(csv_path, keep = KEEP_STORES):
+    """ This function removes the stores of a csv except the keep most recently written ones.
+
+        Input: Path of the csv file, number of stores to keep
+    """
+    base = os.path.splitext(csv_path)[0]
+    name = re.compile(re.escape(os.path.basename(base)) + r'\.[0-9a-f]+' + re.escape(STORE_SUFFIX) + '$')
+    paths = [path for path in glob.glob(glob.escape(base) + '.*' + STORE_SUFFIX) if name.match(os.path.basename(path))]
+    for path in sorted(paths, key = os.path.getmtime, reverse = True)[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def ensure_store(csv_path, chunk_rows = CHUNK_ROWS):
+    """ This function returns the store of the current version of the csv, ingesting it first when
+        it does not exist yet.
+
+        Input: Path of the csv file, lines per chunk
+        Output: Path of the store
+    """
+    digest = dataset_version(csv_path)
+    path = store_path(csv_path, digest)
+    if store_is_stale(csv_path, digest, path):
+        ingest_csv(csv_path, chunk_rows, digest)
+    return path
+
+def load_store(csv_path):
+    """ This function returns the store of the version of the csv pinned to the session. It is
+        ingested once per version (by the background refresh when there is one), never by a read
+        of a version already loaded.
+
+        Input: Path of the csv file
+        Output: Path of the store
+    """
+    return cached(csv_path, 'ingested store', lambda: ensure_store(csv_path))
+
+def cube_from_store(path, batch_rows = CHUNK_ROWS):
+    """ This function rebuilds the cube from an existing store, one batch at a time.
+
+        Input: Path of the store, lines per batch
+        Output: Cube
+    """
+    columns = CUBE_DIMENSIONS + CUBE_MEASURES + ['Delivery_person_ID']
+    cube = None
+    for batch in pq.ParquetFile(path).iter_batches(batch_size = batch_rows, columns = columns):
+        batch_cube = build_cube(batch.to_pandas())
+        cube = batch_cube if cube is None else merge_cubes([cube, batch_cube])
+    return cube
+
+def load_ingested_cube(csv_path, chunk_rows = CHUNK_ROWS):
+    """ This function returns the cube of the version of the csv pinned to the session, folded
+        from its store.
+
+        Input: Path of the csv file, lines per chunk
+        Output: Cube
+    """
+    return cube_from_store(load_store(csv_path), chunk_rows)
+
+def sketches_from_store(csv_path, batch_rows = CHUNK_ROWS):
+    """ This function builds the quantile sketches (utils.quantiles) one batch of the store at a
+        time.
+
+        Input: Path of the csv file, lines per batch
+        Output: Sketches
+    """
+    columns = SKETCH_DIMENSIONS + [SKETCH_MEASURE]
+    batches = pq.ParquetFile(load_store(csv_path)).iter_batches(batch_size = batch_rows, columns = columns)
+    return merge_sketches([build_sketches(batch.to_pandas()) for batch in batches])
+
+def driver_stats_from_store(csv_path, batch_rows = CHUNK_ROWS):
+    """ This function folds the store into the per-driver statistics (utils.driver_stats) one batch
+        at a time.
+
+        Input: Path of the csv file, lines per batch
+        Output: Dataframe
+    """
+    stats = None
+    for batch in pq.ParquetFile(load_store(csv_path)).iter_batches(batch_size = batch_rows, columns = STORE_KEYS + DRIVER_MEASURES):
+        orders = batch.to_pandas()
+        stats = build_driver_stats(orders) if stats is None else update_driver_stats(stats, orders)
+    return stats
+
+def read_store(csv_path, columns = None):
+    """ This function reads the prepared dataset from the store, only for the requested columns,
+        with text columns as categories.
+
+        Input: Path of the csv file, optional list of columns
+        Output: Dataframe
+    """
+    path = load_store(csv_path)
+    schema = pq.read_schema(path)
+    names = columns or schema.names
+    text = [name for name in names if name in snapshot.SNAPSHOT_CATEGORIES]
+    return pq.read_table(path, columns = columns, read_dictionary = text).to_pandas()
+
+def read_store_rows(csv_path, rows, columns, batch_rows = CHUNK_ROWS):
+    """ This function reads some lines of the store, one batch at a time, so only a batch and the
+        selected lines are held.
+
+        Input: Path of the csv file, sorted line positions (utils.filters.select_rows of the same
+               version, None for every line), list of columns, lines per batch
+        Output: Dataframe indexed by the line positions, text columns as categories
+    """
+    path = load_store(csv_path)
+    text = [name for name in columns if name in snapshot.SNAPSHOT_CATEGORIES]
+    store = pq.ParquetFile(path, read_dictionary = text)
+    batches, start = [], 0
+    for batch in store.iter_batches(batch_size = batch_rows, columns = columns):
+        stop = start + batch.num_rows
+        if rows is None:
+            batches.append(batch)
+        else:
+            low, high = np.searchsorted(rows, [start, stop])
+            batches.append(batch.take(pa.array(rows[low:high] - start)))
+        start = stop
+    if not batches:
+        return read_store(csv_path, columns = columns).iloc[:0]
+    df = pa.Table.from_batches(batches).unify_dictionaries().to_pandas()
+    if rows is not None:
+        df.index = pd.Index(rows, dtype = np.int64)
+    return df
+
+def main():
+    import argparse
+
+    from utils.data import DATASET_PATH
+
+    parser = argparse.ArgumentParser(description = 'Stream the csv into the columnar store, chunk by chunk.')
+    parser.add_argument('path', nargs = '?', default = DATASET_PATH, help = 'raw csv in the train.csv format')
+    parser.add_argument('--chunk-rows', type = int, default = CHUNK_ROWS, help = 'lines per chunk')
+    args = parser.parse_args()
+    digest = file_digest(args.path)
+    cube = ingest_csv(args.path, args.chunk_rows, digest)
+    print('%s: %d orders, %d cube cells' % (store_path(args.path, digest), cube.cells['orders'].sum(), len(cube.cells)))
+
+if __name__ == '__main__':
+    main()
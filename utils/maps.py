@@ -0,0 +1,103 @@
+""" Geographic layers for the delivery locations that stay responsive with millions of points.
+
+    The browser never receives more than MAX_MAP_POINTS coordinates: the heatmap is fed with grid
+    bins (cell centers weighted by the number of deliveries), and the clustered markers with a
+    uniform sample of the deliveries, clustered client-side by Leaflet.
+"""
+#Import Libraries
+#folium is imported by delivery_map, so the pages only load it when a map is built
+import numpy as np
+
+MAX_MAP_POINTS = 50000
+#Size of the smallest grid cell, in degrees (about 1 km)
+GRID_CELL_DEGREES = 0.01
+MAP_LAYERS = ['Medians', 'Heatmap', 'Clusters']
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def bin_coordinates(lat, lon, max_points = MAX_MAP_POINTS, cell = GRID_CELL_DEGREES):
+    """ This function pre-bins coordinates into a regular grid, doubling the cell size until there
+        are at most max_points non-empty cells.
+
+        Input: Arrays of latitudes and longitudes, maximum number of cells, smallest cell size in degrees
+        Output: Arrays (latitude of the cell centers, longitude of the cell centers, deliveries per cell)
+    """
+    lat = np.asarray(lat, dtype = np.float64)
+    lon = np.asarray(lon, dtype = np.float64)
+    while True:
+        rows = np.floor((lat + 90) / cell).astype(np.int64)
+        cols = np.floor((lon + 180) / cell).astype(np.int64)
+        keys, counts = np.unique(rows * int(np.ceil(360 / cell) + 1) + cols, return_counts = True)
+        if len(keys) <= max_points:
+            break
+        cell *= 2
+    rows, cols = np.divmod(keys, int(np.ceil(360 / cell) + 1))
+    return (rows + 0.5) * cell - 90, (cols + 0.5) * cell - 180, counts
+
+def sample_coordinates(lat, lon, max_points = MAX_MAP_POINTS, seed = 0):
+    """ This function keeps at most max_points coordinates, chosen uniformly at random.
+
+        Input: Arrays of latitudes and longitudes, maximum number of points, random seed
+        Output: Arrays (latitudes, longitudes)
+    """
+    lat = np.asarray(lat)
+    lon = np.asarray(lon)
+    if len(lat) > max_points:
+        selected = np.random.default_rng(seed).choice(len(lat), size = max_points, replace = False)
+        selected.sort()
+        lat, lon = lat[selected], lon[selected]
+    return lat, lon
+
+def delivery_map(df, layer = 'Medians', max_points = MAX_MAP_POINTS):
+    """ This function builds the folium map of the delivery locations.
+
+        Layers
+        1. Medians: one marker per city and road traffic density (median location)
+        2. Heatmap: density of every delivery, from grid bins
+        3. Clusters: clustered markers of a sample of max_points deliveries
+
+        Input: Dataframe, layer (one of MAP_LAYERS), point budget of the layer
+        Output: folium Map
+    """
+    import folium as fl
+    from folium.plugins import FastMarkerCluster, HeatMap
+
+    #Coordinates are stored as float32 (utils.data), which the JSON of the map cannot serialize
+    lat = df['Delivery_location_latitude'].to_numpy(np.float64)
+    lon = df['Delivery_location_longitude'].to_numpy(np.float64)
+    map = fl.Map()
+    if len(lat) == 0:
+        return map
+
+    if layer == 'Medians':
+        df_aux = (df.loc[:, ["City","Road_traffic_density", "Delivery_location_latitude", "Delivery_location_longitude"]]
+                    .groupby(["City","Road_traffic_density"], observed = True)
+                    .median())
+        for location in zip(df_aux['Delivery_location_latitude'], df_aux['Delivery_location_longitude']):
+            fl.Marker(location).add_to(map)
+        return map
+
+    if layer == 'Heatmap':
+        bin_lat, bin_lon, counts = bin_coordinates(lat, lon, max_points)
+        HeatMap(np.column_stack([bin_lat, bin_lon, counts / counts.max()]).tolist(), radius = 12, blur = 10).add_to(map)
+    elif layer == 'Clusters':
+        sample_lat, sample_lon = sample_coordinates(lat, lon, max_points)
+        FastMarkerCluster(np.column_stack([sample_lat, sample_lon]).tolist()).add_to(map)
+    else:
+        raise ValueError('layer must be one of %s, got %r' % (MAP_LAYERS, layer))
+    map.fit_bounds([[float(np.nanmin(lat)), float(np.nanmin(lon))], [float(np.nanmax(lat)), float(np.nanmax(lon))]])
+    return map
+
+def map_html(map):
+    """ This function renders a map to the html page the browser receives (as
+        streamlit_folium.folium_static does), so the page can cache and share a string instead of
+        a mutable folium Map.
+
+        Input: folium Map
+        Output: String
+    """
+    import folium
+
+    return folium.Figure().add_child(map).render()
@@ -0,0 +1,168 @@
+""" Parallel aggregation engine: the cleaned dataframe is cut into contiguous partitions (date ranges,
+    the frame being sorted by Order_Date), a pool of worker processes computes partial aggregates of
+    each partition (count / sum / sum of squares / min / max of the measures, distinct sets) and the
+    partials are merged exactly, with the same rules as the cube (utils.cube.merge_rule).
+
+    The pool is for offline work (the batch reports of utils.report, scripts): the functions run in
+    the calling process unless they are given workers, and the pages never pass any. Inside the
+    Streamlit server a pool could not be forked (the server runs many threads, and forking a
+    multi-threaded process can deadlock), and spawned workers would start a new interpreter on
+    every cache miss.
+
+    Workers are forked with the frame already in memory when the calling process runs a single
+    thread, so only the bounds of each partition are sent to them. Otherwise they are spawned and
+    each one receives its own partition, and only the columns the aggregation reads. Frames under
+    MIN_PARTITION_ROWS lines per worker are aggregated in the calling process, where starting a pool
+    would cost more than it saves. CURRY_WORKERS sets the number of processes of the offline tools
+    (OFFLINE_WORKERS, every core by default).
+"""
+#Import Libraries
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from utils.cube import CUBE_DIMENSIONS, CUBE_MEASURES, build_cube, measure_column, measure_values, merge_cubes, merge_rule
+
+OFFLINE_WORKERS = int(os.environ.get('CURRY_WORKERS', os.cpu_count() or 1))
+MIN_PARTITION_ROWS = int(os.environ.get('CURRY_PARTITION_ROWS', 250000))
+
+#Data shared with the workers of shared_pool (e.g. the frame being aggregated), set by the pool initializer
+_shared = None
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def partition_bounds(rows, parts):
+    """ This function cuts `rows` lines into `parts` contiguous partitions of about the same size.
+
+        Input: Number of lines, number of partitions
+        Output: List of (start, stop) tuples
+    """
+    edges = np.linspace(0, rows, parts + 1).astype(int)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+def _set_shared(data):
+    global _shared
+    _shared = data
+
+def shared_data():
+    """ This function returns, inside a worker of shared_pool, the data given to the pool.
+
+        Output: Shared data
+    """
+    return _shared
+
+def can_fork():
+    """ This function tells if a pool can be forked: the platform allows it and the calling process
+        runs a single thread.
+
+        Output: Boolean
+    """
+    return threading.active_count() == 1 and 'fork' in multiprocessing.get_all_start_methods()
+
+def shared_pool(workers, data):
+    """ This function starts a process pool whose workers see `data` through shared_data(). Workers
+        are forked when can_fork(), so the data is shared copy-on-write instead of pickled to each of
+        them; otherwise they are spawned and every worker receives a copy.
+
+        Input: Number of processes, data to share
+        Output: ProcessPoolExecutor (to be used as a context manager)
+    """
+    method = 'fork' if can_fork() else 'spawn'
+    return ProcessPoolExecutor(workers, mp_context = multiprocessing.get_context(method),
+                               initializer = _set_shared, initargs = (data,))
+
+def _run_partition(func, bounds):
+    start, stop = bounds
+    return func(_shared.iloc[start:stop])
+
+def map_partitions(func, df, workers = 1, columns = None):
+    """ This function applies func to contiguous partitions of the dataframe in a process pool.
+
+        Input: Picklable function of a dataframe (module level or functools.partial), dataframe,
+               number of processes (1 runs func in the calling process), columns read by func (None
+               for every column)
+        Output: List with the result of each partition, in order
+    """
+    parts = max(1, min(workers, len(df) // MIN_PARTITION_ROWS))
+    if parts == 1:
+        return [func(df)]
+
+    bounds = partition_bounds(len(df), parts)
+    if can_fork():
+        with shared_pool(parts, df) as pool:
+            return list(pool.map(partial(_run_partition, func), bounds))
+    #Spawned workers: each one is sent its partition only, for the columns in use
+    if columns is not None:
+        df = df.loc[:, list(columns)]
+    with ProcessPoolExecutor(parts, mp_context = multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(func, [df.iloc[start:stop] for start, stop in bounds]))
+
+def partial_aggregate(df, by, measures = (), distinct = None):
+    """ This function computes the additive aggregates of one partition.
+
+        Input: Dataframe, column or list of columns to group by, measure names, column whose
+               distinct values are counted (None for none)
+        Output: Tuple (dataframe indexed by `by` with 'orders' and the STATISTICS of each measure,
+                dataframe of the unique (`by`, distinct) pairs or None)
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    measures = list(measures)
+    values = measure_values(df, measures)
+    squares = (values.astype(np.float64) ** 2).add_suffix('_sq')
+    work = pd.concat([df.loc[:, by], values, squares], axis = 1)
+    aggregations = {'orders': (by[0], 'size')}
+    for measure in measures:
+        aggregations[measure_column(measure, 'count')] = (measure, 'count')
+        aggregations[measure_column(measure, 'sum')] = (measure, 'sum')
+        aggregations[measure_column(measure, 'sumsq')] = (measure + '_sq', 'sum')
+        aggregations[measure_column(measure, 'min')] = (measure, 'min')
+        aggregations[measure_column(measure, 'max')] = (measure, 'max')
+    #sort = True keeps the categories of the dataset (sort = False reorders them by appearance)
+    totals = work.groupby(by, observed = True, sort = True).agg(**aggregations)
+
+    pairs = None if distinct is None else df.loc[:, by + [distinct]].drop_duplicates()
+    return totals, pairs
+
+def merge_partials(partials, distinct = None):
+    """ This function merges the partial aggregates of disjoint partitions.
+
+        Input: List of partial_aggregate results, distinct column name (None for none)
+        Output: Dataframe indexed and sorted by the group columns, with 'orders', the STATISTICS of
+                each measure and '<distinct>_distinct' when asked
+    """
+    totals = pd.concat([part[0] for part in partials])
+    by = list(totals.index.names)
+    totals = totals.groupby(level = by, observed = True).agg({col: merge_rule(col) for col in totals.columns})
+    if distinct is not None:
+        pairs = pd.concat([part[1] for part in partials], ignore_index = True).drop_duplicates()
+        totals[distinct + '_distinct'] = pairs.groupby(by, observed = True)[distinct].size()
+    return totals.sort_index()
+
+def aggregate(df, by, measures = (), distinct = None, workers = 1):
+    """ This function aggregates the dataframe by `by`, by partitions when given workers. Mean and
+        standard deviation of a measure come from utils.cube.describe(result, measure).
+
+        Input: Dataframe, column or list of columns to group by, measure names, column whose distinct
+               values are counted (None for none), number of processes (1 for the calling process)
+        Output: Dataframe (see merge_partials)
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    func = partial(partial_aggregate, by = by, measures = tuple(measures), distinct = distinct)
+    columns = by + list(measures) + ([] if distinct is None else [distinct])
+    return merge_partials(map_partitions(func, df, workers, columns), distinct)
+
+def build_cube_parallel(df, workers = OFFLINE_WORKERS):
+    """ This function builds the cube of utils.cube with one build_cube per partition, merged with
+        merge_cubes.
+
+        Input: Cleaned dataframe, number of processes
+        Output: Cube
+    """
+    return merge_cubes(map_partitions(build_cube, df, workers, CUBE_DIMENSIONS + CUBE_MEASURES + ['Delivery_person_ID']))
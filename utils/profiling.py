@@ -0,0 +1,155 @@
+""" Opt-in instrumentation of the pages.
+
+    Enabled with the environment variable CURRY_PROFILE=1 or the query parameter ?profile=1.
+    Every stage (loading, filtering, each chart builder, each layout block) is timed and its memory
+    delta traced; the breakdown of the rerun is shown in a collapsible sidebar section and, when
+    CURRY_PROFILE_LOG is set to a file path, appended to that file as one JSON line per rerun.
+    When disabled, the profiler returns the functions unchanged and the stages are no-ops.
+    Memory tracing slows down every thread of the process, so it only runs while a profiled rerun
+    is in progress (it is stopped when the last one reports, unless it was started elsewhere).
+"""
+#Import Libraries
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+
+import pandas as pd
+import streamlit as st
+
+from utils.figure_cache import figure_cache_stats
+from utils.shared import session_memory_stats
+
+PROFILE_ENV = 'CURRY_PROFILE'
+PROFILE_LOG_ENV = 'CURRY_PROFILE_LOG'
+PROFILE_QUERY_PARAM = 'profile'
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+#Profiled reruns in progress, and whether the profiler started the memory tracing
+_tracing = {'reruns': 0, 'started': False}
+_tracing_lock = threading.Lock()
+
+#===========================================================================================#
+#                                       Classes                                             #
+#===========================================================================================#
+
+class Profiler:
+    """ Collects the timings and memory deltas of the stages of one rerun of a page. """
+
+    def __init__(self, page, enabled):
+        self.page = page
+        self.enabled = enabled
+        self.records = []
+        self.depth = 0
+        self.start = time.perf_counter()
+        self.tracing = None
+        if enabled:
+            start_tracing()
+            #Also stops the tracing when a rerun is interrupted before its report (e.g. by a new rerun)
+            self.tracing = weakref.finalize(self, stop_tracing)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """ Times the block of code of a stage. """
+        if not self.enabled:
+            yield
+            return
+        record = {'stage': name, 'depth': self.depth}
+        self.records.append(record)
+        self.depth += 1
+        memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            record['memory_delta'] = tracemalloc.get_traced_memory()[0] - memory
+            self.depth -= 1
+
+    def timed(self, func, name = None):
+        """ Returns func timed as a stage named after it (func itself when profiling is disabled). """
+        if not self.enabled:
+            return func
+        name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def stop(self):
+        """ Ends the memory tracing of this rerun (called by report, safe to call again). """
+        if self.tracing is not None:
+            self.tracing()
+
+    def report(self):
+        """ Shows the breakdown of the rerun in the sidebar and appends it to the log file. """
+        if not self.enabled:
+            return
+        self.stop()
+        total = time.perf_counter() - self.start
+        df_aux = pd.DataFrame(self.records, columns = ['stage', 'depth', 'seconds', 'memory_delta'])
+        df_aux['stage'] = ['  ' * depth + stage for stage, depth in zip(df_aux['stage'], df_aux['depth'])]
+        df_aux['memory_delta (MB)'] = (df_aux['memory_delta'] / 2 ** 20).round(2)
+        df_aux['seconds'] = df_aux['seconds'].round(4)
+        with st.sidebar.expander('Profiling: %.3f s' % total, expanded = False):
+            st.dataframe(df_aux.loc[:, ['stage', 'seconds', 'memory_delta (MB)']])
+            cache = figure_cache_stats()
+            st.caption('Figure cache: %d hits, %d misses, %d entries, %.1f MB' %
+                       (cache['hits'], cache['misses'], cache['entries'], cache['bytes'] / 2 ** 20))
+            sessions = session_memory_stats()
+            st.caption('Session memory: %.1f kB (%d sessions, %.1f kB in all; shared dataset %.1f MB)' %
+                       (sessions['current'] / 2 ** 10, sessions['sessions'], sessions['bytes'] / 2 ** 10,
+                        sessions['shared'] / 2 ** 20))
+
+        log_path = os.environ.get(PROFILE_LOG_ENV)
+        if log_path:
+            line = {'page': self.page, 'timestamp': time.time(), 'total_seconds': total, 'stages': self.records,
+                    'figure_cache': figure_cache_stats(), 'session_memory': session_memory_stats()}
+            with open(log_path, 'a') as file:
+                file.write(json.dumps(line) + '\n')
+        return
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def start_tracing():
+    """ This function starts the memory tracing for a profiled rerun, if it is not running yet. """
+    with _tracing_lock:
+        if _tracing['reruns'] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing['started'] = True
+        _tracing['reruns'] += 1
+
+def stop_tracing():
+    """ This function stops the memory tracing after the last profiled rerun in progress, unless it
+        was started by something other than the profiler. """
+    with _tracing_lock:
+        _tracing['reruns'] -= 1
+        if _tracing['reruns'] == 0 and _tracing['started']:
+            tracemalloc.stop()
+            _tracing['started'] = False
+
+def profiling_enabled():
+    """ This function tells if profiling was requested for this rerun.
+
+        Output: Boolean
+    """
+    if os.environ.get(PROFILE_ENV, '').lower() in TRUE_VALUES:
+        return True
+    values = st.experimental_get_query_params().get(PROFILE_QUERY_PARAM, [])
+    return any(value.lower() in TRUE_VALUES for value in values)
+
+def start_profiler(page):
+    """ This function starts the profiler of a rerun.
+
+        Input: Page name
+        Output: Profiler (a disabled one unless profiling was requested)
+    """
+    return Profiler(page, profiling_enabled())
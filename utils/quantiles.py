@@ -0,0 +1,135 @@
+""" Mergeable quantile sketches of the delivery time, kept per (day, city, traffic, weather, festival).
+
+    Each sketch is a histogram of Time_taken(min) over fixed bins of BIN_WIDTH minutes: sketches
+    of disjoint data merge by adding their counts, so the percentiles of any filter combination
+    come from summing the sketches of the selected cells instead of sorting the lines. With the
+    default width of one minute and integer minutes the percentiles are exact; a wider bin bounds
+    the error by the bin width and the memory by (max - min) / BIN_WIDTH counters per cell.
+
+    Percentiles follow the inverted cumulative distribution: pXX is the smallest value with at
+    least XX % of the orders at or under it (numpy's method = 'inverted_cdf').
+"""
+#Import Libraries
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from utils.cube import measure_values
+
+SKETCH_MEASURE = 'Time_taken(min)'
+SKETCH_DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density', 'Weatherconditions', 'Festival']
+BIN_WIDTH = 1
+PERCENTILES = [50, 90, 99]
+
+#cells: one line per combination of SKETCH_DIMENSIONS; counts: array (cells x bins) of orders per bin,
+#bin i holding the values in [low + i * width, low + (i + 1) * width)
+Sketches = namedtuple('Sketches', ['cells', 'counts', 'low', 'width'])
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def histogram_sketches(dimensions, values, weights, width = BIN_WIDTH):
+    """ This function counts the values of each cell in the bins of the sketches.
+
+        Input: Dataframe of the SKETCH_DIMENSIONS of each value, array of values, array of the number
+               of orders of each value, width of the bins
+        Output: Sketches
+    """
+    values = np.asarray(values, dtype = np.float64)
+    weights = np.asarray(weights, dtype = np.int64)
+    valid = ~np.isnan(values)
+    values, weights = values[valid], weights[valid]
+    low = values.min() if len(values) else 0
+    bins = ((values - low) // width).astype(np.int64)
+
+    grouped = (dimensions.loc[valid, SKETCH_DIMENSIONS].assign(orders = weights)
+                         .groupby(SKETCH_DIMENSIONS, observed = True, sort = True))
+    cell = grouped.ngroup().to_numpy()
+    cells = grouped['orders'].sum().reset_index()
+    counts = np.zeros((len(cells), int(bins.max()) + 1 if len(bins) else 0), dtype = np.int64)
+    np.add.at(counts, (cell, bins), weights)
+    return Sketches(cells, counts, low, width)
+
+def build_sketches(df, width = BIN_WIDTH):
+    """ This function builds the sketch of every cell of the cleaned dataframe.
+
+        Input: Cleaned dataframe, width of the bins (in minutes)
+        Output: Sketches
+    """
+    values = measure_values(df, [SKETCH_MEASURE])[SKETCH_MEASURE].to_numpy()
+    return histogram_sketches(df, values, np.ones(len(df), dtype = np.int64), width)
+
+def filter_sketches(sketches, date_max = None, traffic = None, weather = None):
+    """ This function applies the sidebar filters to the cells of the sketches.
+
+        Input: Sketches, dates strictly before date_max, lists of traffic densities and weather
+               conditions (None keeps everything)
+        Output: Sketches of the selected cells
+    """
+    cells = sketches.cells
+    linhas_selecionadas = np.ones(len(cells), dtype = bool)
+    if date_max is not None:
+        linhas_selecionadas &= (cells['Order_Date'] < date_max).to_numpy()
+    if traffic is not None:
+        linhas_selecionadas &= cells['Road_traffic_density'].isin(traffic).to_numpy()
+    if weather is not None:
+        linhas_selecionadas &= cells['Weatherconditions'].isin(weather).to_numpy()
+    return sketches._replace(cells = cells.loc[linhas_selecionadas, :].reset_index(drop = True),
+                             counts = sketches.counts[linhas_selecionadas])
+
+def merge_sketches(sketches_list):
+    """ This function merges sketches built from disjoint parts of the data (e.g. chunks of the csv),
+        aligning their bins.
+
+        Input: List of Sketches with the same bin width
+        Output: Sketches
+    """
+    sketches_list = [sketches for sketches in sketches_list if len(sketches.cells)]
+    if not sketches_list:
+        raise ValueError('merge_sketches needs at least one non-empty sketch')
+    width = sketches_list[0].width
+    low = min(sketches.low for sketches in sketches_list)
+    bins = max(int((sketches.low - low) // width) + sketches.counts.shape[1] for sketches in sketches_list)
+
+    #Stack every cell on the common bins, then add the cells with the same dimensions
+    aligned = []
+    for sketches in sketches_list:
+        shift = int((sketches.low - low) // width)
+        counts = np.zeros((len(sketches.cells), bins), dtype = np.int64)
+        counts[:, shift:shift + sketches.counts.shape[1]] = sketches.counts
+        aligned.append(counts)
+    all_cells = pd.concat([sketches.cells for sketches in sketches_list], ignore_index = True)
+    all_cells = all_cells.astype({dimension: 'category' for dimension in SKETCH_DIMENSIONS if dimension != 'Order_Date'})
+    grouped = all_cells.groupby(SKETCH_DIMENSIONS, observed = True, sort = True)
+    cell = grouped.ngroup().to_numpy()
+    counts = np.zeros((grouped.ngroups, bins), dtype = np.int64)
+    np.add.at(counts, cell, np.concatenate(aligned))
+    return Sketches(grouped['orders'].sum().reset_index(), counts, low, width)
+
+def sketch_percentiles(sketches, by = None, percentiles = PERCENTILES):
+    """ This function merges the selected sketches by the `by` dimensions and reads their percentiles.
+
+        Input: Sketches, dimension or list of dimensions (None for the whole selection), percentiles
+        Output: Dataframe indexed by `by` with orders and one column per percentile ('p50', ...)
+    """
+    if by is None:
+        counts = sketches.counts.sum(axis = 0, keepdims = True)
+        index = pd.Index(['Total'])
+    else:
+        grouped = sketches.cells.groupby(by, observed = True, sort = True)
+        group = grouped.ngroup().to_numpy()
+        counts = np.zeros((grouped.ngroups, sketches.counts.shape[1]), dtype = np.int64)
+        np.add.at(counts, group, sketches.counts)
+        index = grouped.size().index
+
+    cumulative = counts.cumsum(axis = 1)
+    total = cumulative[:, -1] if cumulative.shape[1] else np.zeros(len(counts), dtype = np.int64)
+    result = pd.DataFrame({'orders': total}, index = index)
+    for percentile in percentiles:
+        #First bin where the cumulative count reaches the rank of the percentile
+        rank = np.ceil(total * percentile / 100).clip(min = 1)
+        position = (cumulative < rank[:, None]).sum(axis = 1)
+        result['p%g' % percentile] = np.where(total > 0, sketches.low + position * sketches.width, np.nan)
+    return result.sort_index()
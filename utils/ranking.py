@@ -0,0 +1,59 @@
+""" Per-city ranking of delivery persons. """
+#Import Libraries
+import numpy as np
+import pandas as pd
+
+#Aggregation of each delivery person's values used to rank them
+RANKING_METRICS = ['min', 'max', 'mean', 'p95']
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def rank_drivers(df, n = 10, metric = 'min', largest = False, value = 'Time_taken(min)', by = 'City'):
+    """ This function ranks the delivery persons of every city present in the dataframe.
+
+        Each delivery person is aggregated once (metric of `value`), then only the n best lines of each
+        city are selected (nsmallest / nlargest, a partial selection instead of a full sort).
+
+        Input: Dataframe, number of delivery persons per city, metric (one of RANKING_METRICS),
+               largest = True for the n highest values, column to rank by, column to group by
+        Output: Dataframe [by, 'Delivery_person_ID', value], n lines per city at most
+    """
+    if metric not in RANKING_METRICS:
+        raise ValueError('metric must be one of %s, got %r' % (RANKING_METRICS, metric))
+    grouped = df.loc[:, [by, 'Delivery_person_ID', value]].groupby([by, 'Delivery_person_ID'], observed = True)[value]
+    if metric == 'p95':
+        stats = grouped.quantile(0.95)
+    else:
+        stats = grouped.agg(metric)
+
+    return top_per_group(stats, n, largest, by)
+
+def driver_ids(stats):
+    """ This function returns the delivery person ids of per-driver values, as text (so they sort the
+        same whatever the categories of the column).
+
+        Input: Series indexed by [..., 'Delivery_person_ID']
+        Output: numpy array of strings
+    """
+    return stats.index.get_level_values('Delivery_person_ID').astype(str).to_numpy()
+
+def top_per_group(stats, n = 10, largest = False, by = 'City'):
+    """ This function keeps the n lowest (or highest) values of every `by` group of per-driver values.
+        Ties are broken by delivery person id, whatever the order of the lines (order of appearance
+        in the orders, or of the per-driver statistics store).
+
+        Input: Series indexed by [by, 'Delivery_person_ID'], number of lines per group, largest = True
+               for the n highest values, level to group by
+        Output: Dataframe [by, 'Delivery_person_ID', value], n lines per group at most
+    """
+    frames = {}
+    for city, city_stats in stats.groupby(level = by, observed = True):
+        #keep = 'all' also keeps every line tied with the n-th value; only those are sorted, by value then id
+        kept = city_stats.nlargest(n, keep = 'all') if largest else city_stats.nsmallest(n, keep = 'all')
+        values = kept.to_numpy()
+        frames[city] = kept.iloc[np.lexsort((driver_ids(kept), -values if largest else values))].head(n)
+    if not frames:
+        return pd.DataFrame(columns = [by, 'Delivery_person_ID', stats.name])
+    return pd.concat([frames[city] for city in sorted(frames)]).reset_index()
@@ -0,0 +1,93 @@
+""" Background refresh of the dataset. A daemon thread polls the csv; when a new export replaces it
+    (and stops changing for one interval), the thread builds the new version of every cached value
+    (cleaned dataset, cube, filter index, ...) off the request path, then swaps the new entry into
+    the cache of utils.data in one assignment.
+
+    Reruns never reload the file themselves: they pin the version current when they start
+    (utils.data.pin_dataset), so a session in flight finishes on the old version and the next rerun
+    sees the new one. The interval is CURRY_REFRESH_SECONDS (30 by default).
+"""
+#Import Libraries
+import logging
+import os
+import threading
+import time
+
+from utils import data
+from utils.data import DATASET_PATH
+
+REFRESH_SECONDS = float(os.environ.get('CURRY_REFRESH_SECONDS', 30))
+
+#{absolute path: refresher thread}
+_threads = {}
+_threads_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def refresh_dataset(path = DATASET_PATH):
+    """ This function builds the new version of the dataset when the content of the file changed,
+        then swaps it in. The values cached for the current version are built again with the same
+        factories, in this thread, before anyone can see the new version.
+
+        Input: Path of the csv file
+        Output: True when a new version was swapped in
+    """
+    path = os.path.abspath(path)
+    current = data.current_entry(path)
+    if current is None:
+        #Nothing loaded yet, the first rerun builds it
+        return False
+    signature = data.file_signature(path)
+    if signature == current['signature']:
+        return False
+    digest = data.file_digest(path)
+    if digest == current['digest']:
+        data.swap_entry(path, dict(current, signature = signature))
+        return False
+
+    entry = data.new_entry(signature, digest, current['factories'])
+    data.pin_dataset(path, entry)
+    try:
+        for key, factory in list(entry['factories'].items()):
+            data.cached(path, key, factory)
+    finally:
+        data.unpin_dataset(path)
+    data.swap_entry(path, entry)
+    logger.info('%s: new version %s swapped in', path, digest)
+    return True
+
+def _refresh_loop(path, interval):
+    last_seen = failed = None
+    while True:
+        time.sleep(interval)
+        try:
+            signature = data.file_signature(path)
+            #Wait for the signature to settle, so a file still being written is not loaded, and do
+            #not retry a file that already failed
+            if signature == last_seen and signature != failed:
+                refresh_dataset(path)
+            last_seen = signature
+        except Exception:
+            failed = last_seen
+            logger.exception('%s: refresh failed, keeping the current version', path)
+
+def start_refresher(path = DATASET_PATH, interval = REFRESH_SECONDS):
+    """ This function starts the background refresh of a dataset, once per process.
+
+        Input: Path of the csv file, seconds between two checks of the file
+        Output: Thread
+    """
+    path = os.path.abspath(path)
+    with _threads_lock:
+        thread = _threads.get(path)
+        if thread is None or not thread.is_alive():
+            data.defer_reloads(path)
+            thread = threading.Thread(target = _refresh_loop, args = (path, interval),
+                                      name = 'curry-refresh', daemon = True)
+            thread.start()
+            _threads[path] = thread
+    return thread
@@ -0,0 +1,232 @@
+""" Headless batch renderer of the three views: the chart functions of the pages (utils.*_view and
+    the cube roll-ups) are rendered to HTML and/or JSON files for a grid of filter states, without
+    Streamlit.
+
+    The dataset, the cube and the filter index are loaded once; the filter states are fanned out to
+    a pool of worker processes sharing them (utils.parallel.shared_pool).
+
+    Usage (from the repository root):
+        python -m utils.report --out reports --every week --traffic each --workers 8
+
+    Files are written to <out>/<view>/<filter state>/<chart>.<html|json>, with a manifest.json
+    listing every filter state and its files. A filter state whose charts fail is logged and listed
+    in the manifest with its error; the other states are still rendered.
+"""
+#Import Libraries
+import argparse
+import json
+import logging
+import os
+import sys
+from collections import namedtuple
+
+import pandas as pd
+
+from utils.company_view import (country_map, order_by_week, order_metric, order_share_by_week,
+                                traffic_order_city, traffic_order_share)
+from utils.cube import filter_cube, rollup
+from utils.data import DATASET_PATH, load_cube, load_dataset, load_derived
+from utils.delivery_view import avg_ratings_per_driver, bot_delivers, top_delivers
+from utils.filters import FILTER_INDEX_COLUMNS, build_filter_index, select_rows, take_rows
+from utils.parallel import OFFLINE_WORKERS, shared_data, shared_pool
+from utils.restaurant_view import avg_std_graph, avg_std_time_on_traffic, calc_distance
+from utils.rollups import ROLLUP_COLUMNS, build_calendar_rollups, select_weeks
+
+REPORT_FORMATS = ['html', 'json']
+#Columns of the lines read by the charts of every view
+ROW_COLUMNS = ['ID', 'Order_Date', 'Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings', 'City',
+               'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude', 'Time_taken(min)']
+
+#Dates strictly before date_max; tuples of traffic densities and weather conditions (None keeps everything)
+FilterState = namedtuple('FilterState', ['date_max', 'traffic', 'weather'])
+#Lines, cube cells and weekly totals of one filter state
+Selection = namedtuple('Selection', ['rows', 'cube', 'weeks'])
+
+#Charts of each view, in the order of the page: (file name, function of the Selection)
+VIEWS = {
+    'company': [('orders_by_day', lambda data: order_metric(data.cube)),
+                ('traffic_order_share', lambda data: traffic_order_share(data.cube)),
+                ('traffic_order_city', lambda data: traffic_order_city(data.cube)),
+                ('orders_by_week', lambda data: order_by_week(data.weeks)),
+                ('orders_share_by_week', lambda data: order_share_by_week(data.weeks)),
+                ('country_map', lambda data: country_map(data.rows))],
+    'delivery': [('ratings_per_delivery_person', lambda data: avg_ratings_per_driver(data.rows)),
+                 ('ratings_per_traffic', lambda data: rollup(data.cube, 'Road_traffic_density', 'Delivery_person_Ratings')),
+                 ('ratings_per_weather', lambda data: rollup(data.cube, 'Weatherconditions', 'Delivery_person_Ratings')),
+                 ('fastest_delivery_drivers', lambda data: top_delivers(data.rows)),
+                 ('slowest_delivery_drivers', lambda data: bot_delivers(data.rows))],
+    'restaurant': [('time_per_city', lambda data: avg_std_graph(data.cube)),
+                   ('time_per_city_and_order', lambda data: rollup(data.cube, ['City', 'Type_of_order'])),
+                   ('distance_per_city', lambda data: calc_distance(data.cube, True)),
+                   ('time_per_city_and_traffic', lambda data: avg_std_time_on_traffic(data.cube))],
+}
+#Views without a weather filter in their sidebar
+NO_WEATHER_VIEWS = ['company']
+
+logger = logging.getLogger(__name__)
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def filter_grid(cube, every = 'week', traffic = 'each', weather = 'all', dates = None):
+    """ This function lists the filter states to render.
+
+        Input: Cube of the dataset, 'week', 'day' or 'none' (one date_max per period, or only the
+               whole range), 'all' or 'each' for the traffic densities and the weather conditions
+               ('each' adds one state per value to the state with every value), explicit list of
+               date_max (replaces every)
+        Output: List of FilterState
+    """
+    first, last = cube.cells['Order_Date'].min(), cube.cells['Order_Date'].max()
+    end = last + pd.Timedelta(days = 1)
+    if dates is None:
+        dates = [] if every == 'none' else list(pd.date_range(first + pd.Timedelta(days = 1), end,
+                                                              freq = {'week': 'W-MON', 'day': 'D'}[every]))
+        dates = sorted(set(dates) | {end})
+    dates = [pd.Timestamp(date) for date in dates]
+
+    def options(column, mode):
+        values = [None]
+        if mode == 'each':
+            values += [(value,) for value in sorted(cube.cells[column].unique())]
+        return values
+
+    return [FilterState(date_max, traffic_values, weather_values)
+            for date_max in dates
+            for traffic_values in options('Road_traffic_density', traffic)
+            for weather_values in options('Weatherconditions', weather)]
+
+def state_name(state):
+    """ This function names the folder of a filter state.
+
+        Input: FilterState
+        Output: String, e.g. 'until_2022-03-14_traffic_Low_weather_all'
+    """
+    values = lambda options: 'all' if options is None else '-'.join(options)
+    return 'until_%s_traffic_%s_weather_%s' % (state.date_max.strftime('%Y-%m-%d'), values(state.traffic),
+                                               values(state.weather))
+
+def select(data, state):
+    """ This function applies a filter state to the lines, the cube and the weekly rollup, like the
+        sidebar does.
+
+        Input: Tuple (dataframe, cube, filter index, calendar rollups), FilterState
+        Output: Selection
+    """
+    df, cube, filter_index, rollups = data
+    rows = select_rows(filter_index, date_max = state.date_max,
+                       Road_traffic_density = state.traffic, Weatherconditions = state.weather)
+    return Selection(take_rows(df, rows, ROW_COLUMNS),
+                     filter_cube(cube, date_max = state.date_max, traffic = state.traffic, weather = state.weather),
+                     select_weeks(rollups, date_max = state.date_max, traffic = state.traffic))
+
+def write_chart(value, path, formats):
+    """ This function writes a figure, a map or a table to disk.
+
+        Input: Plotly figure, folium map or dataframe, path without extension, formats (REPORT_FORMATS)
+        Output: List of the files written
+    """
+    files = []
+    if hasattr(value, 'get_root'):
+        #folium maps only render to html
+        if 'html' in formats:
+            value.save(path + '.html')
+            files.append(path + '.html')
+        return files
+    if 'html' in formats:
+        if isinstance(value, pd.DataFrame):
+            value.to_html(path + '.html')
+        else:
+            value.write_html(path + '.html', include_plotlyjs = 'cdn')
+        files.append(path + '.html')
+    if 'json' in formats:
+        if isinstance(value, pd.DataFrame):
+            value.reset_index().to_json(path + '.json', orient = 'records', date_format = 'iso')
+        else:
+            value.write_json(path + '.json')
+        files.append(path + '.json')
+    return files
+
+def render_state(data, view, state, out, formats):
+    """ This function renders every chart of a view for one filter state. When a chart fails, the
+        error is logged and recorded in the entry, and the rest of the state is skipped.
+
+        Input: Tuple (dataframe, cube, filter index, calendar rollups), view name (key of VIEWS), FilterState,
+               output directory, formats
+        Output: Dictionary describing the state, the files written and the error (None when every
+                chart was written)
+    """
+    directory = os.path.join(out, view, state_name(state))
+    os.makedirs(directory, exist_ok = True)
+    files, error = [], None
+    try:
+        selection = select(data, state)
+        for chart, builder in VIEWS[view]:
+            files += write_chart(builder(selection), os.path.join(directory, chart), formats)
+    except Exception as exception:
+        logger.exception('%s/%s: rendering failed, state skipped', view, state_name(state))
+        error = '%s: %s' % (type(exception).__name__, exception)
+    return {'view': view, 'date_max': state.date_max.isoformat(), 'traffic': state.traffic,
+            'weather': state.weather, 'files': [os.path.relpath(file, out) for file in files], 'error': error}
+
+def _render_task(task):
+    return render_state(shared_data(), *task)
+
+def render_reports(path, out, states, views = None, formats = REPORT_FORMATS, workers = None):
+    """ This function renders the views for every filter state, in a process pool, and writes the
+        manifest.
+
+        Input: Path of the csv file, output directory, list of FilterState, view names (None for all),
+               formats, number of processes (None for utils.parallel.OFFLINE_WORKERS)
+        Output: List of the manifest entries
+    """
+    views = list(VIEWS) if views is None else views
+    workers = OFFLINE_WORKERS if workers is None else workers
+    data = (load_dataset(path), load_cube(path), load_derived(build_filter_index, path, FILTER_INDEX_COLUMNS),
+            load_derived(build_calendar_rollups, path, ROLLUP_COLUMNS))
+
+    tasks = []
+    for view in views:
+        view_states = states
+        if view in NO_WEATHER_VIEWS:
+            view_states = list(dict.fromkeys(state._replace(weather = None) for state in states))
+        tasks += [(view, state, out, formats) for state in view_states]
+
+    os.makedirs(out, exist_ok = True)
+    if workers <= 1 or len(tasks) <= 1:
+        entries = [render_state(data, *task) for task in tasks]
+    else:
+        with shared_pool(min(workers, len(tasks)), data) as pool:
+            entries = list(pool.map(_render_task, tasks))
+
+    with open(os.path.join(out, 'manifest.json'), 'w') as file:
+        json.dump(entries, file, indent = 1)
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description = __doc__, formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs = '?', default = DATASET_PATH, help = 'raw csv in the train.csv format')
+    parser.add_argument('--out', default = 'reports', help = 'output directory')
+    parser.add_argument('--views', nargs = '+', choices = list(VIEWS), default = list(VIEWS))
+    parser.add_argument('--formats', nargs = '+', choices = REPORT_FORMATS, default = REPORT_FORMATS)
+    parser.add_argument('--every', choices = ['week', 'day', 'none'], default = 'week',
+                        help = 'one date limit per period (none: only the whole range)')
+    parser.add_argument('--dates', nargs = '+', default = None, help = 'explicit date limits (YYYY-MM-DD), replace --every')
+    parser.add_argument('--traffic', choices = ['all', 'each'], default = 'each')
+    parser.add_argument('--weather', choices = ['all', 'each'], default = 'all')
+    parser.add_argument('--workers', type = int, default = OFFLINE_WORKERS, help = 'worker processes')
+    args = parser.parse_args()
+    logging.basicConfig(format = '%(levelname)s %(name)s: %(message)s')
+
+    cube = load_cube(args.path)
+    states = filter_grid(cube, args.every, args.traffic, args.weather, args.dates)
+    entries = render_reports(args.path, args.out, states, args.views, args.formats, args.workers)
+    failed = [entry for entry in entries if entry['error']]
+    print('%d filter states, %d files written to %s' % (len(entries), sum(len(entry['files']) for entry in entries), args.out))
+    if failed:
+        print('%d filter states failed (see "error" in %s)' % (len(failed), os.path.join(args.out, 'manifest.json')))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
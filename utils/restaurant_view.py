@@ -0,0 +1,71 @@
+""" Chart builders of the Restaurant View page (pages/3_Restaurant_View.py). """
+#Import Libraries
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from utils.cube import rollup
+from utils.quantiles import sketch_percentiles
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def avg_std_time_on_traffic(cube):
+    """ This function calculates the average delivery time and its standard deviation per city and road traffic density
+        and visualizes it using a sunburst chart.
+
+    Input: Cube (utils.cube) filtered by the sidebar
+    Output: Sunburst chart
+    """
+
+    df_aux = rollup(cube, ['City','Road_traffic_density']).loc[:,['mean','std']]
+    df_aux.columns = ['avg_time','std_time']
+    df_aux = df_aux.reset_index()
+    fig = (px.sunburst(df_aux,path =['City','Road_traffic_density'],
+                       values='avg_time',
+                       color ='std_time',
+                       color_continuous_scale = 'RdBu', 
+                       color_continuous_midpoint = np.average(df_aux['std_time'])))
+    return fig
+
+def avg_std_graph(cube):
+    """This function calculates the average delivery time and its standard deviation per city and visualizes it using a grouped bar chart.
+
+       Input: Cube (utils.cube) filtered by the sidebar
+       Output: Bar graph
+    """
+    df_aux = rollup(cube, 'City').loc[:,['mean','std']]
+    df_aux.columns = ['avg_time','std_time']
+    df_aux = df_aux.reset_index()
+    fig = go.Figure()
+    fig.add_trace( go.Bar(name = 'Control',x = df_aux['City'],y = df_aux['avg_time'], error_y = dict(type = 'data', array = df_aux['std_time'])))
+    fig.update_layout(barmode = 'group')
+    return fig
+
+def calc_distance(cube,fig):
+    """This function summarizes the distance between the restaurant and delivery location.
+       The Distance column is computed once per dataset with a vectorized Haversine formula (utils.data).
+    
+    Input: Cube (utils.cube) filtered by the sidebar and Boolean var
+    Output: If boolean var =  False: float, else: Pie graph 
+    """
+    if fig == False:
+        media_distancia = np.round(rollup(cube, measure = 'Distance')['mean'].iloc[0],2)
+        return media_distancia
+    else:
+        media_distancia = rollup(cube, 'City', 'Distance').loc[:,['mean']].rename(columns = {'mean': 'Distance'}).reset_index()
+        fig = go.Figure( data =[go.Pie(labels=media_distancia['City'],values=media_distancia['Distance'],pull = [0,0.1,0])])
+        return fig
+
+def time_percentiles_per_city(sketches):
+    """ This function calculates the p50, p90 and p99 delivery times per city from the merged quantile
+        sketches and visualizes them using a grouped bar chart.
+
+       Input: Sketches (utils.quantiles) filtered by the sidebar
+       Output: Bar graph
+    """
+    df_aux = sketch_percentiles(sketches, 'City').reset_index()
+    df_aux = df_aux.melt(id_vars = 'City', value_vars = ['p50', 'p90', 'p99'], var_name = 'percentile', value_name = 'time')
+    fig = px.bar(df_aux, x = 'City', y = 'time', color = 'percentile', barmode = 'group')
+    return fig
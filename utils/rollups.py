@@ -0,0 +1,146 @@
+""" Calendar fields of the orders and the daily / weekly rollups read by the Tactical Vision charts.
+
+    The calendar fields are derived once, at ingest, from the integer day numbers of Order_Date
+    (no string formatting per line). The rollups hold, per day or per week and per traffic density,
+    the orders and the sum of Time_taken(min), with the unique (day or week, traffic, delivery
+    person) triples so the distinct delivery persons of any selection are exact.
+
+    A date limit cutting a week in two is answered from the weekly table for the complete weeks
+    and from the daily table for the week that is cut.
+"""
+#Import Libraries
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from utils.cube import measure_column, measure_values
+
+#Week_Index 0 is the week starting on Sunday 1969-12-28, the first Sunday before the epoch
+WEEK_EPOCH = pd.Timestamp('1969-12-28')
+ROLLUP_MEASURE = 'Time_taken(min)'
+ROLLUP_DIMENSION = 'Road_traffic_density'
+#Columns read by build_calendar_rollups
+ROLLUP_COLUMNS = ['Order_Date', 'Week_Index', ROLLUP_DIMENSION, ROLLUP_MEASURE, 'Delivery_person_ID']
+
+#cells: one line per (key, traffic density) with 'orders' and the sum of ROLLUP_MEASURE
+#drivers: unique (key, traffic density, driver) triples, driver being a code into driver_ids
+Rollup = namedtuple('Rollup', ['cells', 'drivers'])
+CalendarRollups = namedtuple('CalendarRollups', ['daily', 'weekly', 'driver_ids'])
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def calendar_fields(dates):
+    """ This function derives the calendar fields of the order dates, all lines at once.
+
+        Fields
+        1. Day_of_Week: 0 for Monday to 6 for Sunday
+        2. Week_of_Year: week of the year starting on Sunday, like strftime('%U')
+        3. ISO_Week: ISO 8601 week number
+        4. Week_Index: weeks since WEEK_EPOCH (Sunday based, increasing across years)
+
+        Input: Series of dates (datetime64, midnight)
+        Output: Dictionary {field: numpy array}
+    """
+    days = dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+    #1970-01-01 was a Thursday
+    weekday = (days + 3) % 7
+    sunday_weekday = (days + 4) % 7
+    day_of_year = dates.dt.dayofyear.to_numpy() - 1
+    return {'Day_of_Week': weekday.astype(np.int8),
+            'Week_of_Year': ((day_of_year + 7 - sunday_weekday) // 7).astype(np.int8),
+            'ISO_Week': dates.dt.isocalendar()['week'].to_numpy(dtype = np.int8),
+            'Week_Index': ((days + 4) // 7).astype(np.int32)}
+
+def week_start(week_index):
+    """ This function returns the Sunday starting each week.
+
+        Input: Week_Index values
+        Output: DatetimeIndex
+    """
+    return WEEK_EPOCH + pd.to_timedelta(np.asarray(week_index, dtype = np.int64) * 7, unit = 'D')
+
+def build_rollup(df, key, driver_codes):
+    """ This function aggregates the orders by one calendar key and traffic density.
+
+        Input: Cleaned dataframe, key column ('Order_Date' or 'Week_Index'), delivery person codes
+        Output: Rollup
+    """
+    by = [key, ROLLUP_DIMENSION]
+    work = pd.concat([df.loc[:, by], measure_values(df, [ROLLUP_MEASURE])], axis = 1)
+    grouped = work.groupby(by, observed = True, sort = True)
+    cells = grouped.agg(**{'orders': (ROLLUP_MEASURE, 'size'),
+                           measure_column(ROLLUP_MEASURE, 'sum'): (ROLLUP_MEASURE, 'sum')}).reset_index()
+    drivers = (pd.DataFrame({'cell': grouped.ngroup().to_numpy(), 'driver': driver_codes})
+                 .drop_duplicates()
+                 .reset_index(drop = True))
+    return Rollup(cells, drivers)
+
+def build_calendar_rollups(df):
+    """ This function builds the daily and the weekly rollups of the cleaned dataframe.
+
+        Input: Cleaned dataframe (with the calendar fields)
+        Output: CalendarRollups
+    """
+    driver_codes, driver_ids = pd.factorize(df['Delivery_person_ID'])
+    return CalendarRollups(build_rollup(df, 'Order_Date', driver_codes), build_rollup(df, 'Week_Index', driver_codes),
+                           np.asarray(driver_ids))
+
+def weekly_totals(rollup, key, selected):
+    """ This function adds up the selected cells of a rollup per week.
+
+        Input: Rollup, key column, boolean array of the selected cells
+        Output: Dataframe indexed by Week_Index with orders, drivers and the sum of ROLLUP_MEASURE
+    """
+    cells = rollup.cells
+    weeks = cells[key].to_numpy()
+    if key == 'Order_Date':
+        weeks = calendar_fields(cells[key])['Week_Index']
+    total = measure_column(ROLLUP_MEASURE, 'sum')
+    totals = (pd.DataFrame({'Week_Index': weeks, 'orders': cells['orders'].to_numpy(), total: cells[total].to_numpy()})
+                .loc[selected, :]
+                .groupby('Week_Index', sort = True).sum())
+
+    #Distinct delivery persons per week, over the selected cells
+    cell = rollup.drivers['cell'].to_numpy()
+    pairs = pd.DataFrame({'Week_Index': weeks[cell], 'driver': rollup.drivers['driver'].to_numpy()}).loc[selected[cell], :]
+    totals['drivers'] = pairs.drop_duplicates().groupby('Week_Index').size()
+    return totals
+
+def select_weeks(rollups, date_max = None, traffic = None):
+    """ This function returns the weekly totals of the sidebar selection.
+
+        Input: CalendarRollups, dates strictly before date_max, list of traffic densities (None keeps everything)
+        Output: Dataframe indexed by Week_Index with Week_of_Year, Week_Start, orders, drivers and the
+                sum of ROLLUP_MEASURE
+    """
+    daily, weekly = rollups.daily.cells, rollups.weekly.cells
+    weekly_selected = np.ones(len(weekly), dtype = bool)
+    daily_selected = np.zeros(len(daily), dtype = bool)
+    if date_max is not None:
+        #Complete weeks from the weekly table, the days of the week cut by date_max from the daily table
+        date_max = pd.Timestamp(date_max)
+        complete = week_start(weekly['Week_Index']) + pd.Timedelta(days = 6) < date_max
+        weekly_selected &= np.asarray(complete)
+        cut_days = week_start(calendar_fields(daily['Order_Date'])['Week_Index']) + pd.Timedelta(days = 6) >= date_max
+        daily_selected = np.asarray(cut_days) & (daily['Order_Date'] < date_max).to_numpy()
+    if traffic is not None:
+        weekly_selected &= weekly[ROLLUP_DIMENSION].isin(traffic).to_numpy()
+        daily_selected &= daily[ROLLUP_DIMENSION].isin(traffic).to_numpy()
+
+    totals = pd.concat([weekly_totals(rollups.weekly, 'Week_Index', weekly_selected),
+                        weekly_totals(rollups.daily, 'Order_Date', daily_selected)]).sort_index()
+    return week_labels(totals)
+
+def week_labels(totals):
+    """ This function adds the calendar labels of the weeks to weekly totals.
+
+        Input: Dataframe indexed by Week_Index
+        Output: Dataframe with Week_of_Year and Week_Start first
+    """
+    start = week_start(totals.index)
+    labels = pd.DataFrame({'Week_of_Year': calendar_fields(pd.Series(start))['Week_of_Year'], 'Week_Start': start},
+                          index = totals.index)
+    return pd.concat([labels, totals.loc[:, ['orders', 'drivers', measure_column(ROLLUP_MEASURE, 'sum')]]], axis = 1)
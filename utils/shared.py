@@ -0,0 +1,148 @@
+""" Process wide, read-only dataset shared by every session, and per-session memory accounting.
+
+    The cleaned dataframe is loaded once per process (utils.data.load_dataset). When it comes from
+    the snapshot, its numeric, date and category columns are views of the memory-mapped Feather file
+    (utils.snapshot.read_snapshot), so even several worker processes share their pages. share_frame
+    marks every buffer of the frame read-only, so a page writing into the shared dataset fails
+    instead of silently changing the data of every other session.
+
+    Sessions keep row positions into the shared frame (utils.backend.select) instead of copies, and
+    materialize the columns they need only when a figure has to be built. account_session records
+    the memory a session holds on its own (owned_bytes: buffers of the shared dataset are not
+    counted), so the cost of a new session can be checked in the profiler (utils.profiling).
+"""
+#Import Libraries
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+#Sessions accounted, least recently seen first (their ids are never told when they end)
+MAX_TRACKED_SESSIONS = 1000
+
+#{id(root buffer): root buffer} of the shared frames
+_shared_roots = weakref.WeakValueDictionary()
+#{session id: {name: bytes}}
+_sessions = OrderedDict()
+_lock = threading.Lock()
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def column_buffer(values):
+    """ This function returns the numpy array holding the data of a column.
+
+        Input: Series or index
+        Output: numpy array (the codes of a categorical column)
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.array.codes
+    return values.to_numpy()
+
+def root_buffer(array):
+    """ This function follows the views of an array back to the array owning the memory.
+
+        Input: numpy array
+        Output: numpy array
+    """
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+def share_frame(df):
+    """ This function marks the buffers of a dataframe read-only and registers them as shared, so
+        owned_bytes does not count them in the memory of a session.
+
+        Input: Dataframe
+        Output: The same dataframe
+    """
+    for col in df.columns:
+        root = root_buffer(column_buffer(df[col]))
+        root.flags.writeable = False
+        _shared_roots[id(root)] = root
+    return df
+
+def is_shared(array):
+    """ This function tells if an array is (a view of) a buffer of a shared dataframe.
+
+        Input: numpy array
+        Output: Boolean
+    """
+    root = root_buffer(array)
+    return _shared_roots.get(id(root)) is root
+
+def owned_bytes(value):
+    """ This function estimates the memory held by a value on its own: arrays and dataframes count
+        their buffers unless they belong to the shared dataset, containers count their items.
+
+        Input: numpy array, dataframe, series, index, tuple, list, dictionary or any object
+        Output: Size in bytes
+    """
+    if value is None:
+        return 0
+    if isinstance(value, np.ndarray):
+        return 0 if is_shared(value) else value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return owned_bytes(value.index) + sum(owned_bytes(column_buffer(value.iloc[:, i])) for i in range(value.shape[1]))
+    if isinstance(value, pd.RangeIndex):
+        return sys.getsizeof(value)
+    if isinstance(value, (pd.Series, pd.Index)):
+        return owned_bytes(column_buffer(value)) + (owned_bytes(value.index) if isinstance(value, pd.Series) else 0)
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return sys.getsizeof(value) + sum(owned_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(owned_bytes(item) for item in value.values())
+    return sys.getsizeof(value)
+
+def session_id():
+    """ This function returns the id of the Streamlit session running the script.
+
+        Output: String ('bare' outside of a Streamlit server)
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else 'bare'
+
+def account_session(name, value):
+    """ This function records the memory a value holds for the current session, replacing the
+        previous record of the same name (e.g. the selection of the previous rerun).
+
+        Input: Name of the record, value kept by the session
+        Output: Size in bytes
+    """
+    size = owned_bytes(value)
+    key = session_id()
+    with _lock:
+        records = _sessions.pop(key, {})
+        records[name] = size
+        _sessions[key] = records
+        while len(_sessions) > MAX_TRACKED_SESSIONS:
+            _sessions.popitem(last = False)
+    return size
+
+def session_memory(key = None):
+    """ This function returns the memory accounted to a session.
+
+        Input: Session id (the current session by default)
+        Output: Dictionary {name: bytes}
+    """
+    with _lock:
+        return dict(_sessions.get(key or session_id(), {}))
+
+def session_memory_stats():
+    """ This function summarizes the memory accounted to every session.
+
+        Output: Dictionary {'sessions', 'bytes' (every session), 'current' (this session), 'shared'
+                (buffers of the shared dataset)}
+    """
+    current = sum(session_memory().values())
+    with _lock:
+        total = sum(sum(records.values()) for records in _sessions.values())
+        sessions = len(_sessions)
+    shared = sum(root.nbytes for root in list(_shared_roots.values()))
+    return {'sessions': sessions, 'bytes': total, 'current': current, 'shared': shared}
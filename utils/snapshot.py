@@ -0,0 +1,113 @@
+""" Typed columnar snapshot (Feather) of the cleaned dataset, stored next to the csv.
+
+    Build it ahead of time with:
+        python -m utils.snapshot dataset/train.csv
+
+    utils.data.load_dataset reads the snapshot when pyarrow is installed and rebuilds it when it was
+    written from another content of the csv (its digest is kept in the metadata of the snapshot).
+"""
+#Import Libraries
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+SNAPSHOT_SUFFIX = '.feather'
+#Bump when the cleaning rules or the derived columns change, so old snapshots are rebuilt
+SNAPSHOT_VERSION = '5'
+VERSION_KEY = b'curry_snapshot_version'
+#Content hash of the csv the snapshot was written from (utils.data.file_digest)
+DIGEST_KEY = b'curry_csv_digest'
+#Text columns stored as categories (dictionary encoded) in the snapshot
+SNAPSHOT_CATEGORIES = ['Delivery_person_ID', 'Weatherconditions', 'Road_traffic_density',
+                       'Type_of_order', 'Type_of_vehicle', 'Festival', 'City']
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def snapshot_available():
+    """ This function tells if snapshots can be used (pyarrow is an optional dependency).
+
+        Output: Boolean
+    """
+    return feather is not None
+
+def snapshot_path(csv_path):
+    """ This function returns where the snapshot of a csv is stored.
+
+        Input: Path of the csv file
+        Output: Path of the snapshot (same name, .feather extension)
+    """
+    return os.path.splitext(csv_path)[0] + SNAPSHOT_SUFFIX
+
+def is_stale(metadata, digest):
+    """ This function tells if the metadata of a snapshot (or of another copy of the cleaned dataset)
+        was written by another version of the cleaning rules or from another content of the csv. The
+        content is compared, not the modification times: a csv replaced by an older file (cp -p,
+        rsync -t) is still noticed.
+
+        Input: Metadata {bytes: bytes} (None when missing), content hash of the csv
+        Output: Boolean
+    """
+    metadata = metadata or {}
+    return metadata.get(VERSION_KEY) != SNAPSHOT_VERSION.encode() or metadata.get(DIGEST_KEY) != digest.encode()
+
+def snapshot_is_stale(csv_path, digest, path = None):
+    """ This function tells if the snapshot is missing, written by another version of the cleaning
+        rules or from another content of the csv.
+
+        Input: Path of the csv file, content hash of the csv (utils.data.dataset_version), optional
+               path of the snapshot
+        Output: Boolean
+    """
+    path = path or snapshot_path(csv_path)
+    if not os.path.exists(path):
+        return True
+    return is_stale(pa.ipc.open_file(pa.memory_map(path)).schema.metadata, digest)
+
+def write_snapshot(df, path, digest):
+    """ This function writes a cleaned dataframe as an uncompressed Feather file, so it can be
+        memory-mapped when read. The file is written next to the target and renamed, so a reader
+        never sees a half written snapshot.
+
+        Input: Cleaned dataframe, path of the snapshot, content hash of the csv it was read from
+        Output: None
+    """
+    df = df.reset_index(drop = True)
+    categories = {col: 'category' for col in SNAPSHOT_CATEGORIES if col in df.columns}
+    table = pa.Table.from_pandas(df.astype(categories), preserve_index = False)
+    table = table.replace_schema_metadata({**table.schema.metadata, VERSION_KEY: SNAPSHOT_VERSION, DIGEST_KEY: digest})
+    tmp_path = path + '.tmp'
+    feather.write_feather(table, tmp_path, compression = 'uncompressed')
+    os.replace(tmp_path, path)
+    return
+
+def read_snapshot(path, columns = None):
+    """ This function reads a snapshot through a memory map, only for the requested columns.
+
+        Every column keeps its own block (split_blocks), so the numeric, date and category columns
+        without missing values stay read-only views of the mapped file instead of being copied into
+        consolidated blocks.
+
+        Input: Path of the snapshot, optional list of columns
+        Output: Dataframe
+    """
+    table = feather.read_table(path, columns = columns, memory_map = True)
+    return table.to_pandas(split_blocks = True)
+
+def main():
+    import argparse
+
+    from utils.data import DATASET_PATH, build_snapshot
+
+    parser = argparse.ArgumentParser(description = 'Build the cleaned Feather snapshot of the dataset.')
+    parser.add_argument('path', nargs = '?', default = DATASET_PATH, help = 'raw csv in the train.csv format')
+    args = parser.parse_args()
+    print(build_snapshot(args.path))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+""" Uniform grid index over the restaurant and delivery coordinates.
+
+    Points are bucketed into square cells of GRID_CELL_KM (in degrees of latitude, the same number
+    of degrees of longitude) and sorted by cell, one row of cells after the other, so the points of
+    a row of cells are one contiguous slice found by binary search. A query only computes the
+    haversine distance of the points in the cells around it, instead of scanning every point.
+
+    The index of the dataset is built once per version, when the Restaurant View first asks for the
+    deliveries made around the busiest restaurants (utils.backend.busiest_restaurants):
+        load_derived(build_location_index, path, LOCATION_COLUMNS)
+"""
+#Import Libraries
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from utils.geo import EARTH_RADIUS_KM, haversine_distance
+
+KM_PER_DEGREE = EARTH_RADIUS_KM * np.pi / 180
+GRID_CELL_KM = 5.0
+#Longitude cells are narrower than latitude cells away from the equator; bounds are computed up to this latitude
+MAX_LATITUDE = 89.0
+#Columns read by build_location_index
+RESTAURANT_COLUMNS = ['Restaurant_latitude', 'Restaurant_longitude']
+LOCATION_COLUMNS = RESTAURANT_COLUMNS + ['Delivery_location_latitude', 'Delivery_location_longitude']
+#Radius of the zone around a restaurant, and the measure summarized over its deliveries
+ZONE_KM = 10.0
+ZONE_MEASURE = 'Time_taken(min)'
+
+#cell: size of the cells in degrees, columns: cells per row of the grid; the other fields are sorted by
+#cell key: key of each point, its position in the input (order), its latitude and longitude
+SpatialIndex = namedtuple('SpatialIndex', ['cell', 'columns', 'keys', 'order', 'lat', 'lon'])
+#Index of the distinct restaurant locations and of the delivery locations of the cleaned dataframe
+LocationIndex = namedtuple('LocationIndex', ['restaurants', 'restaurant_lat', 'restaurant_lon', 'deliveries'])
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def build_spatial_index(lat, lon, cell_km = GRID_CELL_KM):
+    """ This function buckets points into the grid.
+
+        Input: Arrays of latitudes and longitudes in degrees, size of the cells in km
+        Output: SpatialIndex
+    """
+    lat = np.asarray(lat, dtype = np.float64)
+    lon = np.asarray(lon, dtype = np.float64)
+    cell = cell_km / KM_PER_DEGREE
+    columns = int(np.ceil(360 / cell)) + 1
+    keys = cell_rows(lat, cell) * columns + cell_columns(lon, cell)
+    order = np.argsort(keys, kind = 'stable')
+    return SpatialIndex(cell, columns, keys[order], order, lat[order], lon[order])
+
+def build_location_index(df, cell_km = GRID_CELL_KM):
+    """ This function indexes the distinct restaurant locations and the delivery locations of the
+        cleaned dataframe.
+
+        Input: Cleaned dataframe, size of the cells in km
+        Output: LocationIndex (positions in `deliveries` are lines of df, positions in `restaurants`
+                are positions in restaurant_lat / restaurant_lon)
+    """
+    restaurants = df.loc[:, RESTAURANT_COLUMNS].drop_duplicates().sort_values(RESTAURANT_COLUMNS)
+    restaurant_lat = restaurants['Restaurant_latitude'].to_numpy(dtype = np.float64)
+    restaurant_lon = restaurants['Restaurant_longitude'].to_numpy(dtype = np.float64)
+    return LocationIndex(build_spatial_index(restaurant_lat, restaurant_lon, cell_km), restaurant_lat, restaurant_lon,
+                         build_spatial_index(df['Delivery_location_latitude'], df['Delivery_location_longitude'], cell_km))
+
+def cell_rows(lat, cell):
+    """ This function returns the row of cells of each latitude.
+
+        Input: Latitudes in degrees, size of the cells in degrees
+        Output: Array of rows
+    """
+    return np.floor((np.asarray(lat, dtype = np.float64) + 90) / cell).astype(np.int64)
+
+def cell_columns(lon, cell):
+    """ This function returns the column of cells of each longitude.
+
+        Input: Longitudes in degrees, size of the cells in degrees
+        Output: Array of columns
+    """
+    return np.floor((np.asarray(lon, dtype = np.float64) + 180) / cell).astype(np.int64)
+
+def box_candidates(index, row_min, row_max, column_min, column_max):
+    """ This function returns the points of a rectangle of cells.
+
+        Input: SpatialIndex, first and last row of cells, first and last column of cells
+        Output: Array of positions in the sorted fields of the index
+    """
+    rows = np.arange(max(row_min, 0), row_max + 1, dtype = np.int64)
+    column_min, column_max = max(column_min, 0), min(column_max, index.columns - 1)
+    if not len(rows) or column_min > column_max:
+        return np.zeros(0, dtype = np.int64)
+    starts = np.searchsorted(index.keys, rows * index.columns + column_min, side = 'left')
+    ends = np.searchsorted(index.keys, rows * index.columns + column_max, side = 'right')
+    lengths = ends - starts
+    #Concatenate the slices [start, end) of every row without a Python loop
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum(), dtype = np.int64)
+
+def bbox_query(index, lat_min, lat_max, lon_min, lon_max):
+    """ This function finds the points inside a bounding box.
+
+        Input: SpatialIndex, latitude and longitude bounds in degrees (inclusive)
+        Output: Sorted array of the positions of the points in the input of build_spatial_index
+    """
+    candidates = box_candidates(index, cell_rows(lat_min, index.cell), cell_rows(lat_max, index.cell),
+                                cell_columns(lon_min, index.cell), cell_columns(lon_max, index.cell))
+    lat, lon = index.lat[candidates], index.lon[candidates]
+    inside = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+    return np.sort(index.order[candidates[inside]])
+
+def radius_bounds(lat, radius_km):
+    """ This function returns the half sides, in degrees, of the box holding a circle.
+
+        Input: Latitude of the center in degrees, radius in km
+        Output: Tuple (degrees of latitude, degrees of longitude)
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    widest = min(abs(lat) + dlat, MAX_LATITUDE)
+    return dlat, dlat / np.cos(np.radians(widest))
+
+def radius_query(index, lat, lon, radius_km):
+    """ This function finds the points within radius_km (great-circle distance) of a location.
+
+        Input: SpatialIndex, latitude and longitude of the center in degrees, radius in km
+        Output: Tuple (positions in the input of build_spatial_index, distances in km), nearest first
+    """
+    dlat, dlon = radius_bounds(lat, radius_km)
+    candidates = box_candidates(index, cell_rows(lat - dlat, index.cell), cell_rows(lat + dlat, index.cell),
+                                cell_columns(lon - dlon, index.cell), cell_columns(lon + dlon, index.cell))
+    distances = haversine_distance(np.full(len(candidates), lat), np.full(len(candidates), lon),
+                                   index.lat[candidates], index.lon[candidates])
+    inside = distances <= radius_km
+    candidates, distances = candidates[inside], distances[inside]
+    nearest_first = np.argsort(distances, kind = 'stable')
+    return index.order[candidates[nearest_first]], distances[nearest_first]
+
+def nearest_point(index, lat, lon):
+    """ This function finds the nearest indexed point of each query location (e.g. the nearest
+        restaurant of each delivery).
+
+        The queries are solved one cell at a time: the rings of cells around the cell grow until
+        they hold a point, then the box is widened to the largest distance found, so no nearer
+        point can be outside of it.
+
+        Input: SpatialIndex, arrays of latitudes and longitudes of the queries in degrees
+        Output: Tuple (positions in the input of build_spatial_index, -1 for an empty index,
+                distances in km)
+    """
+    lat = np.atleast_1d(np.asarray(lat, dtype = np.float64))
+    lon = np.atleast_1d(np.asarray(lon, dtype = np.float64))
+    positions = np.full(len(lat), -1, dtype = np.int64)
+    distances = np.full(len(lat), np.inf)
+    if not len(index.keys) or not len(lat):
+        return positions, distances
+
+    rows, columns = cell_rows(lat, index.cell), cell_columns(lon, index.cell)
+    query_cells = pd.Series(np.arange(len(lat))).groupby(rows * index.columns + columns).indices
+    max_rings = max(index.columns, int(np.ceil(180 / index.cell)) + 1)
+    for queries in query_cells.values():
+        row, column = rows[queries[0]], columns[queries[0]]
+        rings = 0
+        candidates = box_candidates(index, row, row, column, column)
+        while not len(candidates) and rings < max_rings:
+            rings += 1
+            candidates = box_candidates(index, row - rings, row + rings, column - rings, column + rings)
+
+        #Widen the box to the farthest nearest point of the queries of the cell
+        matrix = haversine_distance(lat[queries, None], lon[queries, None], index.lat[candidates][None, :],
+                                    index.lon[candidates][None, :])
+        dlat, dlon = radius_bounds(np.abs(lat[queries]).max(), matrix.min(axis = 1).max())
+        row_rings, column_rings = int(np.ceil(dlat / index.cell)) + 1, int(np.ceil(dlon / index.cell)) + 1
+        if row_rings > rings or column_rings > rings:
+            candidates = box_candidates(index, row - row_rings, row + row_rings, column - column_rings, column + column_rings)
+            matrix = haversine_distance(lat[queries, None], lon[queries, None], index.lat[candidates][None, :],
+                                        index.lon[candidates][None, :])
+        best = matrix.argmin(axis = 1)
+        positions[queries] = index.order[candidates[best]]
+        distances[queries] = matrix[np.arange(len(queries)), best]
+    return positions, distances
+
+def busiest_zones(index, orders, top = 10, radius_km = ZONE_KM):
+    """ This function summarizes the busiest restaurant locations of a selection and the selected
+        deliveries made within radius_km of each of them (radius_query), wherever they were ordered.
+
+        Input: LocationIndex, selected lines (RESTAURANT_COLUMNS and ZONE_MEASURE, indexed by their
+               positions in the dataframe of the index), number of restaurants, radius in km
+        Output: Dataframe with one line per restaurant location, busiest first: orders and avg_time of
+                its own orders, zone_orders and zone_avg_time of the deliveries around it
+    """
+    restaurants = (orders.groupby(RESTAURANT_COLUMNS, sort = True)[ZONE_MEASURE].agg(['size', 'mean'])
+                         .set_axis(['orders', 'avg_time'], axis = 1)
+                         .sort_values('orders', ascending = False, kind = 'stable')
+                         .head(top)
+                         .reset_index())
+    selected = np.zeros(len(index.deliveries.order), dtype = bool)
+    selected[orders.index.to_numpy()] = True
+    times = pd.Series(orders[ZONE_MEASURE].to_numpy(np.float64), index = orders.index)
+    zone_orders, zone_avg_time = [], []
+    for lat, lon in restaurants.loc[:, RESTAURANT_COLUMNS].to_numpy(np.float64):
+        found, _ = radius_query(index.deliveries, lat, lon, radius_km)
+        found = found[selected[found]]
+        zone_orders.append(len(found))
+        zone_avg_time.append(times.loc[found].mean() if len(found) else np.nan)
+    restaurants['zone_orders'] = np.asarray(zone_orders, dtype = np.int64)
+    restaurants['zone_avg_time'] = np.asarray(zone_avg_time, dtype = np.float64)
+    return restaurants
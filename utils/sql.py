@@ -0,0 +1,293 @@
+""" Embedded SQL backend: the cleaned dataset in a local SQLite database, next to the csv.
+
+    The csv is cleaned chunk by chunk (utils.data.prepare_dataset) into one table, with indexes on
+    the columns of the sidebar filters. The filters and the group-bys behind the charts are
+    translated into SQL, so only small result sets (the cells of the cube for a selection, or the
+    lines of a selection) reach Python and the dataset never has to fit in memory.
+
+    Build the database ahead of time with:
+        python -m utils.sql dataset/train.csv
+
+    The pages use it when CURRY_BACKEND=sqlite (see utils.backend).
+"""
+#Import Libraries
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from utils import snapshot
+from utils.cube import CUBE_DIMENSIONS, CUBE_MEASURES, STATISTICS, Cube, measure_column
+from utils.data import COLUMN_TYPES, dataset_version, file_digest, prepare_dataset, read_dataset
+from utils.driver_stats import DRIVER_MEASURES, STORE_KEYS
+from utils.quantiles import SKETCH_DIMENSIONS, SKETCH_MEASURE, histogram_sketches
+from utils.rollups import ROLLUP_MEASURE, week_labels
+
+DATABASE_SUFFIX = '.sqlite'
+TABLE = 'orders'
+#Key/value table holding the content hash of the csv the database was built from
+METADATA_TABLE = 'metadata'
+DIGEST_KEY = 'csv_digest'
+#Columns of the sidebar filters, indexed
+INDEXED_COLUMNS = ['Order_Date', 'City', 'Road_traffic_density', 'Weatherconditions']
+#SQL aggregate of each statistic of the cube, '{0}' being the quoted measure
+SQL_STATISTICS = {'count': 'COUNT({0})', 'sum': 'SUM({0})', 'sumsq': 'SUM({0} * {0})', 'min': 'MIN({0})', 'max': 'MAX({0})'}
+CHUNK_ROWS = int(os.environ.get('CURRY_CHUNK_ROWS', 1000000))
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def database_path(csv_path):
+    """ This function returns where the database of a csv is kept.
+
+        Input: Path of the csv file
+        Output: Path of the database (same name, .sqlite extension)
+    """
+    return os.path.splitext(csv_path)[0] + DATABASE_SUFFIX
+
+def quote(column):
+    """ This function quotes a column name for SQL (e.g. "Time_taken(min)").
+
+        Input: Column name
+        Output: Quoted name
+    """
+    return '"%s"' % column.replace('"', '""')
+
+def database_is_stale(csv_path, digest, path = None):
+    """ This function tells if the database is missing, written by another version of the cleaning
+        rules or from another content of the csv.
+
+        Input: Path of the csv file, content hash of the csv (utils.data.dataset_version), optional
+               path of the database
+        Output: Boolean
+    """
+    path = path or database_path(csv_path)
+    if not os.path.exists(path):
+        return True
+    connection = sqlite3.connect(path)
+    try:
+        version = connection.execute('PRAGMA user_version').fetchone()[0]
+        built_from = connection.execute('SELECT value FROM %s WHERE key = ?' % METADATA_TABLE, [DIGEST_KEY]).fetchone()
+    except sqlite3.DatabaseError:
+        return True
+    finally:
+        connection.close()
+    return str(version) != snapshot.SNAPSHOT_VERSION or built_from != (digest,)
+
+def build_database(csv_path, chunk_rows = CHUNK_ROWS, digest = None):
+    """ This function streams the csv into the database, one cleaned chunk at a time, then indexes
+        it. The database is written next to the final one and moved in place at the end, so readers
+        never see a half written file.
+
+        Input: Path of the csv file, lines per chunk, content hash of the csv (None to hash the file)
+        Output: Path of the database
+    """
+    digest = digest or file_digest(csv_path)
+    out = database_path(csv_path)
+    tmp_path = out + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        with read_dataset(csv_path, chunksize = chunk_rows) as reader:
+            for chunk in reader:
+                df = prepare_dataset(chunk)
+                df['Order_Date'] = df['Order_Date'].dt.strftime('%Y-%m-%d')
+                df = df.astype({col: object for col in df.columns if hasattr(df[col], 'cat')})
+                df.to_sql(TABLE, connection, if_exists = 'append', index = False, chunksize = 100000)
+        for column in INDEXED_COLUMNS:
+            connection.execute('CREATE INDEX IF NOT EXISTS %s ON %s (%s)' % (quote('idx_' + column), TABLE, quote(column)))
+        connection.execute('CREATE TABLE %s (key TEXT PRIMARY KEY, value TEXT)' % METADATA_TABLE)
+        connection.execute('INSERT INTO %s VALUES (?, ?)' % METADATA_TABLE, [DIGEST_KEY, digest])
+        connection.execute('PRAGMA user_version = %d' % int(snapshot.SNAPSHOT_VERSION))
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, out)
+    return out
+
+def ensure_database(csv_path):
+    """ This function returns the path of a database of the current version of the csv, building
+        it first when it is stale.
+
+        Input: Path of the csv file
+        Output: Path of the database
+    """
+    digest = dataset_version(csv_path)
+    if database_is_stale(csv_path, digest):
+        build_database(csv_path, digest = digest)
+    return database_path(csv_path)
+
+def connect(csv_path):
+    """ This function opens a read-only connection to the database of the csv.
+
+        Input: Path of the csv file
+        Output: sqlite3 connection
+    """
+    uri = 'file:%s?mode=ro' % os.path.abspath(database_path(csv_path))
+    return sqlite3.connect(uri, uri = True)
+
+def sql_date(date):
+    """ This function formats a date limit like the Order_Date column (YYYY-MM-DD), keeping the
+        time only when it is not midnight, so `Order_Date < ?` compares like the pandas filters.
+
+        Input: Date or datetime
+        Output: String
+    """
+    date = pd.Timestamp(date)
+    return date.strftime('%Y-%m-%d') if date == date.normalize() else date.strftime('%Y-%m-%d %H:%M:%S')
+
+def where_clause(date_max = None, **dimensions):
+    """ This function translates the sidebar filters into a WHERE clause.
+
+        Input: Dates strictly before date_max, and for any column a list of the values to keep
+               (None keeps everything)
+        Output: Tuple (clause, possibly empty, list of parameters)
+    """
+    conditions, params = [], []
+    if date_max is not None:
+        conditions.append('Order_Date < ?')
+        params.append(sql_date(date_max))
+    for column, values in dimensions.items():
+        if values is None:
+            continue
+        values = list(values)
+        conditions.append('%s IN (%s)' % (quote(column), ', '.join('?' * len(values))) if values else '0')
+        params += values
+    return ('WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+def restore_types(df):
+    """ This function gives the columns read from SQL the types of the cleaned dataframe.
+
+        Input: Dataframe read from the database
+        Output: Dataframe
+    """
+    if 'Order_Date' in df.columns:
+        df['Order_Date'] = pd.to_datetime(df['Order_Date'], format = '%Y-%m-%d')
+    types = {col: dtype for col, dtype in COLUMN_TYPES.items() if col in df.columns}
+    return df.astype(types)
+
+def query(csv_path, sql, params = ()):
+    """ This function runs a query on the database of the csv.
+
+        Input: Path of the csv file, SQL, parameters
+        Output: Dataframe
+    """
+    connection = connect(csv_path)
+    try:
+        return pd.read_sql_query(sql, connection, params = list(params))
+    finally:
+        connection.close()
+
+def select_rows(csv_path, columns, date_max = None, **dimensions):
+    """ This function returns the lines of a selection, sorted by Order_Date like the cleaned dataframe.
+
+        Input: Path of the csv file, columns to read, filters (see where_clause)
+        Output: Dataframe
+    """
+    where, params = where_clause(date_max, **dimensions)
+    sql = 'SELECT %s FROM %s %s ORDER BY Order_Date' % (', '.join(quote(col) for col in columns), TABLE, where)
+    return restore_types(query(csv_path, sql, params))
+
+def select_cube(csv_path, date_max = None, traffic = None, weather = None):
+    """ This function aggregates a selection into the cells of the cube in SQL (see utils.cube).
+
+        The unique (cell, delivery person) pairs are numbered like the cells: the rank of the
+        dimensions in the same order as the cells.
+
+        Input: Path of the csv file, filters of utils.cube.filter_cube
+        Output: Cube
+    """
+    where, params = where_clause(date_max, Road_traffic_density = traffic, Weatherconditions = weather)
+    aggregates = ['COUNT(*) AS orders']
+    for measure in CUBE_MEASURES:
+        aggregates += ['%s AS %s' % (SQL_STATISTICS[statistic].format(quote(measure)), quote(measure_column(measure, statistic)))
+                       for statistic in STATISTICS]
+    dimensions = ', '.join(quote(col) for col in CUBE_DIMENSIONS)
+    cells = query(csv_path, 'SELECT %s, %s FROM %s %s GROUP BY %s ORDER BY %s'
+                            % (dimensions, ', '.join(aggregates), TABLE, where, dimensions, dimensions), params)
+    #Cells are numbered by position (an empty result comes back with an object index)
+    cells = restore_types(cells).astype({col: 'category' for col in CUBE_DIMENSIONS if col != 'Order_Date'}).reset_index(drop = True)
+
+    pairs = query(csv_path, 'SELECT DISTINCT DENSE_RANK() OVER (ORDER BY %s) - 1 AS cell, Delivery_person_ID FROM %s %s'
+                            % (dimensions, TABLE, where), params)
+    driver_codes, driver_ids = pd.factorize(pairs['Delivery_person_ID'])
+    drivers = pd.DataFrame({'cell': pairs['cell'].to_numpy(np.int64), 'driver': driver_codes})
+    return Cube(cells, drivers, np.asarray(driver_ids))
+
+def select_sketches(csv_path, date_max = None, traffic = None, weather = None):
+    """ This function builds the quantile sketches of a selection (see utils.quantiles) from the
+        number of orders per cell and per value, counted in SQL.
+
+        Input: Path of the csv file, filters of utils.cube.filter_cube
+        Output: Sketches
+    """
+    where, params = where_clause(date_max, Road_traffic_density = traffic, Weatherconditions = weather)
+    dimensions = ', '.join(quote(col) for col in SKETCH_DIMENSIONS)
+    counts = query(csv_path, 'SELECT %s, %s AS value, COUNT(*) AS n FROM %s %s GROUP BY %s, value'
+                             % (dimensions, quote(SKETCH_MEASURE), TABLE, where, dimensions), params)
+    counts = restore_types(counts)
+    return histogram_sketches(counts, counts['value'].to_numpy(), counts['n'].to_numpy())
+
+def select_weeks(csv_path, date_max = None, traffic = None):
+    """ This function aggregates a selection per week in SQL, like utils.rollups.select_weeks.
+
+        Input: Path of the csv file, dates strictly before date_max, list of traffic densities
+        Output: Dataframe indexed by Week_Index with Week_of_Year, Week_Start, orders, drivers and
+                the sum of the measure
+    """
+    where, params = where_clause(date_max, Road_traffic_density = traffic)
+    totals = query(csv_path, 'SELECT Week_Index, COUNT(*) AS orders, COUNT(DISTINCT Delivery_person_ID) AS drivers, '
+                             'SUM(%s) AS %s FROM %s %s GROUP BY Week_Index ORDER BY Week_Index'
+                             % (quote(ROLLUP_MEASURE), quote(measure_column(ROLLUP_MEASURE, 'sum')), TABLE, where), params)
+    return week_labels(totals.set_index('Week_Index'))
+
+def select_driver_stats(csv_path):
+    """ This function aggregates the per-driver statistics store (utils.driver_stats) in SQL.
+
+        Input: Path of the csv file
+        Output: Dataframe
+    """
+    keys = ', '.join(quote(col) for col in STORE_KEYS)
+    aggregates = []
+    for measure in DRIVER_MEASURES:
+        aggregates += ['%s AS %s' % (SQL_STATISTICS[statistic].format(quote(measure)), quote(measure_column(measure, statistic)))
+                       for statistic in STATISTICS]
+    totals = query(csv_path, 'SELECT %s, %s FROM %s GROUP BY %s ORDER BY %s' % (keys, ', '.join(aggregates), TABLE, keys, keys))
+    stats = restore_types(totals.loc[:, STORE_KEYS]).astype({col: 'category' for col in STORE_KEYS})
+    for measure in DRIVER_MEASURES:
+        count = totals[measure_column(measure, 'count')]
+        total = totals[measure_column(measure, 'sum')].fillna(0.0)
+        stats[measure_column(measure, 'count')] = count
+        stats[measure_column(measure, 'mean')] = (total / count).where(count > 0)
+        stats[measure_column(measure, 'm2')] = (totals[measure_column(measure, 'sumsq')].fillna(0.0) - total ** 2 / count).clip(lower = 0).fillna(0.0)
+        stats[measure_column(measure, 'min')] = totals[measure_column(measure, 'min')].astype(float)
+        stats[measure_column(measure, 'max')] = totals[measure_column(measure, 'max')].astype(float)
+    return stats
+
+def column_range(csv_path, column, date_max = None, **dimensions):
+    """ This function returns the smallest and the largest value of a column.
+
+        Input: Path of the csv file, column name, filters (see where_clause)
+        Output: Tuple (min, max)
+    """
+    where, params = where_clause(date_max, **dimensions)
+    result = query(csv_path, 'SELECT MIN({0}), MAX({0}) FROM {1} {2}'.format(quote(column), TABLE, where), params)
+    return tuple(result.iloc[0])
+
+def main():
+    import argparse
+
+    from utils.data import DATASET_PATH
+
+    parser = argparse.ArgumentParser(description = 'Load the cleaned csv into the SQLite database, chunk by chunk.')
+    parser.add_argument('path', nargs = '?', default = DATASET_PATH, help = 'raw csv in the train.csv format')
+    parser.add_argument('--chunk-rows', type = int, default = CHUNK_ROWS, help = 'lines per chunk')
+    args = parser.parse_args()
+    out = build_database(args.path, args.chunk_rows)
+    print('%s: %d orders' % (out, query(args.path, 'SELECT COUNT(*) AS n FROM %s' % TABLE)['n'].iloc[0]))
+
+if __name__ == '__main__':
+    main()
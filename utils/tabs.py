@@ -0,0 +1,18 @@
+""" Lazy tabs for the pages. st.tabs runs the code of every tab on each rerun, whichever is open,
+    so the pages use a horizontal radio as the tab bar and compute only the open tab, its content
+    being memoized per filter state by utils.figure_cache.
+"""
+#Import Libraries
+import streamlit as st
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def lazy_tabs(labels, key):
+    """ This function draws the tab bar.
+
+        Input: Tab labels, widget key (keeps the open tab across reruns)
+        Output: Label of the open tab
+    """
+    return st.radio('Tab', labels, horizontal = True, key = key, label_visibility = 'collapsed')
@@ -0,0 +1,111 @@
+""" Resolution and downsampling of the time series sent to the charts, so the size of a figure stays
+    bounded whatever the length of the history.
+
+    A series is first bucketed at the finest resolution (day, week, month) giving at most
+    MAX_CHART_POINTS buckets over its date range. When even monthly buckets are too many, or for
+    series that cannot be re-bucketed (e.g. ratios), the points are thinned with Largest-Triangle-
+    Three-Buckets (LTTB), which keeps the first and last points and the peaks and dips of the shape.
+    The budget is CURRY_MAX_CHART_POINTS (500 by default).
+"""
+#Import Libraries
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.rollups import calendar_fields, week_start
+
+MAX_CHART_POINTS = int(os.environ.get('CURRY_MAX_CHART_POINTS', 500))
+RESOLUTIONS = ['day', 'week', 'month']
+#Length of a bucket of each resolution, in days, to count the buckets of a date range
+RESOLUTION_DAYS = {'day': 1, 'week': 7, 'month': 365.25 / 12}
+
+#===========================================================================================#
+#                                       Functions                                           #
+#===========================================================================================#
+
+def choose_resolution(first, last, max_points = MAX_CHART_POINTS):
+    """ This function chooses the finest resolution with at most max_points buckets between two dates.
+
+        Input: First and last date of the series, maximum number of points
+        Output: 'day', 'week' or 'month' (month when no resolution fits)
+    """
+    days = (pd.Timestamp(last) - pd.Timestamp(first)).days + 1
+    for resolution in RESOLUTIONS:
+        if np.ceil(days / RESOLUTION_DAYS[resolution]) <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+def bucket_dates(dates, resolution):
+    """ This function returns the first day of the bucket of each date.
+
+        Input: Series of dates, resolution ('day', 'week' starting on Sunday like Week_Index, 'month')
+        Output: Series of dates
+    """
+    if resolution == 'day':
+        return dates.dt.normalize()
+    if resolution == 'week':
+        return pd.Series(week_start(calendar_fields(dates)['Week_Index']), index = dates.index)
+    if resolution == 'month':
+        return dates.dt.to_period('M').dt.start_time
+    raise ValueError('resolution must be one of %s, got %r' % (RESOLUTIONS, resolution))
+
+def lttb_indices(x, y, max_points = MAX_CHART_POINTS):
+    """ This function selects the points of a series to draw with Largest-Triangle-Three-Buckets.
+
+        The points between the first and the last are split into max_points - 2 buckets; each bucket
+        keeps the point forming the largest triangle with the point kept in the previous bucket and
+        the average point of the next bucket.
+
+        Input: Arrays of x (sorted, numbers or datetimes) and y, maximum number of points
+        Output: Sorted array of the positions kept
+    """
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1])[:max(max_points, 0)]
+    x = np.asarray(x).astype(np.float64)
+    y = np.asarray(y, dtype = np.float64)
+    edges = (np.arange(max_points - 1) * (n - 2) / (max_points - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    kept = np.zeros(max_points, dtype = np.int64)
+    kept[-1] = n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+def downsample(df, x, y, max_points = MAX_CHART_POINTS):
+    """ This function keeps at most max_points lines of a series sorted by x (LTTB on the y column).
+
+        Input: Dataframe, x column, y column, maximum number of points
+        Output: Dataframe
+    """
+    if len(df) <= max_points:
+        return df
+    return df.iloc[lttb_indices(df[x].to_numpy(), df[y].to_numpy(), max_points)]
+
+def resample_series(df, date, values, max_points = MAX_CHART_POINTS):
+    """ This function sums an additive series into the buckets of the resolution chosen for its date
+        range, then downsamples it with LTTB if it is still over the budget.
+
+        Input: Dataframe sorted by date, date column, value columns (summed; LTTB on the first one),
+               maximum number of points
+        Output: Tuple (dataframe [date] + values, resolution)
+    """
+    if not len(df):
+        return df.loc[:, [date] + list(values)], RESOLUTIONS[0]
+    resolution = choose_resolution(df[date].min(), df[date].max(), max_points)
+    if resolution != 'day':
+        df = (df.loc[:, list(values)]
+                .groupby(bucket_dates(df[date], resolution).rename(date), sort = True).sum()
+                .reset_index())
+    return downsample(df.loc[:, [date] + list(values)], date, values[0], max_points), resolution